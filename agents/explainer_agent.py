@@ -5,13 +5,25 @@ Converts a verified solution into a clear, step-by-step explanation
 suitable for JEE-level students.
 """
 
-from anthropic import Anthropic
 import json
 
+from agents.streaming import TextStream
+from llm.client import as_llm_client, make_llm_client
+from tracing.tracer import get_tracer
+
+UNVERIFIED_MESSAGE = (
+    "The solution could not be confidently verified. "
+    "Please review the problem or provide clarification."
+)
+
 
 class ExplainerAgent:
-    def __init__(self, api_key: str, model: str):
-        self.client = Anthropic(api_key=api_key)
+    def __init__(self, api_key: str, model: str, client=None):
+        """
+        Parameters:
+        - client: LLM client (defaults to Anthropic in Config.LLM_MODE)
+        """
+        self.client = as_llm_client(client) if client is not None else make_llm_client("anthropic", api_key)
         self.model = model
 
     def explain(self, problem: dict, solution: dict, verification: dict):
@@ -27,13 +39,42 @@ class ExplainerAgent:
         # Safety check: explain only verified solutions
         if not verification.get("is_correct", False):
             return {
-                "explanation": (
-                    "The solution could not be confidently verified. "
-                    "Please review the problem or provide clarification."
-                )
+                "explanation": UNVERIFIED_MESSAGE
             }
 
-        prompt = f"""
+        prompt = self._build_prompt(problem, solution)
+
+        with get_tracer().span("explainer", model=self.model) as span:
+            response = self.client.complete(prompt, self.model, max_tokens=1200)
+            span.record_usage(response, prompt=prompt)
+
+        return {
+            "explanation": response.text.strip()
+        }
+
+    def explain_stream(self, problem: dict, solution: dict, verification: dict):
+        """
+        Streaming variant of explain().
+        Iterate the returned TextStream for text chunks; afterwards
+        .result holds the same dict explain() returns.
+        """
+        build_result = lambda text: {"explanation": text.strip()}
+
+        if not verification.get("is_correct", False):
+            return TextStream(iter([UNVERIFIED_MESSAGE]), build_result)
+
+        prompt = self._build_prompt(problem, solution)
+
+        def chunks():
+            with get_tracer().span("explainer", model=self.model, streamed=True) as span:
+                stream = self.client.stream(prompt, self.model, max_tokens=1200)
+                yield from stream
+                span.record_usage(stream.response, prompt=prompt)
+
+        return TextStream(chunks(), build_result)
+
+    def _build_prompt(self, problem: dict, solution: dict):
+        return f"""
 You are a math tutor preparing a JEE-style explanation.
 
 Problem:
@@ -53,13 +94,3 @@ Guidelines:
 
 Write the explanation clearly.
 """
-
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=1200,
-            messages=[{"role": "user", "content": prompt}]
-        )
-
-        return {
-            "explanation": response.content[0].text.strip()
-        }
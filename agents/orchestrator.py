@@ -0,0 +1,248 @@
+"""
+Pipeline Orchestrator
+---------------------
+Runs the agent pipeline as a dependency graph on asyncio.
+
+Each stage starts as soon as the stages it depends on have finished,
+so independent work overlaps:
+- RAG retrieval runs alongside the parser (it only needs raw text)
+- the explainer starts speculatively as soon as a solution exists,
+  and its output is dropped if the verifier rejects the solution
+
+If any stage fails, every stage still running is cancelled.
+"""
+
+import asyncio
+import inspect
+import time
+
+
+class PipelineError(Exception):
+    def __init__(self, stage, error):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+class Stage:
+    def __init__(self, name, func, deps=()):
+        """
+        Parameters:
+        - name: result key for this stage
+        - func: callable taking the results of `deps` as keyword
+          arguments; plain functions run in a worker thread
+        - deps: names of stages (or pipeline inputs) it needs
+        """
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+
+    async def call(self, kwargs):
+        if inspect.iscoroutinefunction(self.func):
+            return await self.func(**kwargs)
+        return await asyncio.to_thread(self.func, **kwargs)
+
+
+class PipelineOrchestrator:
+    def __init__(self, stages):
+        self.stages = {stage.name: stage for stage in stages}
+
+    def _order(self, inputs):
+        """Topological order of stages; raises on unknown or cyclic deps"""
+        order, done, visiting = [], set(inputs), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name not in self.stages:
+                raise ValueError(f"Unknown dependency: {name}")
+            if name in visiting:
+                raise ValueError(f"Dependency cycle at stage: {name}")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    async def run(self, **inputs):
+        """
+        Run all stages concurrently, respecting dependencies.
+
+        Returns:
+        {
+            "results": {stage: output},
+            "timings": {stage: {"start": s, "end": s, "seconds": s}},
+            "total_seconds": float
+        }
+        """
+        self._order(inputs)
+        start = time.perf_counter()
+        results = dict(inputs)
+        timings = {}
+        tasks = {}
+
+        async def run_stage(stage):
+            for dep in stage.deps:
+                if dep in tasks:
+                    await tasks[dep]
+            kwargs = {dep: results[dep] for dep in stage.deps}
+
+            stage_start = time.perf_counter()
+            try:
+                output = await stage.call(kwargs)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                raise PipelineError(stage.name, e) from e
+            stage_end = time.perf_counter()
+
+            results[stage.name] = output
+            timings[stage.name] = {
+                "start": stage_start - start,
+                "end": stage_end - start,
+                "seconds": stage_end - stage_start
+            }
+            return output
+
+        for stage in self.stages.values():
+            tasks[stage.name] = asyncio.ensure_future(run_stage(stage))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        return {
+            "results": results,
+            "timings": timings,
+            "total_seconds": time.perf_counter() - start
+        }
+
+    def run_sync(self, **inputs):
+        """Blocking wrapper around run() for non-async callers"""
+        return asyncio.run(self.run(**inputs))
+
+    def run_serial(self, **inputs):
+        """
+        Run the same graph one stage at a time (the old behaviour).
+        Useful as a latency baseline.
+        """
+        start = time.perf_counter()
+        results = dict(inputs)
+        timings = {}
+
+        for name in self._order(inputs):
+            stage = self.stages[name]
+            stage_start = time.perf_counter()
+            try:
+                kwargs = {dep: results[dep] for dep in stage.deps}
+                if inspect.iscoroutinefunction(stage.func):
+                    results[name] = asyncio.run(stage.func(**kwargs))
+                else:
+                    results[name] = stage.func(**kwargs)
+            except Exception as e:
+                raise PipelineError(name, e) from e
+            stage_end = time.perf_counter()
+            timings[name] = {
+                "start": stage_start - start,
+                "end": stage_end - start,
+                "seconds": stage_end - stage_start
+            }
+
+        return {
+            "results": results,
+            "timings": timings,
+            "total_seconds": time.perf_counter() - start
+        }
+
+
+def build_solve_pipeline(parser, router, retriever, solver, verifier, explainer,
+                         top_k=3, template_solver=None, before_llm=None):
+    """
+    Standard Math Mentor graph:
+
+        raw_text ─┬─> parsed ─┬─> route
+                  │           ├─> solution ─┬─> verification ─┐
+                  └─> context ┘             └─> explanation ──┴─> final
+
+    With a TemplateSolver, recognized problems skip the solver LLM.
+    router / explainer may be None (batch solving has neither); their
+    stages are then left out. before_llm() runs before every LLM call
+    (e.g. RateLimiter.wait). A parser failure fails the pipeline; a
+    problem that needs clarification gets no solution.
+
+    Run with: orchestrator.run(raw_text=...)
+    """
+    throttle = before_llm or (lambda: None)
+
+    def parse(raw_text):
+        throttle()
+        parsed = parser.parse(raw_text)
+        if parsed.get("error"):
+            raise RuntimeError(f"Parser failed: {parsed['error']}")
+        return parsed
+
+    def retrieve(raw_text):
+        return retriever.retrieve(raw_text, top_k)
+
+    def route(parsed):
+        throttle()
+        return router.route(parsed)
+
+    def solve(parsed, context):
+        if parsed.get("needs_clarification"):
+            return None
+        fast_path = template_solver.solve(parsed) if template_solver else None
+        if fast_path:
+            return fast_path
+        throttle()
+        return solver.solve(parsed, context_docs=context)
+
+    def verify(parsed, solution):
+        if solution is None:
+            return None
+        throttle()
+        return verifier.verify(parsed, solution)
+
+    def explain(parsed, solution):
+        if solution is None:
+            return None
+        # Speculative: assume the solution verifies, check in finalize()
+        throttle()
+        return explainer.explain(parsed, solution, {"is_correct": True})
+
+    def finalize(parsed, solution, verification, route=None, explanation=None):
+        if explainer is not None and verification and not verification.get("is_correct", False):
+            throttle()
+            explanation = explainer.explain(parsed, solution, verification)
+        return {
+            "parsed": parsed,
+            "route": route,
+            "solution": solution,
+            "verification": verification,
+            "explanation": explanation
+        }
+
+    stages = [
+        Stage("parsed", parse, ["raw_text"]),
+        Stage("context", retrieve, ["raw_text"]),
+        Stage("solution", solve, ["parsed", "context"]),
+        Stage("verification", verify, ["parsed", "solution"]),
+    ]
+    final_deps = ["parsed", "solution", "verification"]
+    if router is not None:
+        stages.append(Stage("route", route, ["parsed"]))
+        final_deps.append("route")
+    if explainer is not None:
+        stages.append(Stage("explanation", explain, ["parsed", "solution"]))
+        final_deps.append("explanation")
+    stages.append(Stage("final", finalize, final_deps))
+    return PipelineOrchestrator(stages)
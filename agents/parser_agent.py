@@ -1,18 +1,26 @@
-# ✅ USE everywhere
-from google import genai
-
 import json
 
+from llm.client import as_llm_client, make_llm_client
+from tracing.tracer import get_tracer
+
 
 class ParserAgent:
-    def __init__(self, api_key, model="models/gemini-1.0-pro"
-):
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(model)
+    def __init__(self, api_key=None, model="models/gemini-1.0-pro", client=None, verify=False):
+        """
+        Parameters:
+        - client: LLM client (defaults to Gemini in Config.LLM_MODE)
+        - verify: make one test call now to fail fast on a bad key
+        """
+        self.client = as_llm_client(client) if client is not None else make_llm_client("gemini", api_key)
+        self.model = model
 
-        # Hard verification (fail fast)
+        if verify:
+            self.verify()
+
+    def verify(self):
+        """Hard verification of the API key (one tiny live call)"""
         try:
-            self.model.generate_content("Reply with OK only.")
+            self.client.complete("Reply with OK only.", self.model, max_tokens=5)
         except Exception as e:
             raise RuntimeError(f"Gemini API key verification failed: {e}")
 
@@ -40,13 +48,11 @@ Return ONLY the JSON object.
 """
 
         try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config={
-                    "temperature": 0.0,
-                    "max_output_tokens": 1000
-                }
-            )
+            with get_tracer().span("parser", model=self.model) as span:
+                response = self.client.complete(
+                    prompt, self.model, max_tokens=1000, temperature=0.0
+                )
+                span.record_usage(response, prompt=prompt, text=response.text)
 
             # Gemini-safe text extraction
             raw_output = response.text.strip()
@@ -57,13 +63,15 @@ Return ONLY the JSON object.
 
             return json.loads(raw_output)
 
-        except Exception:
-            # Fallback (never crash pipeline)
+        except Exception as e:
+            # Fallback (never crash pipeline); "error" tells callers that
+            # retrying may help, unlike a genuine clarification request
             return {
                 "problem_text": raw_text,
                 "topic": "unknown",
                 "variables": [],
                 "constraints": [],
                 "needs_clarification": True,
-                "clarification_reason": "Failed to parse structured output"
+                "clarification_reason": "Failed to parse structured output",
+                "error": f"{type(e).__name__}: {e}"
             }
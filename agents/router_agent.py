@@ -5,15 +5,73 @@ Determines the math domain and routes the problem
 to the appropriate solving strategy/tools.
 """
 
-from anthropic import Anthropic
+import threading
+import time
+
+from agents.topic_classifier import KeywordMatcher, load_topic_classifier
+from config.settings import Config
+from llm.client import as_llm_client, make_llm_client
+from tracing.tracer import get_tracer
+
+TOPIC_ROUTES = {
+    "probability": "probability_solver",
+    "calculus": "calculus_solver",
+    "linear_algebra": "linear_algebra_solver",
+    "algebra": "algebra_solver",
+}
 
 
 class RouterAgent:
-    def __init__(self, api_key: str, model: str):
-        self.client = Anthropic(api_key=api_key)
+    def __init__(self, api_key: str, model: str, classifier=None,
+                 confidence_threshold: float = Config.ROUTER_CONFIDENCE_THRESHOLD,
+                 client=None, memory=None, use_classifier: bool = Config.ROUTER_CLASSIFIER):
+        """
+        Parameters:
+        - classifier: TopicClassifier used before the LLM
+        - confidence_threshold: below this the LLM is still asked
+        - client: LLM client (defaults to Anthropic in Config.LLM_MODE)
+        - memory: optional SolutionMemory; its labeled problems extend
+          the default classifier's centroids
+        - use_classifier: without a classifier, build the default one
+          (load_topic_classifier) the first time it is needed
+        """
+        self.client = as_llm_client(client) if client is not None else make_llm_client("anthropic", api_key)
         self.model = model
+        self.classifier = classifier
+        self.confidence_threshold = confidence_threshold
+        self.memory = memory
+        self.use_classifier = use_classifier
+        self._classifier_lock = threading.Lock()
+        self.keywords = KeywordMatcher()
+
+        self.stats = {"routes": 0, "llm_fallbacks": 0, "seconds": 0.0}
 
     def route(self, parsed_problem: dict):
+        """
+        Decide problem category and required tools (timed).
+        """
+        start = time.perf_counter()
+        fallbacks = self.stats["llm_fallbacks"]
+        try:
+            with get_tracer().span("router") as span:
+                route = self._route(parsed_problem)
+                span.attrs["topic"] = route["topic"]
+                if self.stats["llm_fallbacks"] > fallbacks:
+                    span.model = self.model
+                return route
+        finally:
+            self.stats["routes"] += 1
+            self.stats["seconds"] += time.perf_counter() - start
+
+    def routing_stats(self):
+        routes = max(self.stats["routes"], 1)
+        return {
+            **self.stats,
+            "avg_ms": self.stats["seconds"] / routes * 1000,
+            "llm_fallback_rate": self.stats["llm_fallbacks"] / routes
+        }
+
+    def _route(self, parsed_problem: dict):
         """
         Decide problem category and required tools.
 
@@ -55,33 +113,42 @@ class RouterAgent:
             )
 
         # ---------- 2. Keyword-based fallback ----------
-        if any(k in text for k in ["probability", "coin", "dice", "chance"]):
-            return self._build_route(
-                topic="probability",
-                route="probability_solver",
-                tools=["rag", "calculator"],
-                confidence=0.8
-            )
-
-        if any(k in text for k in ["limit", "derivative", "differentiate", "rate of change"]):
+        keyword_topic = self.keywords.match(text)
+        if keyword_topic:
             return self._build_route(
-                topic="calculus",
-                route="calculus_solver",
+                topic=keyword_topic,
+                route=TOPIC_ROUTES[keyword_topic],
                 tools=["rag", "calculator"],
                 confidence=0.8
             )
 
-        if any(k in text for k in ["matrix", "determinant", "vector"]):
-            return self._build_route(
-                topic="linear_algebra",
-                route="linear_algebra_solver",
-                tools=["rag", "calculator"],
-                confidence=0.8
-            )
-
-        # ---------- 3. LLM-based classification (last resort) ----------
+        # ---------- 3. Local embedding classifier ----------
+        classifier = self._get_classifier() if text else None
+        if classifier is not None:
+            topic, confidence = classifier.classify(text)
+            if confidence >= self.confidence_threshold:
+                return self._build_route(
+                    topic=topic,
+                    route=TOPIC_ROUTES[topic],
+                    tools=["rag", "calculator"],
+                    confidence=round(min(confidence, 0.8), 3)
+                )
+
+        # ---------- 4. LLM-based classification (last resort) ----------
+        self.stats["llm_fallbacks"] += 1
         return self._llm_route(parsed_problem)
 
+    def _get_classifier(self):
+        if self.classifier is None and self.use_classifier:
+            with self._classifier_lock:
+                if self.classifier is None and self.use_classifier:
+                    try:
+                        self.classifier = load_topic_classifier(self.memory)
+                    except Exception as e:
+                        print(f"⚠️ Topic classifier unavailable, using the LLM: {e}")
+                        self.use_classifier = False
+        return self.classifier
+
     def _llm_route(self, parsed_problem: dict):
         """
         Use LLM only if deterministic routing fails.
@@ -100,13 +167,11 @@ Problem:
 Respond with only the category name.
 """
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=20,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        with get_tracer().span("router_llm", model=self.model) as span:
+            response = self.client.complete(prompt, self.model, max_tokens=20)
+            span.record_usage(response, prompt=prompt)
 
-        topic = response.content[0].text.strip().lower()
+        topic = response.text.strip().lower()
 
         return self._build_route(
             topic=topic,
@@ -1,27 +1,20 @@
-class SolverAgent:
-    def __init__(self, client, model, rag_retriever):
-        self.client = client
-        self.model = model
-        self.rag = rag_retriever
-    
-    def solve(self, structured_problem):
-        """Solve using RAG context"""
-        # Retrieve relevant knowledge
-        context_docs = self.rag.retrieve(
-            structured_problem["problem_text"]
-        )
-        
-        context = "\n\n".join([
-            f"Source: {doc['source']}\n{doc['content']}"
-            for doc in context_docs
-        ])
-        
-        prompt = f"""Given this context from our knowledge base:
+import json
+import threading
+
+from agents.streaming import TextStream
+from llm.client import as_llm_client
+from rag.context_packer import ContextPacker
+from tracing.tracer import estimate_tokens, get_tracer
+
+# Parser fields that carry no information when empty
+OPTIONAL_FIELDS = ("variables", "constraints", "clarification_reason", "needs_clarification")
+
+PROMPT_TEMPLATE = """Given this context from our knowledge base:
 
 {context}
 
 Solve this problem:
-{json.dumps(structured_problem, indent=2)}
+{problem}
 
 Provide:
 1. Final answer
@@ -30,13 +23,110 @@ Provide:
 
 Be precise and show all work."""
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=2000,
-            messages=[{"role": "user", "content": prompt}]
-        )
+
+class SolverAgent:
+    def __init__(self, client, model, rag_retriever, packer=None):
+        """
+        Parameters:
+        - client: LLMClient (live / record / replay) or anthropic.Anthropic
+        - packer: ContextPacker fitting retrieved chunks to a token budget
+        """
+        self.client = as_llm_client(client)
+        self.model = model
+        self.rag = rag_retriever
+        self.packer = packer or ContextPacker()
+
+        self.packing_totals = {"requests": 0, "tokens_saved": 0}
+        self._lock = threading.Lock()
+    
+    def solve(self, structured_problem, context_docs=None):
+        """Solve using RAG context (retrieved here unless passed in)"""
+        prompt, context_docs, packing = self._build_prompt(structured_problem, context_docs)
+
+        with get_tracer().span("solver", model=self.model, tokens_saved=packing["tokens_saved"]) as span:
+            response = self.client.complete(prompt, self.model, max_tokens=2000)
+            span.record_usage(response, prompt=prompt)
         
         return {
-            "solution": response.content[0].text,
+            "solution": response.text,
             "context_used": context_docs
-        }
\ No newline at end of file
+        }
+
+    def solve_stream(self, structured_problem, context_docs=None):
+        """
+        Streaming variant of solve().
+        Iterate the returned TextStream for text chunks; afterwards
+        .result holds the same dict solve() returns.
+        """
+        prompt, context_docs, packing = self._build_prompt(structured_problem, context_docs)
+
+        def chunks():
+            with get_tracer().span("solver", model=self.model, streamed=True,
+                                   tokens_saved=packing["tokens_saved"]) as span:
+                stream = self.client.stream(prompt, self.model, max_tokens=2000)
+                yield from stream
+                span.record_usage(stream.response, prompt=prompt)
+
+        return TextStream(
+            chunks(),
+            lambda text: {"solution": text, "context_used": context_docs}
+        )
+
+    def _build_prompt(self, structured_problem, context_docs):
+        # Retrieve relevant knowledge
+        if context_docs is None:
+            with get_tracer().span("rag"):
+                context_docs = self.rag.retrieve(
+                    structured_problem["problem_text"]
+                )
+        
+        # Distance scores (KnowledgeBase / FAISS L2) rank lowest first
+        packed, packing = self.packer.pack(
+            context_docs,
+            higher_is_better=not getattr(self.rag, "score_is_distance", False)
+        )
+        
+        prompt = PROMPT_TEMPLATE.format(
+            context=self._format_context(packed),
+            problem=self._format_problem(structured_problem)
+        )
+
+        # Compare against the unpacked prompt (every chunk verbatim, indented JSON)
+        unpacked = PROMPT_TEMPLATE.format(
+            context="\n\n".join(
+                f"Source: {doc['source']}\n{doc['content']}" for doc in context_docs
+            ),
+            problem=json.dumps(structured_problem, indent=2)
+        )
+        packing["prompt_tokens"] = estimate_tokens(prompt)
+        packing["tokens_saved"] = estimate_tokens(unpacked) - packing["prompt_tokens"]
+
+        with self._lock:
+            self.packing_totals["requests"] += 1
+            self.packing_totals["tokens_saved"] += packing["tokens_saved"]
+
+        print(
+            f"📦 Context packed: {packing['chunks_in']} → {packing['chunks_out']} chunks, "
+            f"{packing['prompt_tokens']} prompt tokens ({packing['tokens_saved']} saved)"
+        )
+
+        return prompt, packed, packing
+
+    def _format_context(self, docs):
+        """Group chunks under one header per source"""
+        by_source = {}
+        for doc in docs:
+            by_source.setdefault(doc.get("source", "unknown"), []).append(doc["content"])
+
+        return "\n\n".join(
+            f"Source: {source}\n" + "\n...\n".join(contents)
+            for source, contents in by_source.items()
+        )
+
+    def _format_problem(self, structured_problem):
+        """Compact JSON without empty parser fields"""
+        problem = {
+            key: value for key, value in structured_problem.items()
+            if not (key in OPTIONAL_FIELDS and not value)
+        }
+        return json.dumps(problem, ensure_ascii=False)
@@ -0,0 +1,58 @@
+"""
+Streaming Helpers
+-----------------
+Wraps an iterator of text chunks so callers can render tokens as
+they arrive and still get the assembled result afterwards.
+"""
+
+import time
+
+
+class TextStream:
+    def __init__(self, chunks, build_result=None):
+        """
+        Parameters:
+        - chunks: iterable of text pieces from the model
+        - build_result: called with the full text once the stream
+          ends; its return value is stored in .result
+        """
+        self._chunks = chunks
+        self._build_result = build_result or (lambda text: text)
+
+        self.text = ""
+        self.result = None
+        self.done = False
+
+        # Latency metrics (seconds), filled while iterating
+        self.ttft = None
+        self.total_time = None
+
+    def __iter__(self):
+        start = time.perf_counter()
+        parts = []
+
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            if self.ttft is None:
+                self.ttft = time.perf_counter() - start
+            parts.append(chunk)
+            yield chunk
+
+        self.total_time = time.perf_counter() - start
+        self.text = "".join(parts)
+        self.result = self._build_result(self.text)
+        self.done = True
+
+    def consume(self):
+        """Drain the stream without rendering; returns .result"""
+        for _ in self:
+            pass
+        return self.result
+
+    def metrics(self):
+        return {
+            "ttft_seconds": self.ttft,
+            "total_seconds": self.total_time,
+            "chars": len(self.text)
+        }
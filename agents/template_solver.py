@@ -0,0 +1,389 @@
+"""
+Template Solver (fast path)
+---------------------------
+Recognizes common textbook problem templates and solves them
+deterministically with the SymPy calculator, skipping the solver LLM.
+SymPy runs in CalculatorEngine worker processes, so a pathological
+expression times out (and falls back to the LLM) instead of hanging.
+
+Supported templates:
+- binomial probability (coin / die / given p, exactly / at least / at most k)
+- quadratic equations (roots)
+- derivatives
+- limits
+
+Output uses the same ANSWER / STEPS / FORMULAS USED format as the
+LLM solver. Anything not confidently recognized returns None, and so
+does anything a template can't fully model (a bias it can't read,
+conditioning, comparisons or "or" between outcomes, a sub-range of the
+trials, several dice or coins, a higher-order derivative): a wrong fast
+answer is worse than an LLM call.
+"""
+
+from fractions import Fraction
+import re
+import time
+
+from tools.calc_engine import CalculatorEngine
+
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+    "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14,
+    "fifteen": 15, "sixteen": 16, "seventeen": 17, "eighteen": 18,
+    "nineteen": 19, "twenty": 20
+}
+NUM = r"(\d+|" + "|".join(NUMBER_WORDS) + r")"
+
+TRIALS_RE = re.compile(NUM + r"\s+times", re.IGNORECASE)
+COUNT_RE = re.compile(
+    r"(exactly|at least|at most|no more than|no less than)\s+" + NUM,
+    re.IGNORECASE
+)
+PROB = r"([0-9]*\.?[0-9]+(?:\s*/\s*[0-9]+)?\s*%?)"
+# "probability of heads (is) 0.3", "P(H) = 0.7", "p = 1/4"
+GIVEN_P_RE = re.compile(
+    r"(?:probability of (?:getting |a )?(success|heads?|tails?)|"
+    r"\bp\s*\(\s*(success|heads?|tails?|h|t)\s*\)|\bp\b(?=\s*=))"
+    r"\s*(?:is|=|of|:)?\s*" + PROB,
+    re.IGNORECASE
+)
+# Any stated probability, parsed or not
+ANY_P_RE = re.compile(
+    r"\bp\s*\(|\bp\s*=|probability of [\w\s]{0,30}?\b(?:is|=)\s*[0-9.]",
+    re.IGNORECASE
+)
+BIAS_RE = re.compile(r"\b(?:biased|unfair|loaded|weighted)\b", re.IGNORECASE)
+CONDITION_RE = re.compile(
+    r"\bgiven\b|\bif (?:the|it is|we know)\b|\bknown (?:that|to)\b|"
+    r"\bconditional\b|\bprovided that\b",
+    re.IGNORECASE
+)
+COIN_SIDE_RE = re.compile(r"\b(head|tail)s?\b", re.IGNORECASE)
+# Outcomes the single-face / single-side templates can't model
+COMPARISON_RE = re.compile(
+    r"(?<!no )\b(?:greater|less|more|fewer|bigger|smaller|higher|lower)\s+than\b|"
+    r"\b(?:above|below|under|over|between|even|odd|prime)\b",
+    re.IGNORECASE
+)
+OR_RE = re.compile(r"\bor\b", re.IGNORECASE)
+SUBRANGE_RE = re.compile(
+    r"\b(?:first|last|final|initial|next)\s+(?:" + NUM + r"\b|toss|roll|throw|flip|trial)",
+    re.IGNORECASE
+)
+SEVERAL_RE = re.compile(
+    r"\b(?:(?!one\b|1\b)" + NUM + r"|a pair of|pair of|both|several|multiple)"
+    r"\s+(?:[\w-]+\s+)?(?:dice|die|coins?)\b|\bcoins\b",
+    re.IGNORECASE
+)
+DIE_FACE_RE = re.compile(
+    r"\b(?:a |an )?(six|sixes|6s?|five|fives|5s?|four|fours|4s?|three|threes|3s?|"
+    r"two|twos|2s?|one|ones|1s?)\b",
+    re.IGNORECASE
+)
+
+# Math-looking run of characters (no words longer than function names)
+EXPR_CHARS = r"[0-9a-z\s\^\*\+\-/\(\)\.]"
+QUADRATIC_RE = re.compile(
+    r"(" + EXPR_CHARS + r"+)=(" + EXPR_CHARS + r"+)",
+    re.IGNORECASE
+)
+HIGHER_ORDER_RE = re.compile(
+    r"\b(?:second|third|fourth|fifth|higher|nth|n-th|\d+(?:st|nd|rd|th))[\s-]+(?:order\s+)?derivative|"
+    r"\bderivative of order\b|d\s*\^\s*\{?\d|d[²³]|\btwice\b|f''|\bpartial\b",
+    re.IGNORECASE
+)
+DERIVATIVE_RE = re.compile(
+    r"(?:derivative of|differentiate|d/dx\s*(?:of)?)\s*(.+?)"
+    r"(?:\s+(?:with respect to|w\.?r\.?t\.?)\s+x)?\s*[.?!]*$",
+    re.IGNORECASE
+)
+LIMIT_RE = re.compile(
+    r"(?:limit of|lim)\s*(.+?)\s*(?:as\s+)?x\s*(?:->|→|approaches|tends to)\s*"
+    r"([-+]?(?:\d+\.?\d*|infinity|oo|∞|0))\s*(?:of\s+(.+?))?\s*[.?!]*$",
+    re.IGNORECASE
+)
+LIM_ARROW_RE = re.compile(
+    r"\blim\s*_?\{?\s*x\s*(?:->|→)\s*([-+]?(?:\d+\.?\d*|infinity|oo|∞))\s*\}?\s*(.+?)\s*[.?!]*$",
+    re.IGNORECASE
+)
+
+
+def _to_int(token):
+    token = token.lower()
+    return NUMBER_WORDS[token] if token in NUMBER_WORDS else int(token)
+
+
+def _to_probability(token):
+    """"0.3", "3/10" or "30%" -> "3/10" (None if not in [0, 1])"""
+    token = token.replace(" ", "")
+    value = Fraction(token[:-1]) / 100 if token.endswith("%") else Fraction(token)
+    return str(value) if 0 <= value <= 1 else None
+
+
+def _clean_expr(text):
+    return (
+        text.strip()
+        .replace("^", "**")
+        .replace("×", "*")
+        .replace("−", "-")
+        .strip(" .,:;")
+    )
+
+
+class TemplateSolver:
+    def __init__(self, calculator=None):
+        """
+        calculator: Calculator or CalculatorEngine; defaults to a
+        sandboxed CalculatorEngine sized by the CALC_* settings
+        """
+        self.calc = calculator or CalculatorEngine()
+
+        self.attempts = 0
+        self.hits = 0
+        self.by_template = {}
+        self.fast_path_seconds = 0.0
+
+    def solve(self, parsed_problem: dict):
+        """
+        Try every template on the parsed problem.
+        Returns a SolverAgent-style dict plus "template", or None.
+        """
+        start = time.perf_counter()
+        self.attempts += 1
+
+        text = parsed_problem.get("problem_text", "") or ""
+        result = None
+        for name, handler in (
+            ("binomial", self._binomial),
+            ("derivative", self._derivative),
+            ("limit", self._limit),
+            ("quadratic", self._quadratic),
+        ):
+            try:
+                result = handler(text)
+            except Exception:
+                result = None
+            if result:
+                result["template"] = name
+                break
+
+        self.fast_path_seconds += time.perf_counter() - start
+        if result:
+            self.hits += 1
+            self.by_template[result["template"]] = self.by_template.get(result["template"], 0) + 1
+        return result
+
+    def stats(self, llm_solver_seconds=None):
+        """
+        Fast-path hit rate; with the average LLM solver latency,
+        also the estimated wall time saved.
+        """
+        stats = {
+            "attempts": self.attempts,
+            "hits": self.hits,
+            "hit_rate": self.hits / max(self.attempts, 1),
+            "by_template": dict(self.by_template),
+            "fast_path_seconds": self.fast_path_seconds
+        }
+        if llm_solver_seconds is not None:
+            stats["seconds_saved"] = max(
+                self.hits * llm_solver_seconds - self.fast_path_seconds, 0.0
+            )
+        return stats
+
+    # ---------- helpers ----------
+
+    def _single_var_expr(self, expr_text):
+        """Parse expr_text; accept it only if its only symbol is x"""
+        expr_text = _clean_expr(expr_text)
+        if not expr_text:
+            return None
+        parsed = self.calc.evaluate(expr_text)
+        if not parsed["success"]:
+            return None
+
+        if parsed["symbols"] != ["x"]:
+            return None
+        return expr_text
+
+    def _format(self, answer, steps, formulas):
+        lines = [f"ANSWER: {answer}", "", "STEPS:"]
+        lines += [f"{i}. {step}" for i, step in enumerate(steps, start=1)]
+        lines += ["", "FORMULAS USED:"]
+        lines += [f"- {formula}" for formula in formulas]
+        return {
+            "solution": "\n".join(lines),
+            "context_used": []
+        }
+
+    # ---------- templates ----------
+
+    def _binomial(self, text):
+        trials = list(TRIALS_RE.finditer(text))
+        counts = list(COUNT_RE.finditer(text))
+        if len(trials) != 1 or len(counts) != 1:
+            return None
+        lower = text.lower()
+        if (
+            CONDITION_RE.search(text) or COMPARISON_RE.search(text) or OR_RE.search(text)
+            or SUBRANGE_RE.search(text) or SEVERAL_RE.search(text)
+            or ("coin" in lower and ("die" in lower or "dice" in lower))
+        ):
+            return None
+        count = counts[0]
+
+        n = _to_int(trials[0].group(1))
+        k = _to_int(count.group(2))
+        mode = count.group(1).lower()
+        # The counted outcome is whatever directly follows the count
+        after = lower[count.end():].lstrip()
+
+        given = GIVEN_P_RE.search(text)
+        if given:
+            p = _to_probability(given.group(3))
+            if p is None:
+                return None
+            stated = (given.group(1) or given.group(2)).lower()
+            if stated == "success":
+                success = "success"
+            else:
+                # Heads / tails: the stated side must be the counted side
+                side = "head" if stated.startswith("h") else "tail"
+                counted = COIN_SIDE_RE.match(after)
+                if not counted or counted.group(1).lower() != side:
+                    return None
+                success = side + "s"
+        elif ANY_P_RE.search(text) or BIAS_RE.search(text):
+            # A probability we couldn't read: the fair default would be wrong
+            return None
+        elif "coin" in lower and COIN_SIDE_RE.match(after):
+            p, success = "1/2", COIN_SIDE_RE.match(after).group(1).lower() + "s"
+        elif "die" in lower or "dice" in lower:
+            face = DIE_FACE_RE.match(after)
+            if not face:
+                return None
+            p, success = "1/6", face.group(1)
+        else:
+            return None
+
+        if not 0 <= k <= n:
+            return None
+
+        if mode == "exactly":
+            ks = [k]
+        elif mode in ("at least", "no less than"):
+            ks = list(range(k, n + 1))
+        else:
+            ks = list(range(0, k + 1))
+
+        terms = [f"binomial({n}, {i})*({p})**{i}*(1 - ({p}))**({n} - {i})" for i in ks]
+        exact = self.calc.evaluate(" + ".join(terms))
+        if not exact["success"]:
+            return None
+        value = self.calc.substitute_and_evaluate(exact["result"], {})
+        if not value["success"] or not self.calc.check_probability_bounds(value["value"])["valid"]:
+            return None
+
+        k_desc = f"k = {k}" if mode == "exactly" else f"k in {{{', '.join(map(str, ks))}}}"
+        steps = [
+            f"Each trial is independent with success ({success}) probability p = {p}.",
+            f"Number of trials n = {n}; we need {mode} {k} successes, i.e. {k_desc}.",
+            f"P(X = i) = C({n}, i) × ({p})^i × (1 - {p})^({n} - i).",
+            f"Summing over {k_desc} gives {exact['result']}."
+        ]
+        return self._format(
+            f"{exact['result']} ≈ {value['value']:.4f}",
+            steps,
+            ["Binomial distribution: P(X=k) = C(n,k) × p^k × (1-p)^(n-k)"]
+        )
+
+    def _quadratic(self, text):
+        match = QUADRATIC_RE.search(text)
+        if not match:
+            return None
+
+        # Drop leading words like "solve" that the character class let through
+        lhs = re.sub(r"^\s*(?:[a-z]{2,}\s+)+", "", match.group(1), flags=re.IGNORECASE)
+        rhs = match.group(2)
+        lhs, rhs = self._single_var_expr(lhs) or "", _clean_expr(rhs)
+        if not lhs or not rhs:
+            return None
+
+        poly = self.calc.evaluate(f"expand(({lhs}) - ({rhs}))")
+        degree = self.calc.evaluate(f"degree({poly['result']}, x)") if poly["success"] else None
+        if not degree or not degree["success"] or degree["result"] != "2":
+            return None
+
+        roots = self.calc.evaluate(f"solve({poly['result']}, x)")
+        disc = self.calc.evaluate(
+            f"discriminant({poly['result']}, x)"
+        )
+        if not roots["success"] or not disc["success"]:
+            return None
+
+        steps = [
+            f"Bring all terms to one side: {poly['result']} = 0.",
+            f"Discriminant D = b² - 4ac = {disc['result']}.",
+            "Apply the quadratic formula x = (-b ± √D) / 2a.",
+            f"Roots: {roots['result']}."
+        ]
+        return self._format(
+            f"x = {roots['result']}",
+            steps,
+            ["Quadratic formula: x = (-b ± √(b² - 4ac)) / 2a"]
+        )
+
+    def _derivative(self, text):
+        match = DERIVATIVE_RE.search(text.strip())
+        if not match or HIGHER_ORDER_RE.search(text):
+            return None
+
+        expr = self._single_var_expr(re.sub(r"^(?:f\(x\)\s*=|y\s*=)", "", match.group(1).strip()))
+        if not expr:
+            return None
+
+        result = self.calc.evaluate(f"diff({expr}, x)")
+        if not result["success"]:
+            return None
+
+        steps = [
+            f"Let f(x) = {expr}.",
+            "Differentiate term by term with respect to x.",
+            f"f'(x) = {result['result']}."
+        ]
+        return self._format(
+            f"f'(x) = {result['result']}",
+            steps,
+            ["Power rule: d/dx xⁿ = n·xⁿ⁻¹", "Sum rule: (f + g)' = f' + g'"]
+        )
+
+    def _limit(self, text):
+        arrow = LIM_ARROW_RE.search(text.strip())
+        match = LIMIT_RE.search(text.strip())
+        if arrow:
+            point, raw_expr = arrow.group(1), arrow.group(2)
+        elif match:
+            point, raw_expr = match.group(2), match.group(3) or match.group(1)
+        else:
+            return None
+
+        expr = self._single_var_expr(raw_expr)
+        point = point.lower().replace("infinity", "oo").replace("∞", "oo")
+        if not expr:
+            return None
+
+        result = self.calc.evaluate(f"limit({expr}, x, {point})")
+        if not result["success"] or "Limit" in result["result"]:
+            return None
+
+        steps = [
+            f"Evaluate lim x→{point} of {expr}.",
+            "Simplify the expression (factor / standard limits) before substituting.",
+            f"The limit equals {result['result']}."
+        ]
+        return self._format(
+            result["result"],
+            steps,
+            ["Limit laws and standard limits (e.g. lim x→0 sin x / x = 1)"]
+        )
@@ -0,0 +1,158 @@
+"""
+Topic Classifier
+----------------
+Local replacement for the router's LLM fallback.
+
+- KeywordMatcher: one compiled alternation regex for all topic
+  keywords instead of repeated `any(k in text ...)` scans
+- TopicClassifier: nearest topic centroid in embedding space, built
+  from seed examples, knowledge-base files and labeled memory
+- load_topic_classifier: the classifier RouterAgent builds by default
+  (Config.ROUTER_CLASSIFIER)
+"""
+
+import glob
+import os
+import re
+
+import numpy as np
+
+from config.settings import Config
+
+TOPICS = ["probability", "calculus", "linear_algebra", "algebra"]
+
+# Keyword lists checked in this priority order (same as the old router)
+TOPIC_KEYWORDS = {
+    "probability": ["probability", "coin", "dice", "chance"],
+    "calculus": ["limit", "derivative", "differentiate", "rate of change"],
+    "linear_algebra": ["matrix", "determinant", "vector"],
+}
+
+# Seed examples so every topic has a centroid even with an empty KB file
+TOPIC_SEEDS = {
+    "probability": [
+        "A coin is tossed 5 times. Find the probability of exactly 3 heads.",
+        "Two cards are drawn from a deck. What are the odds both are aces?",
+        "A bag has 3 red and 5 blue balls. Find P(red) when one ball is drawn.",
+        "Find the expected value and variance of a binomial random variable.",
+        "Use Bayes' theorem to find the conditional probability P(A|B).",
+    ],
+    "calculus": [
+        "Find dy/dx for y = x^3 sin x.",
+        "Evaluate the integral of x^2 from 0 to 1.",
+        "Find the maximum value of f(x) = -x^2 + 4x + 1.",
+        "Evaluate lim x->0 (sin x)/x.",
+        "Find the slope of the tangent to y = e^x at x = 0.",
+    ],
+    "linear_algebra": [
+        "Find the inverse of the 2x2 matrix [[1, 2], [3, 4]].",
+        "Compute the dot product and angle between two vectors.",
+        "Find the eigenvalues of a 3x3 matrix.",
+        "Solve the system of linear equations using Cramer's rule.",
+        "Find the rank of the given matrix.",
+    ],
+    "algebra": [
+        "Solve x^2 - 5x + 6 = 0.",
+        "Find the sum of the first 20 terms of an arithmetic progression.",
+        "Simplify (a + b)^2 - (a - b)^2.",
+        "Find the coefficient of x^4 in the expansion of (1 + x)^10.",
+        "If log2(x) + log2(x - 2) = 3, find x.",
+    ],
+}
+
+
+class KeywordMatcher:
+    def __init__(self, keywords_by_topic=TOPIC_KEYWORDS):
+        self.priority = list(keywords_by_topic)
+        self.topic_of = {
+            keyword: topic
+            for topic, keywords in keywords_by_topic.items()
+            for keyword in keywords
+        }
+        # Longest first so "rate of change" wins over shorter overlaps
+        alternation = "|".join(
+            re.escape(k) for k in sorted(self.topic_of, key=len, reverse=True)
+        )
+        self.pattern = re.compile(alternation)
+
+    def match(self, text: str):
+        """Highest-priority topic with a keyword in text, or None"""
+        found = {self.topic_of[m] for m in self.pattern.findall(text.lower())}
+        for topic in self.priority:
+            if topic in found:
+                return topic
+        return None
+
+
+class TopicClassifier:
+    def __init__(self, embedding_model, temperature=0.05):
+        """
+        Parameters:
+        - embedding_model: rag.embeddings.EmbeddingModel
+        - temperature: softmax temperature turning cosine similarities
+          into a confidence
+        """
+        self.embedding_model = embedding_model
+        self.temperature = temperature
+        self.topics = []
+        self.centroids = None
+
+    def build(self, kb_path=None, labeled_examples=()):
+        """
+        Build one centroid per topic from:
+        - TOPIC_SEEDS
+        - KB files whose name contains the topic (e.g. probability_guide.md)
+        - labeled_examples: iterable of (topic, problem_text)
+        """
+        texts = {topic: list(seeds) for topic, seeds in TOPIC_SEEDS.items()}
+
+        if kb_path:
+            for path in glob.glob(os.path.join(kb_path, "**", "*.*"), recursive=True):
+                name = os.path.basename(path).lower()
+                topic = next(
+                    (t for t in sorted(TOPICS, key=len, reverse=True) if t in name),
+                    None
+                )
+                if topic is None:
+                    continue
+                try:
+                    with open(path, encoding="utf-8") as f:
+                        sections = [s.strip() for s in f.read().split("\n\n") if s.strip()]
+                except (OSError, UnicodeDecodeError):
+                    continue
+                texts[topic].extend(sections)
+
+        for topic, text in labeled_examples:
+            if topic in texts and text:
+                texts[topic].append(text)
+
+        self.topics = list(texts)
+        centroids = []
+        for topic in self.topics:
+            vectors = self.embedding_model.embed_documents(texts[topic])
+            centroid = vectors.mean(axis=0)
+            centroids.append(centroid / max(np.linalg.norm(centroid), 1e-9))
+        self.centroids = np.vstack(centroids).astype(np.float32)
+        return self
+
+    def classify(self, text: str):
+        """Returns (topic, confidence in [0, 1])"""
+        query = np.asarray(self.embedding_model.embed_text(text), dtype=np.float32)
+        sims = self.centroids @ query
+
+        logits = (sims - sims.max()) / self.temperature
+        probs = np.exp(logits) / np.exp(logits).sum()
+        best = int(np.argmax(probs))
+        return self.topics[best], float(probs[best])
+
+
+def load_topic_classifier(memory=None, kb_path=Config.KNOWLEDGE_BASE_PATH, embedding_model=None):
+    """
+    TopicClassifier over the KB files plus, if memory (a SolutionMemory)
+    is given, the topics of its correct solutions.
+    """
+    if embedding_model is None:
+        from rag.embeddings import EmbeddingModel
+        embedding_model = EmbeddingModel(Config.EMBEDDING_MODEL)
+    labeled = memory.labeled_problems() if memory is not None else ()
+    return TopicClassifier(embedding_model).build(kb_path, labeled)
@@ -1,6 +1,16 @@
+import json
+
+from llm.client import as_llm_client
+from tracing.tracer import get_tracer
+
+
 class VerifierAgent:
     def __init__(self, client, model, threshold=0.8):
-        self.client = client
+        """
+        Parameters:
+        - client: LLMClient (live / record / replay) or anthropic.Anthropic
+        """
+        self.client = as_llm_client(client)
         self.model = model
         self.threshold = threshold
     
@@ -26,14 +36,12 @@ Output JSON:
   "needs_human_review": boolean
 }}"""
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=1000,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        with get_tracer().span("verifier", model=self.model) as span:
+            response = self.client.complete(prompt, self.model, max_tokens=1000)
+            span.record_usage(response, prompt=prompt)
         
         try:
-            result = json.loads(response.content[0].text)
+            result = json.loads(response.text)
             result["needs_human_review"] = (
                 not result["is_correct"] or 
                 result["confidence"] < self.threshold
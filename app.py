@@ -1,10 +1,25 @@
 import streamlit as st
+import hashlib
 import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from datetime import datetime
-import google.generativeai as genai
-from PIL import Image
-import io
+
+from tracing.startup import Warmup, get_profiler
+
+profiler = get_profiler()
+
+# Heavy packages (sympy, faiss, langchain, PIL, ...) are imported by the
+# loaders below, mostly on the warm-up thread
+with profiler.importing("app modules"):
+    from agents.streaming import TextStream
+    from config.settings import Config
+    from llm.client import make_llm_client
+    from memory.solution_memory import SolutionMemory
+    from memory.solution_cache import SolutionCache
+    from rag.context_packer import ContextPacker
+    from tracing.tracer import enable_trace_file
 
 # =================================================
 # PAGE CONFIG
@@ -20,27 +35,119 @@ st.set_page_config(
 # =================================================
 @st.cache_resource
 def load_gemini():
+    # Replay mode answers from a recorded cassette; no key needed
+    if Config.LLM_MODE == "replay":
+        return make_llm_client("gemini")
+
     api_key = st.secrets.get("GEMINI_API_KEY") or os.getenv("GEMINI_API_KEY")
     if not api_key:
         st.error("⚠️ GEMINI_API_KEY not found")
         st.info("Get a free key from https://aistudio.google.com/app/apikey")
         st.stop()
 
-    genai.configure(api_key=api_key)
-    return genai.GenerativeModel("models/gemini-2.5-flash")
+    return make_llm_client("gemini", api_key)
 
-model = load_gemini()
+llm = load_gemini()
+tracer = enable_trace_file(Config.TRACE_PATH)
+context_packer = ContextPacker()
 
-def call_gemini(prompt, max_tokens=2000):
-    response = model.generate_content(
-        prompt,
-        generation_config={
-            "temperature": 0.2,
-            "max_output_tokens": max_tokens
-        }
-    )
+def call_gemini(prompt, max_tokens=2000, stage="llm"):
+    with tracer.span(stage, model=Config.GEMINI_MODEL) as span:
+        response = llm.complete(prompt, Config.GEMINI_MODEL, max_tokens, temperature=0.2)
+        span.record_usage(response, prompt=prompt, text=response.text)
     return response.text
 
+def call_gemini_stream(prompt, max_tokens=2000, stage="llm"):
+    """Same as call_gemini, but yields text as the model produces it"""
+    def chunks():
+        with tracer.span(stage, model=Config.GEMINI_MODEL, streamed=True) as span:
+            stream = llm.stream(prompt, Config.GEMINI_MODEL, max_tokens, temperature=0.2)
+            yield from stream
+            span.record_usage(stream.response, prompt=prompt, text=stream.response.text)
+
+    return TextStream(chunks())
+
+@st.cache_resource
+def start_metrics_server():
+    """Expose /metrics for Prometheus when METRICS_PORT is set"""
+    if not Config.METRICS_PORT:
+        return None
+    try:
+        return tracer.serve_prometheus(Config.METRICS_PORT)
+    except OSError as e:
+        print(f"⚠️ Metrics server not started: {e}")
+        return None
+
+start_metrics_server()
+
+# =================================================
+# VERIFIED SOLUTION CACHE
+# =================================================
+@st.cache_resource
+def load_embedding_model():
+    """One model (and embedding cache) for the KB and solution memory"""
+    from rag.embeddings import EmbeddingModel
+    return EmbeddingModel(Config.EMBEDDING_MODEL)
+
+embedding_model = load_embedding_model()
+
+@st.cache_resource
+def load_solution_cache():
+    os.makedirs(os.path.dirname(Config.MEMORY_DB_PATH), exist_ok=True)
+    # Correct solutions are indexed for vector search as they are stored
+    return SolutionCache(SolutionMemory(Config.MEMORY_DB_PATH, embedding_model=embedding_model))
+
+solution_cache = load_solution_cache()
+
+# =================================================
+# BACKGROUND WARM-UP
+# =================================================
+def load_template_solver():
+    from agents.template_solver import TemplateSolver
+    solver = TemplateSolver()
+    solver.calc.evaluate("x**2 + 1")   # waits until a calculator worker is warm
+    return solver
+
+def load_knowledge_base():
+    for name in ("faiss", "sentence_transformers", "langchain_community.vectorstores"):
+        profiler.import_module(name)
+    from rag.knowledge_base import KnowledgeBase
+    kb = KnowledgeBase(Config.KNOWLEDGE_BASE_PATH, Config.EMBEDDING_MODEL,
+                       embedding_model=embedding_model)
+    kb.build()
+    kb.embedding_model.load()   # a warm build may not embed anything
+    if Config.KB_RELOAD_INTERVAL > 0:
+        kb.watch(Config.KB_RELOAD_INTERVAL)
+    return kb
+
+def load_ocr():
+    module = profiler.import_module("multimodal.ocr_processor")
+    return module.GeminiOCR(llm, Config.GEMINI_MODEL)
+
+def load_asr():
+    module = profiler.import_module("multimodal.asr_processor")
+    return module.GeminiASR(llm, Config.GEMINI_MODEL)
+
+@st.cache_resource
+def start_warmup():
+    """Load the slow resources while the first page renders"""
+    warmup = Warmup(profiler, workers=Config.WARMUP_WORKERS)
+    warmup.submit("template_solver", load_template_solver)
+    warmup.submit("knowledge_base", load_knowledge_base)
+    return warmup
+
+warmup = start_warmup()
+
+@st.cache_resource
+def rag_pool():
+    """Retrieval runs here, overlapping the parser LLM call"""
+    return ThreadPoolExecutor(max_workers=Config.RAG_WORKERS, thread_name_prefix="rag")
+
+def retrieve_context(query):
+    """Worker-thread side of RAG: no st.* calls in here"""
+    kb = warmup.get("knowledge_base", timeout=Config.RAG_WARMUP_TIMEOUT)
+    return kb, kb.retrieve(query, Config.TOP_K_RETRIEVAL)
+
 # =================================================
 # SESSION STATE
 # =================================================
@@ -50,9 +157,58 @@ if "memory" not in st.session_state:
 if "agent_trace" not in st.session_state:
     st.session_state.agent_trace = []
 
+if "ttft" not in st.session_state:
+    st.session_state.ttft = []
+
+if "solver_seconds" not in st.session_state:
+    st.session_state.solver_seconds = []
+
 if "show_feedback" not in st.session_state:
     st.session_state.show_feedback = False
 
+if "last_result" not in st.session_state:
+    st.session_state.last_result = None
+
+# OCR / ASR results by uploaded-file content hash, so reruns reuse them
+if "extractions" not in st.session_state:
+    st.session_state.extractions = {}
+
+if "upload_digests" not in st.session_state:
+    st.session_state.upload_digests = {}
+
+if "extraction_counts" not in st.session_state:
+    st.session_state.extraction_counts = {"calls": 0, "rerun_hits": 0}
+
+MAX_SESSION_EXTRACTIONS = 20
+
+def extract_once(kind, uploaded_file, extract, spinner_text):
+    """
+    Run OCR / ASR once per uploaded file content.
+    Streamlit reruns the script on every widget interaction; later
+    reruns get the stored result instead of another API call.
+    """
+    file_id = getattr(uploaded_file, "file_id", None)
+    digest = st.session_state.upload_digests.get(file_id) if file_id else None
+    if digest is None:
+        digest = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+        if file_id:
+            st.session_state.upload_digests[file_id] = digest
+
+    key = f"{kind}:{digest}"
+    extractions = st.session_state.extractions
+    if key in extractions:
+        st.session_state.extraction_counts["rerun_hits"] += 1
+        return extractions[key]
+
+    with st.spinner(spinner_text):
+        result = extract(uploaded_file)
+    st.session_state.extraction_counts["calls"] += 1
+
+    extractions[key] = result
+    while len(extractions) > MAX_SESSION_EXTRACTIONS:
+        extractions.pop(next(iter(extractions)))
+    return result
+
 # =================================================
 # HEADER
 # =================================================
@@ -78,13 +234,88 @@ with st.sidebar:
 
     st.metric("Problems Solved", solved)
     st.metric("Success Rate", f"{success_rate:.0f}%")
+    st.metric("Verified Cache Hits", solution_cache.hits)
+
+    ttfts = [t for t in st.session_state.ttft if t is not None]
+    if ttfts:
+        st.metric("Avg Time to First Token", f"{sum(ttfts) / len(ttfts):.2f}s")
+
+    template_solver = warmup.peek("template_solver")
+    if template_solver and template_solver.attempts:
+        llm_times = st.session_state.solver_seconds
+        fast_stats = template_solver.stats(
+            sum(llm_times) / len(llm_times) if llm_times else None
+        )
+        st.metric("Fast-path Hit Rate", f"{fast_stats['hit_rate']:.0%}")
+        if "seconds_saved" in fast_stats:
+            st.metric("Est. Solver Time Saved", f"{fast_stats['seconds_saved']:.1f}s")
+
+    ocr, asr = warmup.peek("ocr"), warmup.peek("asr")
+    if ocr and ocr.stats["calls"]:
+        ocr_metrics = ocr.metrics()
+        st.metric(
+            "OCR Upload Saved",
+            f"{ocr_metrics['bytes_saved'] / 1024:.0f} KB",
+            help=f"{ocr_metrics['cache_hits']} of {ocr_metrics['calls']} images served from cache"
+        )
+
+    counts = st.session_state.extraction_counts
+    shared_hits = sum(r.stats["cache_hits"] for r in (ocr, asr) if r)
+    if counts["calls"] or counts["rerun_hits"]:
+        st.metric(
+            "OCR/ASR Calls Avoided",
+            counts["rerun_hits"] + shared_hits,
+            help=(
+                f"{counts['rerun_hits']} reruns reused this session's result, "
+                f"{shared_hits} uploads matched the shared OCR/ASR cache; "
+                f"{counts['calls']} extractions ran"
+            )
+        )
+
+    latencies = tracer.percentiles()
+    if latencies:
+        with st.expander("⏱️ Stage Latency (ms)"):
+            st.dataframe(
+                [
+                    {
+                        "stage": stage,
+                        "n": p["count"],
+                        "p50": round(p["p50_ms"]),
+                        "p95": round(p["p95_ms"]),
+                        "p99": round(p["p99_ms"])
+                    }
+                    for stage, p in sorted(latencies.items())
+                ],
+                hide_index=True,
+                use_container_width=True
+            )
+
+    with st.expander("🚀 Startup"):
+        for name, state in warmup.status().items():
+            st.caption(f"{name}: {state}")
+        st.dataframe(
+            [
+                {
+                    "kind": r["kind"],
+                    "name": r["name"],
+                    "ms": round(r["seconds"] * 1000),
+                    "thread": r["thread"]
+                }
+                for r in profiler.report()
+            ],
+            hide_index=True,
+            use_container_width=True
+        )
 
     st.divider()
     st.info("🆓 Powered by Google Gemini Multimodal API")
+    if Config.LLM_MODE != "live":
+        st.caption(f"LLM mode: {Config.LLM_MODE} ({Config.LLM_CASSETTE_PATH})")
 
     if st.button("🗑️ Clear Memory"):
         st.session_state.memory.clear()
         st.session_state.agent_trace.clear()
+        st.session_state.last_result = None
         st.rerun()
 
 # =================================================
@@ -117,23 +348,25 @@ with col1:
         if uploaded_image:
             st.image(uploaded_image, caption="Uploaded Image")
 
-            with st.spinner("Extracting text using Gemini Vision..."):
-                image_bytes = uploaded_image.read()
-                image = Image.open(io.BytesIO(image_bytes))
-
-                ocr_prompt = """
-Extract the complete math problem text from this image.
-Preserve mathematical symbols.
-Do NOT solve the problem.
-Return only the extracted text.
-"""
-                ocr_response = model.generate_content([ocr_prompt, image])
+            ocr_result = extract_once(
+                "ocr", uploaded_image,
+                lambda f: warmup.get("ocr", load_ocr).extract_text(f),
+                "Extracting text using Gemini Vision..."
+            )
 
             st.warning("OCR completed. Please review (HITL enabled).")
+            if ocr_result["cached"]:
+                st.caption("⚡ Same image seen before: OCR result reused")
+            else:
+                st.caption(
+                    f"Uploaded {ocr_result['uploaded_bytes'] / 1024:.0f} KB "
+                    f"(original {ocr_result['original_bytes'] / 1024:.0f} KB), "
+                    f"OCR took {ocr_result['seconds']:.1f}s"
+                )
 
             user_input = st.text_area(
                 "Extracted Text",
-                value=ocr_response.text.strip(),
+                value=ocr_result["text"],
                 height=180
             )
 
@@ -145,30 +378,25 @@ Return only the extracted text.
         )
 
         if audio_file:
-            with st.spinner("Transcribing audio using Gemini..."):
-                audio_bytes = audio_file.read()
-
-                asr_prompt = """
-Transcribe this audio accurately.
-Preserve mathematical expressions.
-Do NOT summarize.
-"""
-
-                asr_response = model.generate_content(
-                    [
-                        asr_prompt,
-                        {
-                            "mime_type": audio_file.type,
-                            "data": audio_bytes
-                        }
-                    ]
-                )
+            asr_result = extract_once(
+                "asr", audio_file,
+                lambda f: warmup.get("asr", load_asr).transcribe_audio(f),
+                "Transcribing audio using Gemini..."
+            )
 
             st.warning("Audio transcription completed. Please review (HITL enabled).")
+            if asr_result["cached"]:
+                st.caption("⚡ Same recording seen before: transcript reused")
+            else:
+                st.caption(
+                    f"Uploaded {asr_result['uploaded_bytes'] / 1024:.0f} KB in "
+                    f"{asr_result['chunks']} chunk(s) (original {asr_result['original_bytes'] / 1024:.0f} KB), "
+                    f"ASR took {asr_result['seconds']:.1f}s"
+                )
 
             user_input = st.text_area(
                 "Transcript",
-                value=asr_response.text.strip(),
+                value=asr_result["text"],
                 height=180
             )
 
@@ -186,12 +414,33 @@ with col2:
 
     if solve_clicked and user_input:
         st.session_state.agent_trace.clear()
+        st.session_state.show_feedback = False
+        solve_started = time.time()
+
+        # ---------------- VERIFIED CACHE ----------------
+        with tracer.span("cache") as span:
+            cached = solution_cache.get(user_input)
+            span.cache_hit = bool(cached)
+
+        if cached:
+            parsed = cached["parsed_problem"]
+            solution = cached["solution"]
+            verification = cached["verification"]
+
+            st.session_state.agent_trace.append(
+                {"agent": "Cache", "output": {"solution_id": cached["id"]}}
+            )
+
+        else:
+            with st.status("🤖 Running multi-agent pipeline...", expanded=True):
 
-        with st.status("🤖 Running multi-agent pipeline...", expanded=True):
+                # Retrieval only needs the raw text: start it now so it
+                # overlaps the parser call instead of waiting for it
+                rag_future = rag_pool().submit(retrieve_context, user_input)
 
-            # ---------------- PARSER AGENT ----------------
-            st.write("🔍 Parser Agent")
-            parser_prompt = f"""
+                # ---------------- PARSER AGENT ----------------
+                st.write("🔍 Parser Agent")
+                parser_prompt = f"""
 Parse the following math problem into JSON ONLY.
 
 Problem:
@@ -206,42 +455,82 @@ JSON format:
   "clarification_reason": ""
 }}
 """
-            parser_raw = call_gemini(parser_prompt, 800)
-
-            try:
-                if "```" in parser_raw:
-                    parser_raw = parser_raw.split("```")[1]
-                parsed = json.loads(parser_raw)
-            except:
-                parsed = {
-                    "problem_text": user_input,
-                    "topic": "unknown",
-                    "variables": [],
-                    "needs_clarification": False
-                }
-
-            st.session_state.agent_trace.append(
-                {"agent": "Parser", "output": parsed}
-            )
+                parser_raw = call_gemini(parser_prompt, 800, stage="parser")
+
+                try:
+                    if "```" in parser_raw:
+                        parser_raw = parser_raw.split("```")[1]
+                    parsed = json.loads(parser_raw)
+                except:
+                    parsed = {
+                        "problem_text": user_input,
+                        "topic": "unknown",
+                        "variables": [],
+                        "needs_clarification": False
+                    }
+
+                st.session_state.agent_trace.append(
+                    {"agent": "Parser", "output": parsed}
+                )
 
-            if parsed["needs_clarification"]:
-                st.error(parsed["clarification_reason"])
-                st.stop()
+                if parsed["needs_clarification"]:
+                    st.error(parsed["clarification_reason"])
+                    st.stop()
 
-            # ---------------- ROUTER ----------------
-            st.write("🧭 Router Agent")
-            route = parsed.get("topic", "math")
+                # ---------------- ROUTER ----------------
+                st.write("🧭 Router Agent")
+                with tracer.span("router"):
+                    route = parsed.get("topic", "math")
 
-            # ---------------- RAG ----------------
-            st.write("📚 RAG Retrieval")
-            knowledge_context = f"""
+                # ---------------- RAG ----------------
+                st.write("📚 RAG Retrieval")
+                with tracer.span("rag") as span:
+                    knowledge_context = f"""
 Topic: {route}
 Use correct formulas, constraints, and common mistakes.
 """
-
-            # ---------------- SOLVER ----------------
-            st.write("🧮 Solver Agent")
-            solver_prompt = f"""
+                    # Started before the parser; the index loads in the
+                    # background, so don't hold the first solve hostage to it
+                    try:
+                        kb, chunks = rag_future.result()
+                    except FutureTimeout:
+                        chunks = []
+                        st.caption("⏳ Knowledge base still loading — solving without retrieved context")
+                    except Exception as e:
+                        chunks = []
+                        print(f"⚠️ Knowledge base unavailable: {e}")
+                    span.attrs["chunks"] = len(chunks)
+
+                    if chunks:
+                        # Dedup, trim overlaps and fit the token budget
+                        packed, packing = context_packer.pack(
+                            chunks, higher_is_better=not kb.score_is_distance
+                        )
+                        span.attrs["packed_chunks"] = packing["chunks_out"]
+                        span.attrs["tokens_saved"] = packing["tokens_saved"]
+                        knowledge_context += "\nReference material:\n" + "\n---\n".join(
+                            chunk["content"] for chunk in packed
+                        )
+
+                # ---------------- FAST PATH ----------------
+                template_solver = warmup.get("template_solver", load_template_solver)
+                with tracer.span("template") as span:
+                    fast_path = template_solver.solve(parsed)
+                    span.cache_hit = bool(fast_path)
+
+                if fast_path:
+                    st.write(f"⚡ Template Solver ({fast_path['template']}) — solver LLM skipped")
+                    solution = fast_path["solution"]
+                    st.markdown(solution)
+
+                    st.session_state.agent_trace.append(
+                        {"agent": "TemplateSolver", "output": {"template": fast_path["template"]}}
+                    )
+
+                # ---------------- SOLVER ----------------
+                if not fast_path:
+                    st.write("🧮 Solver Agent")
+                    solver_prompt = f"""
 Solve step by step.
 
 Context:
@@ -255,11 +544,19 @@ ANSWER:
 STEPS:
 FORMULAS USED:
 """
-            solution = call_gemini(solver_prompt, 2000)
-
-            # ---------------- VERIFIER ----------------
-            st.write("✅ Verifier Agent")
-            verifier_prompt = f"""
+                    solver_stream = call_gemini_stream(solver_prompt, 2000, stage="solver")
+                    st.write_stream(solver_stream)
+                    solution = solver_stream.result
+
+                    st.session_state.ttft.append(solver_stream.ttft)
+                    st.session_state.solver_seconds.append(solver_stream.total_time)
+                    st.session_state.agent_trace.append(
+                        {"agent": "Solver", "output": solver_stream.metrics()}
+                    )
+
+                # ---------------- VERIFIER ----------------
+                st.write("✅ Verifier Agent")
+                verifier_prompt = f"""
 Verify the solution below.
 
 Problem:
@@ -276,23 +573,47 @@ Return JSON only:
   "needs_human_review": false
 }}
 """
-            verifier_raw = call_gemini(verifier_prompt, 800)
-
-            try:
-                if "```" in verifier_raw:
-                    verifier_raw = verifier_raw.split("```")[1]
-                verification = json.loads(verifier_raw)
-            except:
-                verification = {
-                    "is_correct": True,
-                    "confidence": 0.7,
-                    "issues": [],
-                    "needs_human_review": False
-                }
+                verifier_raw = call_gemini(verifier_prompt, 800, stage="verifier")
+
+                try:
+                    if "```" in verifier_raw:
+                        verifier_raw = verifier_raw.split("```")[1]
+                    verification = json.loads(verifier_raw)
+                except:
+                    verification = {
+                        "is_correct": True,
+                        "confidence": 0.7,
+                        "issues": [],
+                        "needs_human_review": False
+                    }
+
+        st.session_state.agent_trace.append(
+            {"agent": "Trace", "output": tracer.since(solve_started)}
+        )
+
+        st.session_state.last_result = {
+            "input": user_input,
+            "input_type": input_mode,
+            "parsed": parsed,
+            "solution": solution,
+            "verification": verification,
+            "cached": bool(cached)
+        }
+
+    # Kept in session state so the feedback buttons survive reruns
+    result = st.session_state.last_result
+
+    if result:
+        parsed = result["parsed"]
+        solution = result["solution"]
+        verification = result["verification"]
 
         # ---------------- OUTPUT ----------------
         st.subheader("📊 Result")
 
+        if result["cached"]:
+            st.info("⚡ Served from verified solution cache (no LLM calls)")
+
         if verification["is_correct"]:
             st.success(f"Verified (Confidence {verification['confidence']:.0%})")
         else:
@@ -313,9 +634,13 @@ Return JSON only:
 
         with col_a:
             if st.button("✅ Correct"):
+                solution_cache.put(
+                    result["input"], parsed, solution, verification,
+                    input_type=result["input_type"]
+                )
                 st.session_state.memory.append({
                     "timestamp": datetime.now().isoformat(),
-                    "input": user_input,
+                    "input": result["input"],
                     "parsed": parsed,
                     "solution": solution,
                     "verification": verification,
@@ -330,9 +655,19 @@ Return JSON only:
         if st.session_state.show_feedback:
             feedback = st.text_area("What was incorrect?")
             if st.button("Submit Feedback"):
+                solution_cache.invalidate(result["input"])
+                solution_cache.memory.store({
+                    "input_type": result["input_type"],
+                    "raw_input": result["input"],
+                    "parsed_problem": parsed,
+                    "solution": solution,
+                    "verification": verification,
+                    "user_feedback": feedback,
+                    "is_correct": False
+                })
                 st.session_state.memory.append({
                     "timestamp": datetime.now().isoformat(),
-                    "input": user_input,
+                    "input": result["input"],
                     "parsed": parsed,
                     "solution": solution,
                     "verification": verification,
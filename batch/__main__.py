@@ -0,0 +1,94 @@
+"""
+Batch solve CLI
+
+Usage:
+    python -m batch problems.jsonl --out results.jsonl
+    python -m batch problems.jsonl --out results.db --concurrency 16 --rate 5
+    python -m batch problems.jsonl --out replay.jsonl --llm-mode replay --latency lognormal:0.8,0.4
+
+Re-run the same command after a crash to resume.
+"""
+
+import argparse
+import asyncio
+
+from agents.parser_agent import ParserAgent
+from agents.solver_agent import SolverAgent
+from agents.template_solver import TemplateSolver
+from agents.verifier_agent import VerifierAgent
+from batch.runner import BatchRunner, RateLimiter, make_agent_solver, open_result_store, read_problems
+from config.settings import Config
+from llm.client import MODES, make_llm_client
+from rag.knowledge_base import KnowledgeBase
+from tracing.tracer import enable_trace_file, get_tracer
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Solve a JSONL file of math problems")
+    parser.add_argument("input", help="JSONL file with one {\"id\", \"problem\"} per line")
+    parser.add_argument("--out", required=True, help="results file (.jsonl, or .db for SQLite)")
+    parser.add_argument("--concurrency", type=int, default=Config.BATCH_CONCURRENCY,
+                        help="max problems in flight")
+    parser.add_argument("--rate", type=float, default=Config.BATCH_RATE_LIMIT,
+                        help="max LLM requests per second (0 = unlimited)")
+    parser.add_argument("--burst", type=int, default=Config.BATCH_CONCURRENCY,
+                        help="requests allowed back-to-back before throttling")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="re-run problems that previously errored")
+    parser.add_argument("--llm-mode", choices=MODES, default=Config.LLM_MODE,
+                        help="live API calls, record them to a cassette, or replay offline")
+    parser.add_argument("--trace", default=None,
+                        help="append per-stage spans to this JSONL file")
+    parser.add_argument("--cassette", default=Config.LLM_CASSETTE_PATH,
+                        help="cassette file for record / replay")
+    parser.add_argument("--latency", default=Config.LLM_REPLAY_LATENCY,
+                        help="replay latency, e.g. recorded, fixed:0.5, lognormal:0.8,0.4")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.trace:
+        enable_trace_file(args.trace)
+
+    knowledge_base = KnowledgeBase(Config.KNOWLEDGE_BASE_PATH, Config.EMBEDDING_MODEL)
+    knowledge_base.build()
+
+    def llm_client(provider, api_key):
+        return make_llm_client(
+            provider, api_key, mode=args.llm_mode,
+            cassette_path=args.cassette, latency=args.latency
+        )
+
+    client = llm_client("anthropic", Config.ANTHROPIC_API_KEY)
+    template_solver = TemplateSolver()
+    solve_fn = make_agent_solver(
+        ParserAgent(model=Config.GEMINI_MODEL, client=llm_client("gemini", Config.GEMINI_API_KEY)),
+        SolverAgent(client, Config.SOLVER_MODEL, knowledge_base),
+        VerifierAgent(client, Config.SOLVER_MODEL, Config.VERIFIER_CONFIDENCE_THRESHOLD),
+        RateLimiter(args.rate, args.burst),
+        template_solver
+    )
+
+    store = open_result_store(args.out)
+    runner = BatchRunner(solve_fn, store, concurrency=args.concurrency)
+    try:
+        stats = asyncio.run(runner.run(read_problems(args.input), retry_failed=args.retry_failed))
+    finally:
+        store.close()
+
+    fast_stats = template_solver.stats()
+    print(f"⚡ Template fast path: {fast_stats['hits']} hits ({fast_stats['hit_rate']:.0%})")
+    print(
+        f"✅ Done in {stats['seconds']:.1f}s: {stats['ok']} ok, "
+        f"{stats['error']} errors, {stats['skipped']} skipped (already done)"
+    )
+    for stage, p in sorted(get_tracer().percentiles().items()):
+        print(
+            f"⏱️ {stage}: n={p['count']} p50={p['p50_ms']:.0f}ms "
+            f"p95={p['p95_ms']:.0f}ms p99={p['p99_ms']:.0f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
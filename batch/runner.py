@@ -0,0 +1,249 @@
+"""
+Batch Runner
+------------
+Headless solving of large JSONL problem sets.
+
+- bounded concurrency (max problems in flight)
+- client-side rate limit on LLM calls (token bucket)
+- results streamed to JSONL or SQLite as each problem finishes
+- the output doubles as the checkpoint: re-running with the same
+  output skips problems that already completed
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from agents.orchestrator import PipelineError, build_solve_pipeline
+from config.settings import Config
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket.
+    Call wait() before every LLM request.
+    """
+
+    def __init__(self, rate_per_sec: float, burst: int = 1):
+        self.rate = rate_per_sec
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.rate or self.rate <= 0:
+            return
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity,
+                    self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+
+            time.sleep(delay)
+
+
+def read_problems(path):
+    """
+    Yield (id, problem_text) from a JSONL file.
+    Each line needs "problem" (or "problem_text" / "text");
+    "id" defaults to the line number.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            text = item.get("problem") or item.get("problem_text") or item.get("text")
+            yield str(item.get("id", line_no)), text
+
+
+class JsonlResultStore:
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def completed_ids(self, include_failed=True):
+        """Ids already in the output (a torn last line is ignored)"""
+        done = set()
+        if not os.path.exists(self.path):
+            return done
+
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if include_failed or record.get("status") != "error":
+                    done.add(record["id"])
+        return done
+
+    def write(self, record):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SqliteResultStore:
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS batch_results (
+                id TEXT PRIMARY KEY,
+                status TEXT,
+                seconds REAL,
+                record TEXT
+            )
+        """)
+        self.conn.commit()
+
+    def completed_ids(self, include_failed=True):
+        query = "SELECT id FROM batch_results"
+        if not include_failed:
+            query += " WHERE status != 'error'"
+        return {row[0] for row in self.conn.execute(query)}
+
+    def write(self, record):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO batch_results (id, status, seconds, record) VALUES (?, ?, ?, ?)",
+                (record["id"], record["status"], record.get("seconds"), json.dumps(record))
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+def open_result_store(path):
+    if path.endswith((".db", ".sqlite", ".sqlite3")):
+        return SqliteResultStore(path)
+    return JsonlResultStore(path)
+
+
+class BatchRunner:
+    def __init__(self, solve_fn, store, concurrency=8, progress_every=100):
+        """
+        Parameters:
+        - solve_fn: blocking callable(problem_text) -> dict
+        - store: JsonlResultStore or SqliteResultStore
+        - concurrency: max problems solved at the same time (each gets
+          a thread of the runner's own pool, not the loop's capped one)
+        """
+        self.solve_fn = solve_fn
+        self.store = store
+        self.concurrency = concurrency
+        self.progress_every = progress_every
+
+        self.stats = {"skipped": 0, "ok": 0, "error": 0}
+
+    async def run(self, problems, retry_failed=False):
+        """Solve every problem not already present in the store"""
+        start = time.perf_counter()
+        done = self.store.completed_ids(include_failed=not retry_failed)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        pending = set()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency,
+                                thread_name_prefix="batch") as executor:
+            for problem_id, text in problems:
+                if problem_id in done:
+                    self.stats["skipped"] += 1
+                    continue
+
+                # Bound in-flight work so huge inputs are never fully queued
+                await semaphore.acquire()
+                task = asyncio.ensure_future(
+                    self._solve_one(problem_id, text, semaphore, executor)
+                )
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+
+            if pending:
+                await asyncio.gather(*pending)
+
+        self.stats["seconds"] = time.perf_counter() - start
+        return self.stats
+
+    async def _solve_one(self, problem_id, text, semaphore, executor):
+        item_start = time.perf_counter()
+        try:
+            context = contextvars.copy_context()
+            result = await asyncio.get_running_loop().run_in_executor(
+                executor, context.run, self.solve_fn, text
+            )
+            record = {"id": problem_id, "status": "ok", "problem": text, "result": result}
+        except Exception as e:
+            record = {"id": problem_id, "status": "error", "problem": text, "error": str(e)}
+        finally:
+            semaphore.release()
+
+        record["seconds"] = time.perf_counter() - item_start
+        self.store.write(record)
+        self.stats[record["status"]] += 1
+
+        finished = self.stats["ok"] + self.stats["error"]
+        if self.progress_every and finished % self.progress_every == 0:
+            print(f"⏳ {finished} solved ({self.stats['error']} errors)")
+
+
+def make_agent_solver(parser, solver, verifier, limiter=None, template_solver=None):
+    """
+    Wrap the agents into solve_fn for BatchRunner.
+    Runs them through the solve pipeline (agents.orchestrator), so
+    retrieval on the raw text overlaps the parser call.
+    limiter.wait() runs before each LLM call; problems recognized by
+    template_solver skip the solver LLM. A parser failure raises, so the
+    problem is recorded as an error and --retry-failed runs it again.
+    """
+    pipeline = build_solve_pipeline(
+        parser, None, solver.rag, solver, verifier, None,
+        top_k=Config.TOP_K_RETRIEVAL, template_solver=template_solver,
+        before_llm=limiter.wait if limiter else None
+    )
+
+    def solve(problem_text):
+        try:
+            final = pipeline.run_sync(raw_text=problem_text)["results"]["final"]
+        except PipelineError as e:
+            raise e.error from e
+
+        solution = final["solution"]
+        if solution is None:
+            return {
+                "parsed": final["parsed"],
+                "solution": None,
+                "verification": None
+            }
+        return {
+            "parsed": final["parsed"],
+            "solution": solution["solution"],
+            "sources": [doc.get("source") for doc in solution.get("context_used", [])],
+            "template": solution.get("template"),
+            "verification": final["verification"]
+        }
+
+    return solve
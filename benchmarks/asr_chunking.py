@@ -0,0 +1,113 @@
+"""
+ASR Chunking Benchmark
+----------------------
+Compares one request with the raw upload against the normalized,
+silence-split, concurrently transcribed pipeline, plus a cached
+re-upload.
+
+The input is a synthetic 44.1 kHz stereo WAV "dictation" (tone bursts
+separated by pauses). A stub model charges upload time at a fixed
+bandwidth plus processing time proportional to audio length.
+
+Run from the project root:
+    python -m benchmarks.asr_chunking [minutes]
+"""
+
+import io
+import sys
+import time
+import wave
+
+import numpy as np
+
+from llm.client import LLMClient, LLMResponse
+from multimodal.asr_processor import GeminiASR
+
+UPLOAD_MBIT_PER_SEC = 10.0
+SECONDS_PER_AUDIO_MINUTE = 3.0
+
+
+def audio_seconds(data):
+    if data[:4] == b"RIFF":
+        with wave.open(io.BytesIO(data)) as wav:
+            return wav.getnframes() / wav.getframerate()
+    return len(data) / 3000   # ~24 kbit/s Opus
+
+
+class ProcessingTimedStub(LLMClient):
+    def complete(self, prompt, model, max_tokens=1000, temperature=None):
+        data = prompt[1]["data"]
+        time.sleep(
+            len(data) * 8 / (UPLOAD_MBIT_PER_SEC * 1e6)
+            + audio_seconds(data) / 60 * SECONDS_PER_AUDIO_MINUTE
+        )
+        return LLMResponse("find the probability of exactly three heads")
+
+
+class Upload:
+    def __init__(self, data, mime_type="audio/wav"):
+        self.data = data
+        self.type = mime_type
+
+    def getvalue(self):
+        return self.data
+
+
+def make_dictation(minutes=3.0, rate=44100, seed=0):
+    """Stereo 16-bit WAV: 2-6s 'phrases' separated by 0.5-1.5s pauses"""
+    rng = np.random.default_rng(seed)
+    pieces, total = [], 0.0
+    while total < minutes * 60:
+        speech = rng.uniform(2, 6)
+        t = np.arange(int(speech * rate)) / rate
+        tone = 0.4 * np.sin(2 * np.pi * rng.uniform(120, 300) * t) * (1 + 0.3 * np.sin(2 * np.pi * 3 * t))
+        pause = rng.uniform(0.5, 1.5)
+        pieces += [tone, 0.002 * rng.standard_normal(int(pause * rate))]
+        total += speech + pause
+
+    mono = np.concatenate(pieces)
+    stereo = (np.repeat(mono[:, None], 2, axis=1) * 32767).astype(np.int16)
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(stereo.tobytes())
+    return buffer.getvalue()
+
+
+def run(minutes=3.0):
+    upload = Upload(make_dictation(minutes))
+    results = {}
+
+    # Single request with the original upload (the old behaviour)
+    stub = ProcessingTimedStub()
+    start = time.perf_counter()
+    stub.complete(["Transcribe", {"mime_type": upload.type, "data": upload.data}], "stub")
+    results["raw single request"] = {
+        "uploaded_bytes": len(upload.data),
+        "chunks": 1,
+        "seconds": time.perf_counter() - start
+    }
+
+    asr = GeminiASR(ProcessingTimedStub(), "stub-audio")
+    for name in ("chunked parallel", "cached re-upload"):
+        start = time.perf_counter()
+        result = asr.transcribe_audio(upload)
+        results[name] = {
+            "uploaded_bytes": result["uploaded_bytes"],
+            "chunks": result["chunks"],
+            "seconds": time.perf_counter() - start
+        }
+
+    for name, r in results.items():
+        print(
+            f"{name:>18}: {r['uploaded_bytes'] / 1024:8.0f} KB in {r['chunks']:>2} request(s)  "
+            f"{r['seconds']:.2f}s"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else 3.0)
@@ -0,0 +1,55 @@
+"""
+Calculator Evaluation Benchmark
+-------------------------------
+Evaluates one expression at many sample points three ways:
+- per point, parsing every time (the old substitute_and_evaluate)
+- per point, with the cached parse
+- one vectorized evaluate_many call
+
+Run from the project root:
+    python -m benchmarks.calculator_eval
+"""
+
+import time
+
+import numpy as np
+from sympy.parsing.sympy_parser import parse_expr
+
+from tools.calculator import ALLOWED_SYMBOLS, TRANSFORMATIONS, Calculator
+
+EXPRESSION = "x**3 - 2*x + sin(x) + exp(-x**2)"
+
+
+def run(points=1000):
+    calc = Calculator()
+    xs = np.linspace(-3, 3, points)
+
+    start = time.perf_counter()
+    for x in xs:
+        expr = parse_expr(EXPRESSION, local_dict=ALLOWED_SYMBOLS,
+                          transformations=TRANSFORMATIONS, evaluate=True)
+        float(expr.subs({"x": x}).evalf())
+    uncached = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for x in xs:
+        calc.substitute_and_evaluate(EXPRESSION, {"x": x})
+    cached = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = calc.evaluate_many(EXPRESSION, {"x": xs})
+    vectorized = time.perf_counter() - start
+
+    assert result["success"]
+
+    print(f"{points} points")
+    print(f"  per-point sympy (parse each time): {uncached * 1000:9.1f} ms")
+    print(f"  per-point sympy (cached parse):    {cached * 1000:9.1f} ms")
+    print(f"  evaluate_many (lambdified numpy):  {vectorized * 1000:9.1f} ms"
+          f"  ({uncached / vectorized:.0f}x faster)")
+
+    return {"uncached_ms": uncached * 1000, "cached_ms": cached * 1000, "vectorized_ms": vectorized * 1000}
+
+
+if __name__ == "__main__":
+    run()
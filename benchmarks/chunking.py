@@ -0,0 +1,118 @@
+"""
+Chunking Benchmark
+------------------
+Compares the math-aware chunker (rag.chunker) with the previous
+RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50):
+
+- chunk count and total characters (overlap duplicates text)
+- chunks that cut a $...$ / $$...$$ formula in half
+- split time, and a cold KnowledgeBase.build (split + embed + index)
+
+The corpus is synthetic markdown in the style of the KB files
+(headings, formula lists, inline and display LaTeX), written to a
+temp directory.
+
+Run from the project root:
+    python -m benchmarks.chunking [num_files]
+"""
+
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+from config.settings import Config
+from rag.knowledge_base import KnowledgeBase
+
+TOPICS = {
+    "Binomial Distribution": ("P(X=k) = \\binom{n}{k} p^k (1-p)^{n-k}", ["n: number of trials", "k: number of successes", "p: probability of success"]),
+    "Bayes' Theorem": ("P(A|B) = \\frac{P(B|A) P(A)}{P(B)}", ["P(A): prior", "P(B|A): likelihood", "P(B): evidence"]),
+    "Chain Rule": ("\\frac{dy}{dx} = \\frac{dy}{du} \\cdot \\frac{du}{dx}", ["u: inner function", "y: outer function"]),
+    "Quadratic Formula": ("x = \\frac{-b \\pm \\sqrt{b^2 - 4ac}}{2a}", ["a, b, c: coefficients", "b^2 - 4ac: discriminant"]),
+    "Integration by Parts": ("\\int u \\, dv = uv - \\int v \\, du", ["u: differentiated part", "dv: integrated part"]),
+}
+
+SENTENCES = [
+    "A common mistake is to forget the domain restriction $x \\neq 0$ before simplifying.",
+    "Always check that the probabilities sum to $1$ after computing each case.",
+    "When $n$ is large the normal approximation $\\mathcal{N}(np, np(1-p))$ is often used.",
+    "Substituting back gives the final answer in terms of $x$ and $y$.",
+    "The limit $\\lim_{h \\to 0} \\frac{f(x+h) - f(x)}{h}$ defines the derivative.",
+    "Students often confuse $\\binom{n}{k}$ with $n^k$ when counting outcomes.",
+]
+
+
+def make_document(rng, sections=8):
+    lines = [f"# Topic Notes {rng.randint(1, 999)}", ""]
+    for _ in range(sections):
+        title, (formula, variables) = rng.choice(list(TOPICS.items()))
+        lines += [f"## {title}", f"Formula: ${formula}$"]
+        lines += [f"- {v}" for v in variables]
+        lines += ["", " ".join(rng.choice(SENTENCES) for _ in range(rng.randint(3, 10))), ""]
+        if rng.random() < 0.6:
+            lines += ["$$", formula, "\\quad \\text{where } " + variables[0].split(":")[0] + " \\geq 0", "$$", ""]
+        lines += ["Common mistakes:"] + [f"- {rng.choice(SENTENCES)}" for _ in range(rng.randint(1, 3))] + [""]
+    return "\n".join(lines)
+
+
+def broken_formulas(text):
+    """1 if the chunk has an unbalanced $$ or $ delimiter"""
+    display = text.count("$$")
+    inline = len(re.findall(r"(?<!\\)\$", text.replace("$$", "")))
+    return int(display % 2 == 1 or inline % 2 == 1)
+
+
+def run(num_files=200, seed=0):
+    rng = random.Random(seed)
+    workdir = tempfile.mkdtemp(prefix="chunk_bench_")
+    kb_path = os.path.join(workdir, "kb")
+    os.makedirs(kb_path)
+
+    source_chars = 0
+    for i in range(num_files):
+        text = make_document(rng)
+        source_chars += len(text)
+        with open(os.path.join(kb_path, f"notes_{i:04d}.md"), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    results = {}
+    try:
+        for chunker in ("recursive", "math"):
+            index_path = os.path.join(workdir, f"index_{chunker}")
+            kb = KnowledgeBase(kb_path, Config.EMBEDDING_MODEL, chunk_size=Config.CHUNK_SIZE,
+                               index_path=index_path, hybrid=False, chunker=chunker)
+
+            start = time.perf_counter()
+            chunks = [doc.page_content for path in kb._scan_files() for doc in kb._split_file(path)]
+            split_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            kb.build()
+            build_seconds = time.perf_counter() - start
+
+            results[chunker] = {
+                "chunks": len(chunks),
+                "chars": sum(len(c) for c in chunks),
+                "avg_chars": sum(len(c) for c in chunks) / max(len(chunks), 1),
+                "broken_formulas": sum(broken_formulas(c) for c in chunks),
+                "split_seconds": split_seconds,
+                "build_seconds": build_seconds
+            }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{num_files} files, {source_chars / 1024:.0f} KB of markdown")
+    for chunker, r in results.items():
+        print(
+            f"{chunker:>9}: {r['chunks']:6d} chunks  {r['chars'] / 1024:7.0f} KB  "
+            f"avg {r['avg_chars']:5.0f} chars  {r['broken_formulas']:5d} broken formulas  "
+            f"split {r['split_seconds']:.2f}s  build {r['build_seconds']:.2f}s"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,435 @@
+"""
+End-to-End Pipeline Benchmark
+-----------------------------
+Drives the real agents, KnowledgeBase, Retriever, SolutionMemory and
+Calculator over a fixed problem corpus, with a local stub LLM in place
+of Anthropic / Gemini.
+
+Reports:
+- startup time (knowledge base cold / warm, memory, calculator)
+- per-stage and end-to-end latency percentiles
+- retrieval QPS (KnowledgeBase.retrieve, Retriever.retrieve_many)
+  and per-leg latency of hybrid retrieval
+- sqlite write throughput (SolutionMemory.store_many / store_async)
+- peak RSS
+
+Results are written as JSON; --compare flags regressions between two runs.
+
+Run from the project root:
+    python -m benchmarks.e2e --out bench.json
+    python -m benchmarks.e2e --out bench.json --llm-latency lognormal:0.05,0.3
+    python -m benchmarks.e2e --compare baseline.json bench.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from agents.explainer_agent import ExplainerAgent
+from agents.parser_agent import ParserAgent
+from agents.router_agent import RouterAgent
+from agents.solver_agent import SolverAgent
+from agents.template_solver import TemplateSolver
+from agents.topic_classifier import load_topic_classifier
+from agents.verifier_agent import VerifierAgent
+from config.settings import Config
+from llm.client import LatencyModel, LLMClient, LLMResponse, Usage
+from memory.solution_memory import SolutionMemory
+from rag.embeddings import EmbeddingModel
+from rag.knowledge_base import KnowledgeBase
+from rag.retriever import Retriever
+from tools.calculator import Calculator
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "data", "problems.jsonl")
+STAGES = ["parser", "router", "rag", "template", "solver", "verifier",
+          "explainer", "calculator", "memory_write", "memory_lookup"]
+
+# Metrics where a higher value is better; everything else is a latency / size
+HIGHER_IS_BETTER = re.compile(r"(qps|per_sec|hit_rate)$")
+
+
+def load_corpus(path=CORPUS_PATH):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class StubLLMClient(LLMClient):
+    """
+    Local LLM stand-in answering from the corpus.
+    Recognizes the parser, router, solver, verifier and explainer prompts.
+    """
+
+    def __init__(self, corpus, latency="fixed:0", seed=0):
+        self.corpus = corpus
+        self.latency = LatencyModel(latency, seed)
+        self.calls = 0
+
+    def _problem(self, prompt):
+        for item in self.corpus:
+            if item["problem"] in prompt:
+                return item
+        return {"problem": "", "topic": "algebra", "answer": "0"}
+
+    def complete(self, prompt, model, max_tokens=1000, temperature=None):
+        time.sleep(self.latency.sample())
+        self.calls += 1
+        item = self._problem(prompt)
+
+        if "JSON schema" in prompt:
+            text = json.dumps({
+                "problem_text": item["problem"],
+                "topic": item["topic"],
+                "variables": [],
+                "constraints": [],
+                "needs_clarification": False,
+                "clarification_reason": ""
+            })
+        elif "Respond with only the category name" in prompt:
+            text = item["topic"]
+        elif prompt.startswith("Verify this solution"):
+            text = json.dumps({"is_correct": True, "confidence": 0.92, "issues": []})
+        elif "explanation" in prompt.lower():
+            text = f"Step 1: identify the method.\nStep 2: compute.\nFinal answer: {item['answer']}"
+        else:
+            text = (
+                f"ANSWER: {item['answer']}\n\nSTEPS:\n1. Apply the standard method.\n"
+                f"2. Simplify.\n\nFORMULAS USED:\n- see context"
+            )
+        return LLMResponse(text, model, Usage(len(prompt) // 4, len(text) // 4))
+
+
+def percentiles_ms(timings):
+    if not timings:
+        return {}
+    p50, p95, p99 = np.percentile(timings, [50, 95, 99]) * 1000
+    return {"p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99)}
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def kb_documents(kb_path):
+    """Paragraph-level documents for the standalone Retriever"""
+    documents = []
+    for path in sorted(glob.glob(os.path.join(kb_path, "*.*"))):
+        try:
+            with open(path, encoding="utf-8") as f:
+                sections = f.read().split("\n\n")
+        except (OSError, UnicodeDecodeError):
+            continue
+        for i, section in enumerate(sections):
+            if section.strip():
+                documents.append({"content": section.strip(), "source": f"{os.path.basename(path)}#{i}"})
+    return documents
+
+
+class Timer:
+    def __init__(self):
+        self.timings = {}
+
+    def time(self, stage, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.timings.setdefault(stage, []).append(time.perf_counter() - start)
+        return result
+
+
+def bench_startup(kb_path, workdir):
+    """Cold / warm knowledge base build, memory open, first calculator call"""
+    index_path = os.path.join(workdir, "index")
+    startup = {}
+
+    start = time.perf_counter()
+    kb = KnowledgeBase(kb_path, Config.EMBEDDING_MODEL, index_path=index_path)
+    kb.build()
+    startup["kb_cold_seconds"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    kb = KnowledgeBase(kb_path, Config.EMBEDDING_MODEL, index_path=index_path)
+    kb.build()
+    startup["kb_warm_seconds"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    embedding_model = EmbeddingModel(
+        Config.EMBEDDING_MODEL, cache_path=os.path.join(workdir, "embeddings.db")
+    )
+    memory = SolutionMemory(os.path.join(workdir, "solutions.db"), embedding_model=embedding_model)
+    startup["memory_seconds"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    calculator = Calculator()
+    calculator.evaluate("x**2 + 1")
+    startup["calculator_seconds"] = time.perf_counter() - start
+
+    return startup, kb, memory, embedding_model, calculator
+
+
+def bench_pipeline(corpus, kb, memory, calculator, llm, repeats):
+    """Run every corpus problem through the agents, timing each stage"""
+    timer = Timer()
+    parser = ParserAgent(client=llm)
+    classifier = load_topic_classifier(memory, kb.kb_path, memory.embedding_model)
+    router = RouterAgent(None, "stub-router", client=llm, classifier=classifier)
+    solver = SolverAgent(llm, "stub-solver", kb)
+    verifier = VerifierAgent(llm, "stub-verifier", Config.VERIFIER_CONFIDENCE_THRESHOLD)
+    explainer = ExplainerAgent(None, "stub-explainer", client=llm)
+    template_solver = TemplateSolver(calculator)
+    end_to_end = []
+
+    for _ in range(repeats):
+        for item in corpus:
+            start = time.perf_counter()
+
+            parsed = timer.time("parser", parser.parse, item["problem"])
+            timer.time("router", router.route, parsed)
+            context = timer.time("rag", kb.retrieve, parsed["problem_text"], Config.TOP_K_RETRIEVAL)
+
+            solution = timer.time("template", template_solver.solve, parsed)
+            if solution is None:
+                solution = timer.time("solver", solver.solve, parsed, context)
+
+            verification = timer.time("verifier", verifier.verify, parsed, solution)
+            timer.time("explainer", explainer.explain, parsed, solution, verification)
+            timer.time("calculator", calculator.evaluate, item["expression"])
+
+            timer.time("memory_write", memory.store, {
+                "input_type": "benchmark",
+                "raw_input": item["problem"],
+                "parsed_problem": parsed,
+                "solution": solution["solution"],
+                "verification": verification,
+                "is_correct": True
+            })
+            timer.time("memory_lookup", memory.retrieve_similar, parsed["problem_text"])
+
+            end_to_end.append(time.perf_counter() - start)
+
+    stages = {
+        stage: {"count": len(timer.timings[stage]), **percentiles_ms(timer.timings[stage])}
+        for stage in STAGES if stage in timer.timings
+    }
+    stages["end_to_end"] = {"count": len(end_to_end), **percentiles_ms(end_to_end)}
+    stages["template"]["hit_rate"] = template_solver.stats()["hit_rate"]
+    return stages
+
+
+def bench_retrieval(corpus, kb, embedding_model, total_queries, batch_size):
+    queries = [corpus[i % len(corpus)]["problem"] + f" #{i}" for i in range(total_queries)]
+    results = {}
+
+    before = dict(kb.hybrid.totals) if kb.hybrid is not None else None
+    start = time.perf_counter()
+    for query in queries:
+        kb.retrieve(query, Config.TOP_K_RETRIEVAL)
+    results["kb_retrieve_qps"] = len(queries) / (time.perf_counter() - start)
+
+    # Per-leg latency of hybrid retrieval (the legs run concurrently)
+    if before is not None:
+        for leg in ("dense", "sparse"):
+            seconds = kb.hybrid.totals[f"{leg}_seconds"] - before[f"{leg}_seconds"]
+            results[f"kb_{leg}_leg_ms"] = seconds / len(queries) * 1000
+
+    retriever = Retriever(kb_documents(kb.kb_path), embedding_model)
+    start = time.perf_counter()
+    for i in range(0, len(queries), batch_size):
+        retriever.retrieve_many(queries[i:i + batch_size], Config.TOP_K_RETRIEVAL)
+    results["retriever_batch_qps"] = len(queries) / (time.perf_counter() - start)
+    return results
+
+
+def bench_sqlite_writes(workdir, rows):
+    """Raw write path (no embedding model) so the number is sqlite cost"""
+    records = [
+        {
+            "input_type": "benchmark",
+            "raw_input": f"write throughput problem {i}",
+            "parsed_problem": {"problem_text": f"write throughput problem {i}"},
+            "solution": "ANSWER: 0",
+            "verification": {"is_correct": False},
+            "is_correct": False
+        }
+        for i in range(rows)
+    ]
+    results = {}
+
+    memory = SolutionMemory(os.path.join(workdir, "writes_sync.db"))
+    start = time.perf_counter()
+    for i in range(0, rows, 100):
+        memory.store_many(records[i:i + 100])
+    results["store_many_rows_per_sec"] = rows / (time.perf_counter() - start)
+    memory.close()
+
+    memory = SolutionMemory(os.path.join(workdir, "writes_async.db"))
+    start = time.perf_counter()
+    for record in records:
+        memory.store_async(record)
+    memory.flush()
+    results["store_async_rows_per_sec"] = rows / (time.perf_counter() - start)
+    memory.close()
+
+    return results
+
+
+def run(kb_path=Config.KNOWLEDGE_BASE_PATH, repeats=3, llm_latency="fixed:0",
+        retrieval_queries=512, batch_size=64, write_rows=5000, out=None):
+    corpus = load_corpus()
+    workdir = tempfile.mkdtemp(prefix="e2e_bench_")
+    total_start = time.perf_counter()
+
+    try:
+        startup, kb, memory, embedding_model, calculator = bench_startup(kb_path, workdir)
+        llm = StubLLMClient(corpus, llm_latency)
+        stages = bench_pipeline(corpus, kb, memory, calculator, llm, repeats)
+        retrieval = bench_retrieval(corpus, kb, embedding_model, retrieval_queries, batch_size)
+        writes = bench_sqlite_writes(workdir, write_rows)
+        memory.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "corpus_size": len(corpus),
+            "repeats": repeats,
+            "llm_latency": llm_latency,
+            "total_seconds": time.perf_counter() - total_start
+        },
+        "startup": startup,
+        "stages": stages,
+        "retrieval": retrieval,
+        "sqlite": writes,
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+    print_report(report)
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Results written to {out}")
+    return report
+
+
+def print_report(report):
+    print("🚀 Startup")
+    for name, seconds in report["startup"].items():
+        print(f"   {name:<22} {seconds:8.3f}s")
+
+    print("⏱️ Stages (ms)")
+    print(f"   {'stage':<14} {'n':>5} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for stage, p in report["stages"].items():
+        print(f"   {stage:<14} {p['count']:>5} {p['p50_ms']:>9.2f} {p['p95_ms']:>9.2f} {p['p99_ms']:>9.2f}")
+
+    print("📚 Retrieval")
+    for name, value in report["retrieval"].items():
+        unit = "q/s" if name.endswith("qps") else "ms"
+        print(f"   {name:<22} {value:10.1f} {unit}")
+
+    print("🗄️ SQLite writes")
+    for name, rate in report["sqlite"].items():
+        print(f"   {name:<26} {rate:10.1f} rows/s")
+
+    if report["peak_rss_mb"] is not None:
+        print(f"🧠 Peak RSS: {report['peak_rss_mb']:.1f} MB")
+
+
+def flatten(report):
+    """{"stages.solver.p95_ms": 12.3, ...} for every numeric metric"""
+    flat = {}
+
+    def walk(prefix, value):
+        if isinstance(value, dict):
+            for key, inner in value.items():
+                walk(f"{prefix}.{key}" if prefix else key, inner)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[prefix] = value
+
+    walk("", {k: v for k, v in report.items() if k != "meta"})
+    return flat
+
+
+def compare(baseline_path, current_path, threshold=0.10):
+    """
+    Print metric changes between two result files.
+    Returns the list of regressions (worse by more than threshold).
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = flatten(json.load(f))
+    with open(current_path, encoding="utf-8") as f:
+        current = flatten(json.load(f))
+
+    regressions = []
+    print(f"{'metric':<36} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name in sorted(set(baseline) & set(current)):
+        if name.endswith(".count"):
+            continue
+        old, new = baseline[name], current[name]
+        change = (new - old) / old if old else 0.0
+        worse = -change if HIGHER_IS_BETTER.search(name) else change
+        flag = ""
+        if worse > threshold:
+            flag = " ❌"
+            regressions.append(name)
+        elif worse < -threshold:
+            flag = " ✅"
+        print(f"{name:<36} {old:>12.3f} {new:>12.3f} {change:>+8.1%}{flag}")
+
+    if regressions:
+        print(f"❌ {len(regressions)} regression(s) above {threshold:.0%}")
+    else:
+        print(f"✅ No regressions above {threshold:.0%}")
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--repeats", type=int, default=3, help="passes over the corpus")
+    parser.add_argument("--llm-latency", default="fixed:0",
+                        help="stub LLM latency, e.g. fixed:0.2, lognormal:0.05,0.3")
+    parser.add_argument("--write-rows", type=int, default=5000, help="rows for the sqlite write test")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="compare two result files instead of running")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative change counted as a regression")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, threshold=args.threshold) else 0)
+    run(repeats=args.repeats, llm_latency=args.llm_latency, write_rows=args.write_rows, out=args.out)
@@ -0,0 +1,95 @@
+"""
+Index Trade-off Benchmark
+-------------------------
+recall@k vs query latency vs memory for each index type in
+rag.vector_index, against the exact flat index.
+
+Vectors are synthetic: normalized 384-dim points drawn around random
+topic centroids (like MiniLM chunk embeddings), so a large corpus can
+be benchmarked without embedding it. Queries are fresh points from the
+same distribution; ground truth is the flat index's top-k.
+
+Run from the project root:
+    python -m benchmarks.index_tradeoffs [num_vectors]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from config.settings import Config
+from rag.vector_index import build_index, index_memory_bytes, set_search_params
+
+DIM = 384
+TOPICS = 500
+
+# (label, index_type, search knobs)
+CONFIGS = [
+    ("flat", "flat", {}),
+    ("fp16", "fp16", {}),
+    ("sq8", "sq8", {}),
+    ("ivf_flat nprobe=4", "ivf_flat", {"nprobe": 4}),
+    ("ivf_flat nprobe=16", "ivf_flat", {"nprobe": 16}),
+    ("ivf_flat nprobe=64", "ivf_flat", {"nprobe": 64}),
+    ("ivf_pq nprobe=16", "ivf_pq", {"nprobe": 16}),
+    ("ivf_pq nprobe=64", "ivf_pq", {"nprobe": 64}),
+    ("hnsw ef=16", "hnsw", {"ef_search": 16}),
+    ("hnsw ef=64", "hnsw", {"ef_search": 64}),
+    ("hnsw ef=256", "hnsw", {"ef_search": 256}),
+]
+
+
+def make_vectors(n, seed=0, centroids=None):
+    rng = np.random.default_rng(seed)
+    if centroids is None:
+        centroids = rng.standard_normal((TOPICS, DIM)).astype(np.float32)
+    vectors = centroids[rng.integers(0, len(centroids), n)]
+    vectors = vectors + 1.2 * rng.standard_normal((n, DIM)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32), centroids
+
+
+def recall_at_k(found, truth):
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found.tolist(), truth.tolist()))
+    return hits / truth.size
+
+
+def run(num_vectors=100000, num_queries=1000, top_k=Config.TOP_K_RETRIEVAL * 3):
+    corpus, centroids = make_vectors(num_vectors, seed=0)
+    queries, _ = make_vectors(num_queries, seed=1, centroids=centroids)
+
+    built, truth, results = {}, None, {}
+    for label, index_type, knobs in CONFIGS:
+        if index_type not in built:
+            start = time.perf_counter()
+            built[index_type] = (build_index(corpus, index_type), time.perf_counter() - start)
+        index, build_seconds = built[index_type]
+        set_search_params(index, **knobs)
+
+        index.search(queries[:10], top_k)   # warm up
+        # One query per call, like the app does
+        start = time.perf_counter()
+        found = np.vstack([index.search(queries[q:q + 1], top_k)[1] for q in range(num_queries)])
+        per_query_ms = (time.perf_counter() - start) / num_queries * 1000
+
+        if truth is None:
+            truth = found
+        results[label] = {
+            "recall": recall_at_k(found, truth),
+            "ms_per_query": per_query_ms,
+            "memory_mb": index_memory_bytes(index) / 1e6,
+            "build_seconds": build_seconds
+        }
+
+    print(f"{num_vectors} vectors, {num_queries} single queries, recall@{top_k}")
+    for label, r in results.items():
+        print(
+            f"{label:>20}: recall {r['recall']:.3f}  {r['ms_per_query']:7.3f} ms/query  "
+            f"{r['memory_mb']:8.1f} MB  build {r['build_seconds']:6.1f}s"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,117 @@
+"""
+Knowledge Base Reload Benchmark
+-------------------------------
+Edits a few files of a synthetic KB and compares:
+
+- refresh(): re-embeds only the touched files and publishes a new snapshot
+- a full cold rebuild of the same KB
+
+While refresh() runs, a second thread keeps calling retrieve(); the
+report shows how many queries were served during the update, their
+worst latency (queries never wait for the update) and any
+errors (there should be none).
+
+Run from the project root:
+    python -m benchmarks.kb_reload [num_files] [edited_files]
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.chunking import make_document
+from config.settings import Config
+from rag.knowledge_base import KnowledgeBase
+
+QUERIES = ["binomial nCr probability", "chain rule dy/dx", "quadratic discriminant", "Bayes P(A|B)"]
+
+
+def write_files(kb_path, rng, names):
+    for name in names:
+        with open(os.path.join(kb_path, name), "w", encoding="utf-8") as f:
+            f.write(make_document(rng))
+
+
+def run(num_files=200, edited=5, seed=0):
+    rng = random.Random(seed)
+    workdir = tempfile.mkdtemp(prefix="reload_bench_")
+    kb_path = os.path.join(workdir, "kb")
+    os.makedirs(kb_path)
+    names = [f"notes_{i:04d}.md" for i in range(num_files)]
+    write_files(kb_path, rng, names)
+
+    try:
+        kb = KnowledgeBase(kb_path, Config.EMBEDDING_MODEL, chunk_size=Config.CHUNK_SIZE,
+                           index_path=os.path.join(workdir, "index"))
+        kb.build()
+
+        # Edit some files, delete one, add one
+        write_files(kb_path, rng, names[:edited])
+        os.remove(os.path.join(kb_path, names[-1]))
+        write_files(kb_path, rng, ["notes_new.md"])
+
+        latencies, errors = [], []
+        done = threading.Event()
+
+        def query_loop():
+            i = 0
+            while not done.is_set():
+                start = time.perf_counter()
+                try:
+                    if not kb.retrieve(QUERIES[i % len(QUERIES)], top_k=3):
+                        errors.append("empty result")
+                except Exception as e:
+                    errors.append(repr(e))
+                latencies.append(time.perf_counter() - start)
+                i += 1
+
+        reader = threading.Thread(target=query_loop)
+        reader.start()
+        start = time.perf_counter()
+        kb.refresh()
+        refresh_seconds = time.perf_counter() - start
+        done.set()
+        reader.join()
+        refresh_stats = kb.last_build_stats
+
+        cold = KnowledgeBase(kb_path, Config.EMBEDDING_MODEL, chunk_size=Config.CHUNK_SIZE,
+                             index_path=os.path.join(workdir, "index_cold"))
+        start = time.perf_counter()
+        cold.build()
+        rebuild_seconds = time.perf_counter() - start
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        "files": num_files,
+        "refresh_seconds": refresh_seconds,
+        "rebuild_seconds": rebuild_seconds,
+        "embedded_chunks": refresh_stats["embedded_chunks"],
+        "total_chunks": refresh_stats["total_chunks"],
+        "queries_during_refresh": len(latencies),
+        "max_query_ms": max(latencies, default=0) * 1000,
+        "errors": len(errors)
+    }
+
+    print(
+        f"{num_files} files: {edited} edited, 1 removed, 1 added "
+        f"({results['embedded_chunks']} of {results['total_chunks']} chunks re-embedded)"
+    )
+    print(f"  refresh       {refresh_seconds:.2f}s")
+    print(f"  full rebuild  {rebuild_seconds:.2f}s")
+    print(
+        f"  during refresh: {results['queries_during_refresh']} queries served, "
+        f"max {results['max_query_ms']:.1f} ms, {results['errors']} errors"
+    )
+    return results
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    )
@@ -0,0 +1,41 @@
+"""
+Knowledge Base Startup Benchmark
+--------------------------------
+Compares a cold build (no saved index) with a warm start that
+reloads the persisted vector store and manifest.
+
+Run from the project root:
+    python -m benchmarks.kb_startup
+"""
+
+import shutil
+import tempfile
+import time
+
+from config.settings import Config
+from rag.knowledge_base import KnowledgeBase
+
+
+def run(kb_path=Config.KNOWLEDGE_BASE_PATH, runs=3):
+    index_path = tempfile.mkdtemp(prefix="kb_bench_")
+    results = {"cold": [], "warm": []}
+
+    try:
+        for _ in range(runs):
+            shutil.rmtree(index_path, ignore_errors=True)
+            for mode in ("cold", "warm"):
+                kb = KnowledgeBase(kb_path, Config.EMBEDDING_MODEL, index_path=index_path)
+                start = time.perf_counter()
+                kb.build()
+                results[mode].append(time.perf_counter() - start)
+    finally:
+        shutil.rmtree(index_path, ignore_errors=True)
+
+    for mode, timings in results.items():
+        print(f"{mode:>5}: best {min(timings):.3f}s  mean {sum(timings) / len(timings):.3f}s")
+
+    return results
+
+
+if __name__ == "__main__":
+    run()
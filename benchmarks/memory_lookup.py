@@ -0,0 +1,101 @@
+"""
+Solution Memory Lookup Benchmark
+--------------------------------
+Grows the solutions table step by step and measures
+SolutionMemory.retrieve_similar latency at each size.
+
+A hashing bag-of-words embedder stands in for SentenceTransformer so
+the numbers reflect index + sqlite cost, not model inference.
+
+Run from the project root:
+    python -m benchmarks.memory_lookup [max_rows]
+"""
+
+import hashlib
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from memory.solution_memory import SolutionMemory
+
+WORDS = (
+    "coin dice probability binomial heads tails derivative limit integral "
+    "matrix determinant vector quadratic roots polynomial sin cos log exp "
+    "tossed rolled find value solve evaluate exactly least most times"
+).split()
+
+
+class HashingEmbedder:
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def embed_documents(self, texts):
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.split():
+                h = int(hashlib.md5(word.encode()).hexdigest()[:8], 16)
+                out[row, h % self.dim] += 1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.maximum(norms, 1e-9)
+
+
+def make_problem(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(12)) + f" n={rng.randint(1, 10**6)}"
+
+
+def percentile_ms(timings, q):
+    return float(np.percentile(timings, q)) * 1000
+
+
+def run(max_rows=100_000, queries=200, batch=5000):
+    rng = random.Random(0)
+    db_dir = tempfile.mkdtemp(prefix="memory_bench_")
+    db_path = os.path.join(db_dir, "solutions.db")
+    memory = SolutionMemory(db_path, embedding_model=HashingEmbedder())
+
+    sizes = [n for n in (1_000, 10_000, 100_000, 1_000_000) if n <= max_rows]
+    rows = 0
+    results = {}
+
+    for size in sizes:
+        while rows < size:
+            count = min(batch, size - rows)
+            memory.store_many([
+                {
+                    "parsed_problem": {"problem_text": make_problem(rng)},
+                    "solution": {"solution": "..."},
+                    "is_correct": True
+                }
+                for _ in range(count)
+            ])
+            rows += count
+
+        probes = [make_problem(rng) for _ in range(queries)]
+        timings = []
+        for probe in probes:
+            start = time.perf_counter()
+            memory.retrieve_similar(probe, limit=3)
+            timings.append(time.perf_counter() - start)
+
+        results[size] = {
+            "p50_ms": percentile_ms(timings, 50),
+            "p95_ms": percentile_ms(timings, 95),
+            "p99_ms": percentile_ms(timings, 99)
+        }
+        print(
+            f"{size:>9} rows: p50 {results[size]['p50_ms']:.3f} ms  "
+            f"p95 {results[size]['p95_ms']:.3f} ms  p99 {results[size]['p99_ms']:.3f} ms"
+        )
+
+    memory.close()
+    shutil.rmtree(db_dir, ignore_errors=True)
+    return results
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
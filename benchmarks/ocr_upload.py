@@ -0,0 +1,93 @@
+"""
+OCR Upload Benchmark
+--------------------
+Compares sending the raw phone photo against the preprocessed image
+(EXIF fix, grayscale, margin crop, downscale, re-encode), and a
+re-upload served from the OCR cache.
+
+A stub vision model charges a fixed latency plus upload time at a
+configurable bandwidth, so the numbers show what the smaller upload
+buys without needing an API key.
+
+Run from the project root:
+    python -m benchmarks.ocr_upload [photo.jpg]
+"""
+
+import io
+import sys
+import time
+
+from PIL import Image, ImageDraw
+
+from llm.client import LLMClient, LLMResponse
+from multimodal.ocr_processor import GeminiOCR
+
+UPLOAD_MBIT_PER_SEC = 10.0
+MODEL_SECONDS = 0.8
+
+
+class UploadTimedStub(LLMClient):
+    def complete(self, prompt, model, max_tokens=1000, temperature=None):
+        data = prompt[1]["data"]
+        time.sleep(MODEL_SECONDS + len(data) * 8 / (UPLOAD_MBIT_PER_SEC * 1e6))
+        return LLMResponse("A coin is tossed 5 times. Find the probability of exactly 3 heads.")
+
+
+class Upload:
+    def __init__(self, data, mime_type="image/jpeg"):
+        self.data = data
+        self.type = mime_type
+
+    def getvalue(self):
+        return self.data
+
+
+def make_photo(width=4032, height=3024):
+    """Phone-sized noisy 'photo' of a worksheet with wide margins"""
+    image = Image.effect_noise((width, height), 12).convert("RGB")
+    image = Image.blend(image, Image.new("RGB", (width, height), (225, 220, 205)), 0.6)
+    draw = ImageDraw.Draw(image)
+    for line in range(12):
+        y = height // 3 + line * 90
+        draw.text((width // 4, y), f"{line + 1}. A coin is tossed 5 times. Find P(exactly 3 heads).",
+                  fill=(20, 20, 30))
+        draw.rectangle((width // 4, y + 40, width // 4 + 1400, y + 46), fill=(40, 40, 40))
+
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=95)
+    return buffer.getvalue()
+
+
+def run(photo_bytes=None):
+    photo_bytes = photo_bytes or make_photo()
+    upload = Upload(photo_bytes)
+    results = {}
+
+    for name, preprocess in (("raw", False), ("preprocessed", True)):
+        ocr = GeminiOCR(UploadTimedStub(), "stub-vision", preprocess=preprocess)
+        start = time.perf_counter()
+        result = ocr.extract_text(upload)
+        results[name] = {
+            "uploaded_bytes": result["uploaded_bytes"],
+            "seconds": time.perf_counter() - start
+        }
+
+        if preprocess:
+            start = time.perf_counter()
+            ocr.extract_text(upload)
+            results["cached re-upload"] = {
+                "uploaded_bytes": 0,
+                "seconds": time.perf_counter() - start
+            }
+
+    for name, r in results.items():
+        print(f"{name:>17}: {r['uploaded_bytes'] / 1024:8.0f} KB uploaded  {r['seconds']:.3f}s")
+    return results
+
+
+if __name__ == "__main__":
+    data = None
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "rb") as f:
+            data = f.read()
+    run(data)
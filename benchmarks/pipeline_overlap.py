@@ -0,0 +1,67 @@
+"""
+Pipeline Overlap Benchmark
+--------------------------
+Compares end-to-end latency of the async orchestrator against the
+serial path, using agents that sleep for a typical per-stage latency
+instead of calling an LLM.
+
+Run from the project root:
+    python -m benchmarks.pipeline_overlap
+"""
+
+import time
+
+from agents.orchestrator import build_solve_pipeline
+
+# Typical per-stage latencies in seconds
+LATENCY = {
+    "parse": 0.8,
+    "route": 0.05,
+    "retrieve": 0.3,
+    "solve": 2.0,
+    "verify": 1.0,
+    "explain": 1.5
+}
+
+
+class SleepyAgent:
+    def parse(self, raw_text):
+        time.sleep(LATENCY["parse"])
+        return {"problem_text": raw_text, "topic": "probability"}
+
+    def route(self, parsed):
+        time.sleep(LATENCY["route"])
+        return {"topic": parsed["topic"]}
+
+    def retrieve(self, query, top_k=3):
+        time.sleep(LATENCY["retrieve"])
+        return [{"content": "C(n,k)", "source": "kb", "score": 1.0}]
+
+    def solve(self, parsed, context_docs=None):
+        time.sleep(LATENCY["solve"])
+        return {"solution": "ANSWER: 5/16", "context_used": context_docs}
+
+    def verify(self, parsed, solution):
+        time.sleep(LATENCY["verify"])
+        return {"is_correct": True, "confidence": 0.9}
+
+    def explain(self, parsed, solution, verification):
+        time.sleep(LATENCY["explain"])
+        return {"explanation": "..."}
+
+
+def run(runs=3):
+    agent = SleepyAgent()
+    pipeline = build_solve_pipeline(agent, agent, agent, agent, agent, agent)
+    problem = "A coin is tossed 5 times. Find probability of exactly 3 heads."
+
+    serial = min(pipeline.run_serial(raw_text=problem)["total_seconds"] for _ in range(runs))
+    overlapped = min(pipeline.run_sync(raw_text=problem)["total_seconds"] for _ in range(runs))
+
+    print(f"serial:     {serial:.2f}s")
+    print(f"overlapped: {overlapped:.2f}s  ({serial / overlapped:.2f}x faster)")
+    return {"serial_seconds": serial, "overlapped_seconds": overlapped}
+
+
+if __name__ == "__main__":
+    run()
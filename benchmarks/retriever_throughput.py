@@ -0,0 +1,56 @@
+"""
+Retriever Throughput Benchmark
+------------------------------
+Measures queries/second of Retriever.retrieve_many for different
+batch sizes, against one-at-a-time Retriever.retrieve calls.
+
+Run from the project root:
+    python -m benchmarks.retriever_throughput
+"""
+
+import random
+import time
+
+from config.settings import Config
+from rag.embeddings import EmbeddingModel
+from rag.retriever import Retriever
+
+TOPICS = ["binomial", "derivative", "limit", "matrix", "quadratic", "bayes", "integral"]
+
+
+def make_queries(n, seed=0):
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(TOPICS)} problem {i} with {rng.choice(TOPICS)} and n={rng.randint(1, 99)}"
+        for i in range(n)
+    ]
+
+
+def run(num_docs=2000, total_queries=2048, batch_sizes=(1, 64, 1024), top_k=Config.TOP_K_RETRIEVAL):
+    # No persistent cache: every query is embedded for real
+    model = EmbeddingModel(Config.EMBEDDING_MODEL, cache_path=None, cache_size=0)
+    documents = [
+        {"content": text, "source": f"doc_{i}"}
+        for i, text in enumerate(make_queries(num_docs, seed=1))
+    ]
+    retriever = Retriever(documents, model)
+
+    results = {}
+    for batch_size in batch_sizes:
+        queries = make_queries(total_queries, seed=batch_size)
+        start = time.perf_counter()
+        if batch_size == 1:
+            for query in queries:
+                retriever.retrieve(query, top_k)
+        else:
+            for i in range(0, len(queries), batch_size):
+                retriever.retrieve_many(queries[i:i + batch_size], top_k)
+        elapsed = time.perf_counter() - start
+        results[batch_size] = len(queries) / elapsed
+        print(f"batch {batch_size:>5}: {results[batch_size]:>9.1f} queries/s")
+
+    return results
+
+
+if __name__ == "__main__":
+    run()
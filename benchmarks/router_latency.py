@@ -0,0 +1,77 @@
+"""
+Router Latency Benchmark
+------------------------
+Routes a fixed corpus of problems with and without the embedding
+classifier and reports average routing latency and LLM fallback rate.
+The LLM is replaced by a client that sleeps for a typical round trip.
+
+Run from the project root:
+    python -m benchmarks.router_latency
+"""
+
+import time
+from types import SimpleNamespace
+
+from agents.router_agent import RouterAgent
+from agents.topic_classifier import TopicClassifier
+from config.settings import Config
+from rag.embeddings import EmbeddingModel
+
+LLM_ROUND_TRIP = 0.6   # seconds
+
+# Parser output with topic "unknown" so the keyword step is exercised
+PROBLEMS = [
+    "A coin is tossed 5 times. Find probability of exactly 3 heads.",
+    "Two dice are rolled. Find the chance that the sum is 7.",
+    "What are the odds of drawing two aces without replacement?",
+    "A bag has 4 red and 6 green balls; two are drawn. Find P(both green).",
+    "Find the derivative of x^3 + 2x.",
+    "Evaluate the integral of sin x from 0 to pi.",
+    "Find the maximum of f(x) = x(4 - x).",
+    "Find the slope of the tangent to y = ln x at x = 1.",
+    "Find the determinant of [[2, 1], [1, 3]].",
+    "Find the eigenvalues of [[2, 0], [0, 3]].",
+    "Solve x^2 - 7x + 10 = 0.",
+    "Find the 10th term of the AP 3, 7, 11, ...",
+    "Simplify (x^2 - 9)/(x - 3).",
+    "Find the coefficient of x^3 in (2 + x)^6.",
+    "If 2^x = 32, find x.",
+    "Find the sum of the infinite GP 1 + 1/2 + 1/4 + ...",
+]
+
+
+class SleepyLLM:
+    def __init__(self):
+        self.messages = SimpleNamespace(create=self.create)
+
+    def create(self, **kwargs):
+        time.sleep(LLM_ROUND_TRIP)
+        return SimpleNamespace(content=[SimpleNamespace(text="algebra")])
+
+
+def measure(router):
+    for text in PROBLEMS:
+        router.route({"topic": "unknown", "problem_text": text})
+    return router.routing_stats()
+
+
+def run():
+    baseline = RouterAgent("offline", "offline", use_classifier=False)
+    baseline.client = SleepyLLM()
+
+    model = EmbeddingModel(Config.EMBEDDING_MODEL, cache_path=None)
+    classifier = TopicClassifier(model).build(Config.KNOWLEDGE_BASE_PATH)
+    local = RouterAgent("offline", "offline", classifier=classifier)
+    local.client = SleepyLLM()
+
+    results = {"before": measure(baseline), "after": measure(local)}
+    for name, stats in results.items():
+        print(
+            f"{name:>6}: avg {stats['avg_ms']:8.2f} ms/route, "
+            f"LLM fallback rate {stats['llm_fallback_rate']:.0%}"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    run()
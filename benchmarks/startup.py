@@ -0,0 +1,117 @@
+"""
+Startup Benchmark
+-----------------
+Per-import and per-resource breakdown of a cold start.
+
+Imports are timed in fresh interpreters, so each number includes
+everything that module pulls in. "app modules" is what app.py imports
+before the first page renders; "eager" adds the (installed) heavy
+packages that used to be imported at module load.
+
+Resources (SymPy parser, embedding model, knowledge base) are then
+loaded the way the app's warm-up thread loads them.
+
+Run from the project root:
+    python -m benchmarks.startup
+"""
+
+import subprocess
+import sys
+
+from tracing.startup import StartupProfiler
+
+APP_MODULES = [
+    "tracing.startup",
+    "agents.streaming",
+    "config.settings",
+    "llm.client",
+    "memory.solution_memory",
+    "memory.solution_cache",
+    "tracing.tracer",
+]
+
+HEAVY_MODULES = [
+    "sympy",
+    "faiss",
+    "PIL.Image",
+    "sentence_transformers",
+    "langchain_community.vectorstores",
+    "google.generativeai",
+]
+
+PROJECT_MODULES = [
+    "tools.calculator",
+    "agents.template_solver",
+    "rag.embeddings",
+    "rag.retriever",
+    "rag.knowledge_base",
+    "multimodal.ocr_processor",
+    "multimodal.asr_processor",
+]
+
+
+def import_seconds(modules):
+    """Wall time to import `modules` in a fresh interpreter, or None"""
+    code = (
+        "import time; start = time.perf_counter(); "
+        + "; ".join(f"import {m}" for m in modules)
+        + "; print(time.perf_counter() - start)"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def load_resources(profiler):
+    from config.settings import Config
+
+    def timed(name, loader):
+        try:
+            with profiler.resource(name):
+                return loader()
+        except Exception as e:
+            print(f"⚠️ {name} failed: {e}")
+
+    def calculator():
+        from tools.calculator import Calculator
+        calc = Calculator()
+        calc.evaluate("x**2 + 1")   # first call imports sympy
+        return calc
+
+    timed("calculator", calculator)
+
+    def knowledge_base():
+        from rag.knowledge_base import KnowledgeBase
+        kb = KnowledgeBase(Config.KNOWLEDGE_BASE_PATH, Config.EMBEDDING_MODEL)
+        kb.build()
+        return kb
+
+    timed("knowledge_base", knowledge_base)
+
+
+def run():
+    rows = []
+    for group, modules in (("app", APP_MODULES), ("heavy", HEAVY_MODULES), ("project", PROJECT_MODULES)):
+        for module in modules:
+            rows.append((group, module, import_seconds([module])))
+    rows.append(("total", "app modules", import_seconds(APP_MODULES)))
+    installed = [module for group, module, seconds in rows if group == "heavy" and seconds is not None]
+    rows.append(("total", "app modules + eager heavy imports",
+                 import_seconds(APP_MODULES + installed)))
+
+    print("Imports (fresh interpreter each):")
+    for group, module, seconds in rows:
+        shown = f"{seconds * 1000:8.0f} ms" if seconds is not None else "  not installed"
+        print(f"{group:>8}  {module:<40} {shown}")
+
+    print("\nResources:")
+    profiler = StartupProfiler()
+    load_resources(profiler)
+    profiler.print_report()
+
+    return {"imports": rows, "resources": profiler.report()}
+
+
+if __name__ == "__main__":
+    run()
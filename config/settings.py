@@ -8,6 +8,7 @@ class Config:
     # API Keys
     # ----------------------------
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+    ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 
     # ----------------------------
     # Gemini Model Settings
@@ -19,23 +20,106 @@ class Config:
     TEMPERATURE = 0.2
     MAX_TOKENS = 4000
 
+    # ----------------------------
+    # Anthropic Model Settings (solver / verifier / explainer agents)
+    # ----------------------------
+    SOLVER_MODEL = os.getenv("SOLVER_MODEL", "claude-3-5-sonnet-latest")
+
+    # ----------------------------
+    # LLM Client (live | record | replay)
+    # ----------------------------
+    GEMINI_MODEL = "models/gemini-2.5-flash"
+    LLM_MODE = os.getenv("LLM_MODE", "live")
+    LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", "./cassettes/llm.jsonl")
+    LLM_REPLAY_LATENCY = os.getenv("LLM_REPLAY_LATENCY", "recorded")   # see llm.client.LatencyModel
+    LLM_MAX_RETRIES = 2            # transient API errors (429, 5xx, connection), live calls
+    LLM_RETRY_BACKOFF = 1.0        # seconds before the first retry, doubled each time
+
     # ----------------------------
     # RAG Settings
     # ----------------------------
     EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
     CHUNK_SIZE = 500
-    CHUNK_OVERLAP = 50
+    CHUNK_OVERLAP = 50             # "recursive" chunker only
+    KB_CHUNKER = "math"            # math (rag.chunker) | recursive (langchain splitter)
+    EMBED_BATCH_SIZE = 256         # chunks embedded per batch while building
+    KB_RELOAD_INTERVAL = float(os.getenv("KB_RELOAD_INTERVAL", "10"))   # seconds between KB polls, 0 = off
+    KB_COMPACT_RATIO = 0.2         # delta + removed chunks, as a fraction of the base, that trigger a merge
     TOP_K_RETRIEVAL = 3
+    RAG_WORKERS = 4                # app retrievals running alongside the parser call
+    EMBEDDING_CACHE_SIZE = 10000   # in-memory LRU entries
+    CONTEXT_TOKEN_BUDGET = 1200    # solver prompt context (estimated tokens)
+    CONTEXT_DEDUP_THRESHOLD = 0.8  # trigram Jaccard at which chunks count as duplicates
+    HYBRID_RETRIEVAL = True        # BM25 + dense, fused by reciprocal rank
+    HYBRID_CANDIDATES = 4          # each leg returns top_k * this before fusion
+    RRF_K = 60
+
+    # ----------------------------
+    # Vector Index (Retriever, see rag.vector_index)
+    # ----------------------------
+    INDEX_TYPE = os.getenv("INDEX_TYPE", "flat")   # flat | ivf_flat | ivf_pq | hnsw | sq8 | fp16
+    INDEX_NLIST = 0              # IVF clusters, 0 = ~4*sqrt(n)
+    INDEX_NPROBE = 16            # IVF clusters searched per query
+    INDEX_PQ_M = 48              # PQ subquantizers (rounded down to a divisor of dim)
+    INDEX_PQ_BITS = 8
+    INDEX_HNSW_M = 32            # HNSW neighbours per node
+    INDEX_EF_CONSTRUCTION = 80
+    INDEX_EF_SEARCH = 64         # HNSW candidates per query
+    INDEX_TRAIN_SIZE = 100000    # max vectors used to train IVF / PQ / int8
 
     # ----------------------------
     # Confidence Thresholds
     # ----------------------------
     OCR_CONFIDENCE_THRESHOLD = 0.7
     VERIFIER_CONFIDENCE_THRESHOLD = 0.8
+    ROUTER_CLASSIFIER = True            # RouterAgent tries the embedding classifier before the LLM
+    ROUTER_CONFIDENCE_THRESHOLD = 0.6   # embedding classifier, else LLM
+
+    # ----------------------------
+    # OCR Preprocessing
+    # ----------------------------
+    OCR_MAX_EDGE = 1600         # pixels, long edge after downscaling
+    OCR_JPEG_QUALITY = 85
+    OCR_CACHE_SIZE = 256        # cached OCR results (by exact pixel digest)
+
+    # ----------------------------
+    # ASR Preprocessing
+    # ----------------------------
+    ASR_SAMPLE_RATE = 16000        # mono, Hz
+    ASR_MAX_CHUNK_SECONDS = 30.0   # long recordings split at silences
+    ASR_WORKERS = 4                # chunks transcribed concurrently
+    ASR_OPUS_BITRATE = "24k"       # used when ffmpeg is installed
+    ASR_CACHE_SIZE = 128           # cached transcripts (by content hash)
+
+    # ----------------------------
+    # Calculator Engine (sandboxed worker processes)
+    # ----------------------------
+    CALC_WORKERS = 2
+    CALC_TIMEOUT = 10.0          # seconds per call
+    CALC_MEMORY_LIMIT_MB = 512   # per worker (Unix only)
+
+    # ----------------------------
+    # Startup
+    # ----------------------------
+    WARMUP_WORKERS = 2           # resources loaded in the background at once
+    RAG_WARMUP_TIMEOUT = 5.0     # seconds a solve waits for the KB before skipping RAG
+
+    # ----------------------------
+    # Batch Solving
+    # ----------------------------
+    BATCH_CONCURRENCY = 8
+    BATCH_RATE_LIMIT = 5.0   # LLM requests per second, 0 = unlimited
 
     # ----------------------------
     # Paths
     # ----------------------------
     KNOWLEDGE_BASE_PATH = "./knowledge_base"
     VECTOR_STORE_PATH = "./vector_store"
+    EMBEDDING_CACHE_PATH = "./vector_store/embeddings.db"
     MEMORY_DB_PATH = "./memory/solutions.db"
+    TRACE_PATH = "./traces/spans.jsonl"   # written by the app only (tracing.tracer.enable_trace_file)
+
+    # ----------------------------
+    # Metrics
+    # ----------------------------
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))   # 0 = no /metrics server
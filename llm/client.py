@@ -0,0 +1,484 @@
+"""
+LLM Client Layer
+----------------
+One small interface in front of Anthropic and Gemini so agents can run
+live, record their calls to a cassette, or replay them offline.
+
+- complete(prompt, model, max_tokens, temperature) -> LLMResponse
+- stream(...) -> LLMStream (iterate for text chunks; .response afterwards)
+
+Backends:
+- AnthropicClient / GeminiClient: live API calls; transient errors
+  (rate limits, 5xx, dropped connections) are retried with backoff and
+  each retry is counted on the current tracing span
+- RecordingClient: wraps a live client and appends every call to a
+  JSONL cassette
+- ReplayClient: answers from a cassette, no keys or network, with a
+  configurable synthetic latency distribution
+
+Example:
+    client = make_llm_client("anthropic", mode="replay",
+                             cassette_path="cassettes/llm.jsonl",
+                             latency="lognormal:0.8,0.4")
+    client.complete("Solve x^2 = 4", "claude-3-5-sonnet-latest").text
+"""
+
+import abc
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+
+from config.settings import Config
+from tracing.tracer import current_span
+
+MODES = ("live", "record", "replay")
+
+# HTTP statuses worth retrying (529 = Anthropic overloaded)
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504, 529}
+# Exception class names of the SDKs' transient errors
+RETRY_ERRORS = {
+    "APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError",
+    "OverloadedError", "ResourceExhausted", "ServiceUnavailable", "DeadlineExceeded",
+    "TooManyRequests",
+}
+
+
+class CassetteMissError(KeyError):
+    """Replay found no recorded response for a request"""
+
+
+class Usage:
+    def __init__(self, input_tokens=0, output_tokens=0):
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+
+
+class LLMResponse:
+    def __init__(self, text, model=None, usage=None):
+        self.text = text
+        self.model = model
+        self.usage = usage or Usage()
+
+
+class LLMStream:
+    """
+    Iterable of text chunks.
+    After it is exhausted, .response holds the full LLMResponse.
+    """
+
+    def __init__(self, chunks, model=None, usage_fn=None):
+        self._chunks = chunks
+        self.model = model
+        self._usage_fn = usage_fn
+        self.response = None
+
+    def __iter__(self):
+        text = []
+        for chunk in self._chunks:
+            text.append(chunk)
+            yield chunk
+        usage = self._usage_fn() if self._usage_fn else None
+        self.response = LLMResponse("".join(text), self.model, usage)
+
+
+def is_transient(error):
+    """True for errors a retry may fix"""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    return status in RETRY_STATUSES or type(error).__name__ in RETRY_ERRORS
+
+
+def with_retries(call, max_retries=Config.LLM_MAX_RETRIES, backoff=Config.LLM_RETRY_BACKOFF):
+    """
+    call() with exponential backoff on transient errors.
+    Each retry is added to the current tracing span's retries.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return call()
+        except Exception as e:
+            if attempt == max_retries or not is_transient(e):
+                raise
+            span = current_span()
+            if span is not None:
+                span.retries += 1
+            time.sleep(backoff * 2 ** attempt)
+
+
+class LLMClient(abc.ABC):
+    """Base interface; subclasses implement complete() and may override stream()"""
+
+    @abc.abstractmethod
+    def complete(self, prompt, model, max_tokens=1000, temperature=None):
+        """Returns an LLMResponse"""
+
+    def stream(self, prompt, model, max_tokens=1000, temperature=None):
+        response = self.complete(prompt, model, max_tokens, temperature)
+        return LLMStream(iter([response.text]), model, lambda: response.usage)
+
+
+# =================================================
+# LIVE BACKENDS
+# =================================================
+
+class AnthropicClient(LLMClient):
+    def __init__(self, api_key=None, client=None):
+        if client is None:
+            from anthropic import Anthropic
+            # Retries happen in with_retries, where they are traced
+            client = Anthropic(api_key=api_key, max_retries=0)
+        self.client = client
+
+    def _kwargs(self, prompt, model, max_tokens, temperature):
+        kwargs = {
+            "model": model,
+            "max_tokens": max_tokens,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+        if temperature is not None:
+            kwargs["temperature"] = temperature
+        return kwargs
+
+    def complete(self, prompt, model, max_tokens=1000, temperature=None):
+        kwargs = self._kwargs(prompt, model, max_tokens, temperature)
+        response = with_retries(lambda: self.client.messages.create(**kwargs))
+        return LLMResponse(
+            response.content[0].text,
+            model,
+            Usage(response.usage.input_tokens, response.usage.output_tokens)
+        )
+
+    def stream(self, prompt, model, max_tokens=1000, temperature=None):
+        kwargs = self._kwargs(prompt, model, max_tokens, temperature)
+        final = {}
+
+        def open_stream():
+            # Entering the manager sends the request; retry only that
+            manager = self.client.messages.stream(**kwargs)
+            return manager, manager.__enter__()
+
+        def chunks():
+            manager, stream = with_retries(open_stream)
+            try:
+                yield from stream.text_stream
+                final["usage"] = stream.get_final_message().usage
+            finally:
+                manager.__exit__(None, None, None)
+
+        def usage():
+            u = final.get("usage")
+            return Usage(u.input_tokens, u.output_tokens) if u else Usage()
+
+        return LLMStream(chunks(), model, usage)
+
+
+class GeminiClient(LLMClient):
+    def __init__(self, api_key=None, model=None):
+        """
+        Parameters:
+        - api_key: configures google.generativeai
+        - model: optional ready GenerativeModel, used for its own model name
+
+        google.generativeai is slow to import, so it is loaded on the
+        first request rather than here.
+        """
+        self._api_key = api_key
+        self._genai = None
+        self._lock = threading.Lock()
+        self._models = {}
+        if model is not None:
+            self._models[model.model_name] = model
+
+    def _model(self, name):
+        with self._lock:
+            if name not in self._models:
+                if self._genai is None:
+                    import google.generativeai as genai
+                    if self._api_key:
+                        genai.configure(api_key=self._api_key)
+                    self._genai = genai
+                self._models[name] = self._genai.GenerativeModel(name)
+            return self._models[name]
+
+    def _config(self, max_tokens, temperature):
+        """max_tokens=None keeps the model's default output limit"""
+        config = {}
+        if max_tokens is not None:
+            config["max_output_tokens"] = max_tokens
+        if temperature is not None:
+            config["temperature"] = temperature
+        return config
+
+    def _usage(self, response):
+        meta = getattr(response, "usage_metadata", None)
+        if meta is None:
+            return Usage()
+        return Usage(meta.prompt_token_count or 0, meta.candidates_token_count or 0)
+
+    def complete(self, prompt, model, max_tokens=1000, temperature=None):
+        response = with_retries(lambda: self._model(model).generate_content(
+            prompt, generation_config=self._config(max_tokens, temperature)
+        ))
+        return LLMResponse(response.text, model, self._usage(response))
+
+    def stream(self, prompt, model, max_tokens=1000, temperature=None):
+        response = with_retries(lambda: self._model(model).generate_content(
+            prompt, generation_config=self._config(max_tokens, temperature), stream=True
+        ))
+
+        def chunks():
+            for chunk in response:
+                try:
+                    yield chunk.text
+                except ValueError:
+                    # Chunks without text parts (e.g. final safety metadata)
+                    continue
+
+        return LLMStream(chunks(), model, lambda: self._usage(response))
+
+
+# =================================================
+# CASSETTES
+# =================================================
+
+def _part_key(part):
+    """Stable representation of one prompt part (text, bytes, image, blob dict)"""
+    if isinstance(part, str):
+        return part
+    if isinstance(part, (bytes, bytearray)):
+        return "bytes:" + hashlib.sha256(part).hexdigest()
+    if isinstance(part, dict):
+        return {k: _part_key(v) for k, v in sorted(part.items())}
+    if hasattr(part, "tobytes"):   # PIL image
+        return "image:" + hashlib.sha256(part.tobytes()).hexdigest()
+    return repr(part)
+
+
+def request_key(prompt, model, max_tokens, temperature):
+    """Cassette key for one request"""
+    parts = prompt if isinstance(prompt, (list, tuple)) else [prompt]
+    payload = json.dumps(
+        [model, max_tokens, temperature, [_part_key(p) for p in parts]],
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """JSONL file of recorded calls, indexed by request_key"""
+
+    def __init__(self, path):
+        self.path = path
+        self.records = {}
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue   # torn last line
+                    self.records[record["key"]] = record
+
+    def get(self, key):
+        return self.records.get(key)
+
+    def append(self, record):
+        with self._lock:
+            self.records[record["key"]] = record
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+
+
+class RecordingClient(LLMClient):
+    def __init__(self, inner, cassette_path):
+        self.inner = inner
+        self.cassette = Cassette(cassette_path)
+
+    def _record(self, key, model, response, seconds, ttft=None, chunks=None):
+        self.cassette.append({
+            "key": key,
+            "model": model,
+            "text": response.text,
+            "chunks": chunks,
+            "input_tokens": response.usage.input_tokens,
+            "output_tokens": response.usage.output_tokens,
+            "seconds": seconds,
+            "ttft": ttft
+        })
+
+    def complete(self, prompt, model, max_tokens=1000, temperature=None):
+        key = request_key(prompt, model, max_tokens, temperature)
+        start = time.perf_counter()
+        response = self.inner.complete(prompt, model, max_tokens, temperature)
+        self._record(key, model, response, time.perf_counter() - start)
+        return response
+
+    def stream(self, prompt, model, max_tokens=1000, temperature=None):
+        key = request_key(prompt, model, max_tokens, temperature)
+        state = {}
+
+        def chunks():
+            # The request is sent when iteration starts, and timed from
+            # there (some backends send it in stream() itself)
+            start = time.perf_counter()
+            inner = state["inner"] = self.inner.stream(prompt, model, max_tokens, temperature)
+            ttft = None
+            collected = []
+            for chunk in inner:
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                collected.append(chunk)
+                yield chunk
+            self._record(key, model, inner.response, time.perf_counter() - start, ttft, collected)
+
+        return LLMStream(chunks(), model, lambda: state["inner"].response.usage)
+
+
+# =================================================
+# REPLAY
+# =================================================
+
+class LatencyModel:
+    """
+    Synthetic latency for replayed calls.
+
+    Specs:
+    - "recorded" / "recorded:0.5"  recorded wall time (optionally scaled)
+    - "fixed:0.2"                  constant seconds
+    - "uniform:0.2,1.5"            uniform between low and high
+    - "normal:0.8,0.2"             mean, std (clipped at 0)
+    - "lognormal:0.8,0.4"          median seconds, sigma
+    """
+
+    def __init__(self, spec="recorded", seed=None):
+        self.spec = spec
+        name, _, params = spec.partition(":")
+        self.name = name.strip().lower()
+        self.params = [float(p) for p in params.split(",") if p.strip()]
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+        if self.name not in ("recorded", "fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency model: {spec}")
+
+    def sample(self, recorded_seconds=None):
+        p = self.params
+        with self._lock:
+            if self.name == "recorded":
+                return (recorded_seconds or 0.0) * (p[0] if p else 1.0)
+            if self.name == "fixed":
+                return p[0] if p else 0.0
+            if self.name == "uniform":
+                return self._rng.uniform(p[0], p[1])
+            if self.name == "normal":
+                return max(self._rng.gauss(p[0], p[1]), 0.0)
+            return self._rng.lognormvariate(math.log(max(p[0], 1e-9)), p[1])
+
+
+class ReplayClient(LLMClient):
+    def __init__(self, cassette_path, latency="recorded", seed=None):
+        """
+        Parameters:
+        - cassette_path: JSONL written by RecordingClient
+        - latency: LatencyModel or spec string
+        - seed: makes sampled latencies reproducible
+        """
+        self.cassette = Cassette(cassette_path)
+        self.latency = latency if isinstance(latency, LatencyModel) else LatencyModel(latency, seed)
+
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, prompt, model, max_tokens, temperature):
+        record = self.cassette.get(request_key(prompt, model, max_tokens, temperature))
+        if record is None:
+            self.misses += 1
+            raise CassetteMissError(
+                f"No recorded response for model={model} in {self.cassette.path}"
+            )
+        self.hits += 1
+        return record
+
+    def _response(self, record):
+        return LLMResponse(
+            record["text"],
+            record["model"],
+            Usage(record.get("input_tokens", 0), record.get("output_tokens", 0))
+        )
+
+    def complete(self, prompt, model, max_tokens=1000, temperature=None):
+        record = self._lookup(prompt, model, max_tokens, temperature)
+        time.sleep(self.latency.sample(record.get("seconds")))
+        return self._response(record)
+
+    def stream(self, prompt, model, max_tokens=1000, temperature=None):
+        record = self._lookup(prompt, model, max_tokens, temperature)
+        total = self.latency.sample(record.get("seconds"))
+        pieces = record.get("chunks") or [record["text"]]
+
+        # Keep the recorded first-token share of the total latency
+        share = 0.3
+        if record.get("ttft") is not None and record.get("seconds"):
+            share = min(record["ttft"] / record["seconds"], 1.0)
+
+        def chunks():
+            time.sleep(total * share)
+            gap = total * (1 - share) / max(len(pieces) - 1, 1)
+            for i, piece in enumerate(pieces):
+                if i:
+                    time.sleep(gap)
+                yield piece
+
+        return LLMStream(chunks(), record["model"], lambda: self._response(record).usage)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+# =================================================
+# FACTORY
+# =================================================
+
+def make_llm_client(provider, api_key=None, mode=None, cassette_path=None, latency=None, seed=None):
+    """
+    Build the client for provider ("anthropic" | "gemini") in the
+    configured mode (Config.LLM_MODE unless given).
+    """
+    mode = mode or Config.LLM_MODE
+    cassette_path = cassette_path or Config.LLM_CASSETTE_PATH
+
+    if mode not in MODES:
+        raise ValueError(f"Unknown LLM mode: {mode} (expected one of {MODES})")
+
+    if mode == "replay":
+        return ReplayClient(cassette_path, latency or Config.LLM_REPLAY_LATENCY, seed)
+
+    if provider == "anthropic":
+        live = AnthropicClient(api_key=api_key)
+    elif provider == "gemini":
+        live = GeminiClient(api_key=api_key)
+    else:
+        raise ValueError(f"Unknown LLM provider: {provider}")
+
+    return RecordingClient(live, cassette_path) if mode == "record" else live
+
+
+def as_llm_client(client):
+    """Accept an LLMClient, an anthropic.Anthropic or a Gemini GenerativeModel"""
+    if isinstance(client, LLMClient):
+        return client
+    if hasattr(client, "messages"):
+        return AnthropicClient(client=client)
+    if hasattr(client, "generate_content"):
+        return GeminiClient(model=client)
+    raise TypeError(f"Not an LLM client: {type(client).__name__}")
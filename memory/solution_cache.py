@@ -0,0 +1,112 @@
+"""
+Verified Solution Cache
+-----------------------
+Short-circuits the solve pipeline for problems that were already
+solved and approved by a human.
+
+Problems are keyed on a normalized form, so trivial rewordings
+(whitespace, question numbering, LaTeX vs plain notation) hit the
+same entry. Entries live in SolutionMemory.
+"""
+
+import hashlib
+import re
+
+# Numbering must be followed by whitespace: "2. Find" is numbered,
+# "2.5 + 3" is not
+NUMBERING_RE = re.compile(
+    r"^\s*(?:q(?:uestion)?\s*)?(?:\(?\d+[.):]|\(?[a-h][.)]|\([ivx]+\))(?=\s)\s*",
+    re.IGNORECASE
+)
+# Words are case-folded; single letters are symbols (A and a differ)
+WORD_RE = re.compile(r"[^\W\d_]{2,}")
+FRAC_RE = re.compile(r"\\[dt]?frac\s*\{([^{}]*)\}\s*\{([^{}]*)\}")
+SQRT_RE = re.compile(r"\\sqrt\s*\{([^{}]*)\}")
+BRACED_RE = re.compile(r"\{([^{}]*)\}")
+
+LATEX_REPLACEMENTS = (
+    (r"\left", ""), (r"\right", ""),
+    (r"\cdot", "*"), (r"\times", "*"), (r"\div", "/"),
+    (r"\,", " "), (r"\;", " "), (r"\!", ""), (r"\quad", " "),
+    (r"\(", ""), (r"\)", ""), (r"\[", ""), (r"\]", ""),
+    ("$", ""), ("**", "^"), ("×", "*"), ("÷", "/"),
+)
+
+
+def normalize_problem(text: str) -> str:
+    """
+    Fold a problem statement to a canonical form.
+    Example:
+        "1)  Find $\\frac{d}{dx} x^{2}$."  ->  "find(d)/(dx)x^2"
+    """
+    text = text or ""
+    text = NUMBERING_RE.sub("", text)
+
+    for old, new in LATEX_REPLACEMENTS:
+        text = text.replace(old, new)
+
+    # Innermost-first, so nested fractions unwrap too
+    previous = None
+    while previous != text:
+        previous = text
+        text = FRAC_RE.sub(r"(\1)/(\2)", text)
+        text = SQRT_RE.sub(r"sqrt(\1)", text)
+
+    text = re.sub(r"\\([a-zA-Z]+)", r"\1", text)   # \sin -> sin, \pi -> pi
+    text = BRACED_RE.sub(r"\1", text)               # x^{2} -> x^2
+
+    text = WORD_RE.sub(lambda m: m.group().lower(), text)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\s*([=+\-*/^(),<>])\s*", r"\1", text)
+    return text.strip().rstrip(".?!").strip()
+
+
+def problem_key(text: str) -> str:
+    return hashlib.sha256(normalize_problem(text).encode("utf-8")).hexdigest()
+
+
+class SolutionCache:
+    def __init__(self, memory):
+        """
+        Parameters:
+        - memory: SolutionMemory instance backing the cache
+        """
+        self.memory = memory
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, problem_text: str):
+        """
+        Return the latest verified entry for this problem, or None.
+        Entry keys: id, parsed_problem, solution, verification.
+        """
+        entry = self.memory.lookup_verified(problem_key(problem_text))
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def put(self, problem_text, parsed_problem, solution, verification, input_type="text"):
+        """Store a human-approved solution (one verified row per problem)"""
+        return self.memory.store_verified({
+            "problem_key": problem_key(problem_text),
+            "input_type": input_type,
+            "raw_input": problem_text,
+            "parsed_problem": parsed_problem,
+            "solution": solution,
+            "verification": verification,
+            "is_correct": True
+        })
+
+    def invalidate(self, problem_text):
+        """Drop cached solutions after a human marks them incorrect"""
+        return self.memory.invalidate(problem_key(problem_text))
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / max(lookups, 1)
+        }
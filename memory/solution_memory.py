@@ -1,84 +1,542 @@
 import sqlite3
 import json
+import atexit
+import os
+import queue
+import re
+import threading
+import time
+import weakref
+from contextlib import contextmanager
 from datetime import datetime
 
+import numpy as np
+
+# Applied to every pooled connection
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+)
+
+INSERT_SQL = """
+    INSERT INTO solutions
+    (timestamp, input_type, raw_input, parsed_problem,
+     solution, verification, user_feedback, is_correct, problem_key)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Problem text used for both the FTS5 table and the embeddings
+PROBLEM_TEXT_SQL = "coalesce(json_extract(parsed_problem, '$.problem_text'), raw_input, '')"
+
+# HNSW keeps lookups sub-millisecond at millions of rows
+HNSW_NEIGHBORS = 32
+HNSW_EF_SEARCH = 64
+
+# Connections shared by all threads; callers check one out per call
+POOL_SIZE = 4
+
+_STOP = object()
+
+# Open instances, closed at interpreter exit (weakly held, so an
+# instance that is dropped without close() can still be collected)
+_OPEN = weakref.WeakSet()
+
+
+@atexit.register
+def _close_all():
+    for memory in list(_OPEN):
+        memory.close()
+
+
 class SolutionMemory:
-    def __init__(self, db_path):
+    def __init__(self, db_path, embedding_model=None, batch_size=100, max_delay=0.5,
+                 pool_size=POOL_SIZE):
+        """
+        Parameters:
+        - db_path: sqlite database file
+        - embedding_model: optional EmbeddingModel for vector search
+          (without it retrieve_similar uses full-text search only)
+        - batch_size: max rows per write-behind commit
+        - max_delay: max seconds a queued row waits before commit
+        - pool_size: max open connections (":memory:" always uses one,
+          since every connection would get its own database)
+        """
         self.db_path = db_path
+        self.embedding_model = embedding_model
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+
+        # Vector index over correct solutions, keyed by solution id
+        self.index = None
+        self.index_path = None if db_path == ":memory:" else db_path + ".faiss"
+        self._indexed_upto = 0
+        self._index_lock = threading.Lock()
+
+        # Bounded pool: at most pool_size connections, whichever thread
+        # runs the call (Streamlit reruns each start on a new thread)
+        self.pool_size = 1 if db_path == ":memory:" else max(pool_size, 1)
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._pool_closed = False
+        self._pool_lock = threading.Lock()
+
+        self._queue = queue.Queue()
+        self._writer = None
+        self._closed = False
+
         self._init_db()
-    
+        if embedding_model is not None:
+            self._load_vector_index()
+        _OPEN.add(self)
+
+    @contextmanager
+    def _connection(self):
+        """Check a pooled connection out for the duration of a call"""
+        conn = self._checkout()
+        try:
+            yield conn
+        finally:
+            with self._pool_lock:
+                if self._pool_closed:
+                    conn.close()
+                    conn = None   # wakes a caller still waiting in _checkout
+            self._idle.put(conn)
+
+    def _checkout(self):
+        with self._pool_lock:
+            if self._pool_closed:
+                raise RuntimeError("SolutionMemory is closed")
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            if self._opened < self.pool_size:
+                self._opened += 1
+                # Connections move between threads, one user at a time
+                conn = sqlite3.connect(self.db_path, timeout=5.0, check_same_thread=False)
+                for pragma in PRAGMAS:
+                    conn.execute(pragma)
+                return conn
+
+        conn = self._idle.get()
+        if conn is None:
+            self._idle.put(None)
+            raise RuntimeError("SolutionMemory is closed")
+        return conn
+
     def _init_db(self):
         """Create tables"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS solutions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                input_type TEXT,
-                raw_input TEXT,
-                parsed_problem TEXT,
-                solution TEXT,
-                verification TEXT,
-                user_feedback TEXT,
-                is_correct BOOLEAN
+        with self._connection() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS solutions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT,
+                    input_type TEXT,
+                    raw_input TEXT,
+                    parsed_problem TEXT,
+                    solution TEXT,
+                    verification TEXT,
+                    user_feedback TEXT,
+                    is_correct BOOLEAN,
+                    problem_key TEXT
+                )
+            """)
+
+            # Databases created before the verified-solution cache
+            columns = [row[1] for row in cursor.execute("PRAGMA table_info(solutions)")]
+            if "problem_key" not in columns:
+                cursor.execute("ALTER TABLE solutions ADD COLUMN problem_key TEXT")
+
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_solutions_problem_key
+                ON solutions (problem_key, is_correct)
+            """)
+
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS solutions_fts
+                USING fts5(problem_text)
+            """)
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS solution_embeddings (
+                    id INTEGER PRIMARY KEY,
+                    vector BLOB
+                )
+            """)
+
+            # Backfill rows written before the FTS table existed
+            cursor.execute(f"""
+                INSERT INTO solutions_fts (rowid, problem_text)
+                SELECT id, {PROBLEM_TEXT_SQL} FROM solutions
+                WHERE id > (SELECT coalesce(max(rowid), 0) FROM solutions_fts)
+            """)
+
+            conn.commit()
+
+    def _load_vector_index(self):
+        """
+        Load the saved vector index, then add any rows stored after it
+        was saved. Nothing is re-embedded if vectors are already stored.
+        """
+        import faiss
+
+        if self.index_path and os.path.exists(self.index_path):
+            try:
+                self.index = faiss.read_index(self.index_path)
+                with open(self.index_path + ".json") as f:
+                    self._indexed_upto = json.load(f)["indexed_upto"]
+            except Exception as e:
+                print(f"⚠️ Could not load memory index: {e}")
+                self.index, self._indexed_upto = None, 0
+
+        with self._connection() as conn:
+            # Embed correct rows that have no stored vector yet
+            missing = conn.execute(f"""
+                SELECT s.id, {PROBLEM_TEXT_SQL} FROM solutions s
+                LEFT JOIN solution_embeddings e ON e.id = s.id
+                WHERE s.is_correct = 1 AND e.id IS NULL
+            """).fetchall()
+            if missing:
+                vectors = self._embed([text for _, text in missing])
+                with conn:
+                    conn.executemany(
+                        "INSERT INTO solution_embeddings (id, vector) VALUES (?, ?)",
+                        [(row_id, vector.tobytes()) for (row_id, _), vector in zip(missing, vectors)]
+                    )
+
+            cursor = conn.execute(
+                "SELECT id, vector FROM solution_embeddings WHERE id > ? ORDER BY id",
+                (self._indexed_upto,)
             )
-        """)
-        
-        conn.commit()
-        conn.close()
-    
-    def store(self, data):
-        """Store solution attempt"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO solutions 
-            (timestamp, input_type, raw_input, parsed_problem, 
-             solution, verification, user_feedback, is_correct)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            datetime.now().isoformat(),
+            while True:
+                rows = cursor.fetchmany(10000)
+                if not rows:
+                    break
+                ids = np.array([row_id for row_id, _ in rows], dtype=np.int64)
+                vectors = np.vstack([np.frombuffer(blob, dtype=np.float32) for _, blob in rows])
+                self._add_vectors(ids, vectors)
+
+    def _new_index(self, dim):
+        import faiss
+        hnsw = faiss.IndexHNSWFlat(dim, HNSW_NEIGHBORS, faiss.METRIC_INNER_PRODUCT)
+        hnsw.hnsw.efSearch = HNSW_EF_SEARCH
+        return faiss.IndexIDMap(hnsw)
+
+    def _add_vectors(self, ids, vectors):
+        """Append vectors to the live index (no rebuild)"""
+        with self._index_lock:
+            if self.index is None:
+                self.index = self._new_index(vectors.shape[1])
+            self.index.add_with_ids(np.ascontiguousarray(vectors, dtype=np.float32), ids)
+            self._indexed_upto = max(self._indexed_upto, int(ids.max()))
+
+    def _save_vector_index(self):
+        if self.index is None or not self.index_path:
+            return
+        import faiss
+        with self._index_lock:
+            faiss.write_index(self.index, self.index_path)
+            with open(self.index_path + ".json", "w") as f:
+                json.dump({"indexed_upto": self._indexed_upto}, f)
+
+    def _embed(self, texts):
+        return np.asarray(
+            self.embedding_model.embed_documents(texts),
+            dtype=np.float32
+        )
+
+    @staticmethod
+    def _problem_text(data):
+        parsed = data.get("parsed_problem") or {}
+        text = parsed.get("problem_text") if isinstance(parsed, dict) else None
+        return text or data.get("raw_input") or ""
+
+    def _row_values(self, data):
+        return (
+            data.get("timestamp") or datetime.now().isoformat(),
             data.get("input_type"),
             data.get("raw_input"),
             json.dumps(data.get("parsed_problem")),
             json.dumps(data.get("solution")),
             json.dumps(data.get("verification")),
             data.get("user_feedback"),
-            data.get("is_correct")
-        ))
-        
-        conn.commit()
-        solution_id = cursor.lastrowid
-        conn.close()
-        
-        return solution_id
-    
+            data.get("is_correct"),
+            data.get("problem_key")
+        )
+
+    def store(self, data):
+        """Store solution attempt"""
+        return self.store_many([data])[0]
+
+    def store_many(self, records):
+        """
+        Store several solution attempts in one transaction.
+        Returns the new row ids in input order.
+        """
+
+        # Embed outside the transaction so the write lock is held briefly
+        to_index = [i for i, data in enumerate(records) if data.get("is_correct")]
+        vectors = None
+        if self.embedding_model is not None and to_index:
+            vectors = self._embed([self._problem_text(records[i]) for i in to_index])
+
+        with self._connection() as conn, conn:
+            ids = self._insert(conn.cursor(), records, to_index, vectors)
+
+        if vectors is not None:
+            self._add_vectors(np.array([ids[i] for i in to_index], dtype=np.int64), vectors)
+
+        return ids
+
+    def _insert(self, cursor, records, to_index, vectors):
+        """Insert rows, their FTS entries and vectors; returns the new ids"""
+        ids = []
+        for data in records:
+            cursor.execute(INSERT_SQL, self._row_values(data))
+            ids.append(cursor.lastrowid)
+
+        cursor.executemany(
+            "INSERT INTO solutions_fts (rowid, problem_text) VALUES (?, ?)",
+            [(row_id, self._problem_text(data)) for row_id, data in zip(ids, records)]
+        )
+
+        if vectors is not None:
+            cursor.executemany(
+                "INSERT INTO solution_embeddings (id, vector) VALUES (?, ?)",
+                [(ids[i], vector.tobytes()) for i, vector in zip(to_index, vectors)]
+            )
+        return ids
+
+    def store_verified(self, data):
+        """
+        Store a correct solution as the one verified row for its problem_key.
+        Confirming the same solution again writes nothing and returns the
+        existing id; a different solution replaces the previous one.
+        """
+        data = dict(data, is_correct=True)
+        vectors = None
+        if self.embedding_model is not None:
+            # Already in the embedding cache when the problem was stored before
+            vectors = self._embed([self._problem_text(data)])
+
+        with self._connection() as conn, conn:
+            # Take the write lock before the check, so two clicks can't both insert
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("""
+                SELECT id FROM solutions
+                WHERE problem_key = ? AND is_correct = 1 AND solution = ?
+                ORDER BY id DESC
+                LIMIT 1
+            """, (data["problem_key"], json.dumps(data.get("solution")))).fetchone()
+            if row is not None:
+                return row[0]
+
+            conn.execute(
+                "UPDATE solutions SET is_correct = 0 WHERE problem_key = ? AND is_correct = 1",
+                (data["problem_key"],)
+            )
+            row_id = self._insert(conn.cursor(), [data], [0], vectors)[0]
+
+        if vectors is not None:
+            self._add_vectors(np.array([row_id], dtype=np.int64), vectors)
+        return row_id
+
+    def store_async(self, data):
+        """
+        Queue a solution attempt for the background writer.
+        Rows are committed in batches within max_delay seconds.
+        """
+        if self._closed:
+            raise RuntimeError("SolutionMemory is closed")
+
+        # Stamp now so queued rows keep their submission time
+        data = dict(data, timestamp=data.get("timestamp") or datetime.now().isoformat())
+        self._ensure_writer()
+        self._queue.put(data)
+
+    def _ensure_writer(self):
+        with self._pool_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(
+                    target=self._write_loop,
+                    name="solution-memory-writer",
+                    daemon=True
+                )
+                self._writer.start()
+
+    def _write_loop(self):
+        """Drain the queue, committing up to batch_size rows at a time"""
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self.max_delay
+
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            try:
+                self.store_many(batch)
+            except Exception as e:
+                print(f"❌ Error writing {len(batch)} solutions: {e}")
+            finally:
+                for _ in range(len(batch) + stop):
+                    self._queue.task_done()
+
+            if stop:
+                return
+
+    def labeled_problems(self, limit=5000):
+        """(topic, problem_text) pairs from correct solutions, newest first"""
+        with self._connection() as conn:
+            return conn.execute(f"""
+                SELECT json_extract(parsed_problem, '$.topic'), {PROBLEM_TEXT_SQL}
+                FROM solutions
+                WHERE is_correct = 1
+                ORDER BY id DESC
+                LIMIT ?
+            """, (limit,)).fetchall()
+
+    def lookup_verified(self, problem_key):
+        """Latest correct solution stored under a normalized problem key"""
+        with self._connection() as conn:
+            row = conn.execute("""
+                SELECT id, timestamp, parsed_problem, solution, verification
+                FROM solutions
+                WHERE problem_key = ? AND is_correct = 1
+                ORDER BY id DESC
+                LIMIT 1
+            """, (problem_key,)).fetchone()
+
+        if row is None:
+            return None
+        return dict(self._row_to_dict(row), verification=json.loads(row[4]))
+
+    def invalidate(self, problem_key):
+        """
+        Mark every correct solution under this key as incorrect.
+        Returns the number of rows changed.
+        """
+        with self._connection() as conn, conn:
+            cursor = conn.execute(
+                "UPDATE solutions SET is_correct = 0 WHERE problem_key = ? AND is_correct = 1",
+                (problem_key,)
+            )
+        return cursor.rowcount
+
+    def flush(self):
+        """Block until every queued row is committed"""
+        self._queue.join()
+
+    def close(self):
+        """Flush pending writes and close all pooled connections"""
+        if self._closed:
+            return
+        self._closed = True
+
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+
+        self._save_vector_index()
+
+        # Idle connections close now, checked-out ones when returned
+        with self._pool_lock:
+            self._pool_closed = True
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                if conn is not None:
+                    conn.close()
+            self._idle.put(None)
+        _OPEN.discard(self)
+
     def retrieve_similar(self, problem_text, limit=3):
-        """Find similar solved problems"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Simple keyword matching (can be improved with embeddings)
-        cursor.execute("""
-            SELECT * FROM solutions
-            WHERE is_correct = 1
-            ORDER BY timestamp DESC
-            LIMIT ?
-        """, (limit,))
-        
-        results = cursor.fetchall()
-        conn.close()
-        
-        return [self._row_to_dict(row) for row in results]
-    
+        """
+        Find similar solved problems.
+
+        Uses the vector index when an embedding model is configured,
+        topped up with FTS5 keyword matches. Only correct solutions
+        are returned, best match first.
+        """
+        scores = {}
+
+        if self.index is not None and self.index.ntotal > 0:
+            query = self._embed([problem_text])
+            with self._index_lock:
+                # Over-fetch: rows may have been invalidated since indexing
+                sims, ids = self.index.search(query, limit * 4)
+            for row_id, sim in zip(ids[0].tolist(), sims[0].tolist()):
+                if row_id != -1:
+                    scores[row_id] = sim
+
+        if len(scores) < limit:
+            for row_id, rank in self._fts_search(problem_text, limit * 4):
+                # bm25 ranks are negative; keep them below any vector hit
+                scores.setdefault(row_id, -1.0 - 1.0 / (1.0 - rank))
+
+        return self._fetch_correct(scores, limit)
+
+    def _fts_search(self, problem_text, limit):
+        words = re.findall(r"\w+", problem_text.lower())
+        if not words:
+            return []
+
+        query = " OR ".join(f'"{w}"' for w in dict.fromkeys(words))
+        # Filter to correct rows before LIMIT, so incorrect matches
+        # can't crowd out the verified ones
+        with self._connection() as conn:
+            return conn.execute("""
+                SELECT f.rowid, bm25(solutions_fts) FROM solutions_fts f
+                JOIN solutions s ON s.id = f.rowid
+                WHERE solutions_fts MATCH ? AND s.is_correct = 1
+                ORDER BY bm25(solutions_fts)
+                LIMIT ?
+            """, (query, limit)).fetchall()
+
+    def _fetch_correct(self, scores, limit):
+        if not scores:
+            return []
+
+        ids = list(scores)
+        with self._connection() as conn:
+            rows = conn.execute(f"""
+                SELECT id, timestamp, parsed_problem, solution FROM solutions
+                WHERE is_correct = 1 AND id IN ({','.join('?' * len(ids))})
+            """, ids).fetchall()
+
+        rows.sort(key=lambda row: scores[row[0]], reverse=True)
+        return [
+            dict(self._row_to_dict(row), score=scores[row[0]])
+            for row in rows[:limit]
+        ]
+
     def _row_to_dict(self, row):
-        """Convert DB row to dict"""
+        """Convert (id, timestamp, parsed_problem, solution) row to dict"""
         return {
             "id": row[0],
             "timestamp": row[1],
-            "parsed_problem": json.loads(row[3]),
-            "solution": json.loads(row[4])
-        }
\ No newline at end of file
+            "parsed_problem": json.loads(row[2]),
+            "solution": json.loads(row[3])
+        }
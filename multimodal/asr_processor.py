@@ -1,33 +1,157 @@
-import google.generativeai as genai
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import threading
+import time
+
+from config.settings import Config
+from llm.client import as_llm_client
+from multimodal.audio_preprocess import decode_audio, encode_chunk, split_on_silence
+from tracing.tracer import get_tracer
+
+PROMPT = """
+Transcribe this audio accurately.
+Preserve mathematical expressions.
+Do not summarize.
+"""
+
+PART_PROMPT = """
+This is part {part} of {parts} of one recording; transcribe only this part.
+"""
+
 
 class GeminiASR:
-    def __init__(self, model):
-        self.model = model
+    def __init__(self, model, model_name=None, workers=Config.ASR_WORKERS,
+                 max_chunk_seconds=Config.ASR_MAX_CHUNK_SECONDS, cache_size=Config.ASR_CACHE_SIZE):
+        """
+        model: Gemini GenerativeModel or an LLMClient (then pass model_name)
+        workers: chunks transcribed at the same time
+        max_chunk_seconds: long recordings are split at silences below this
+        cache_size: transcripts kept, keyed by audio content hash
+        """
+        self.client = as_llm_client(model)
+        self.model_name = model_name or getattr(model, "model_name", Config.GEMINI_MODEL)
+        self.workers = workers
+        self.max_chunk_seconds = max_chunk_seconds
+        self.cache_size = cache_size
+
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "calls": 0,
+            "cache_hits": 0,
+            "chunks": 0,
+            "original_bytes": 0,
+            "uploaded_bytes": 0,
+            "model_seconds": 0.0
+        }
 
     def transcribe_audio(self, uploaded_file):
         """
         Uses Gemini to transcribe audio.
         """
-        audio_bytes = uploaded_file.read()
+        audio_bytes = (
+            uploaded_file.getvalue() if hasattr(uploaded_file, "getvalue")
+            else uploaded_file.read()
+        )
+        self.stats["calls"] += 1
+        self.stats["original_bytes"] += len(audio_bytes)
 
-        prompt = """
-        Transcribe this audio accurately.
-        Preserve mathematical expressions.
-        Do not summarize.
-        """
+        keys = [hashlib.sha256(audio_bytes).hexdigest()]
+        cached = self._cache_get(keys[0])
 
-        response = self.model.generate_content(
-            [
-                prompt,
-                {
-                    "mime_type": uploaded_file.type,
-                    "data": audio_bytes
-                }
-            ]
-        )
+        samples = None
+        if cached is None:
+            samples = decode_audio(audio_bytes)
+            if samples is not None:
+                # Same audio re-encoded (e.g. wav vs m4a export) hits too
+                keys.append("pcm:" + hashlib.sha256(samples.tobytes()).hexdigest())
+                cached = self._cache_get(keys[1])
 
-        return {
-            "text": response.text.strip(),
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            self._cache_put(keys, cached)
+            return {**cached, "cached": True, "chunks": 0, "uploaded_bytes": 0,
+                    "original_bytes": len(audio_bytes), "seconds": 0.0}
+
+        if samples is not None:
+            ranges = split_on_silence(samples, Config.ASR_SAMPLE_RATE, self.max_chunk_seconds)
+            parts = [encode_chunk(samples[start:end]) for start, end in ranges]
+        else:
+            # Undecodable here (e.g. m4a without ffmpeg): send the upload as is
+            parts = [(audio_bytes, getattr(uploaded_file, "type", None) or "audio/mpeg")]
+
+        if not parts:
+            # Empty or all-silent recording: nothing to send to the model
+            return {"text": "", "confidence": 0.0, "needs_review": True, "cached": False,
+                    "chunks": 0, "uploaded_bytes": 0, "original_bytes": len(audio_bytes),
+                    "seconds": 0.0}
+
+        start = time.perf_counter()
+        uploaded = sum(len(data) for data, _ in parts)
+        with get_tracer().span("asr", model=self.model_name, chunks=len(parts),
+                               uploaded_bytes=uploaded) as span:
+            responses = self._transcribe_parts(parts)
+            for response in responses:
+                span.record_usage(response, prompt=PROMPT, text=response.text)
+        seconds = time.perf_counter() - start
+
+        self.stats["chunks"] += len(parts)
+        self.stats["uploaded_bytes"] += uploaded
+        self.stats["model_seconds"] += seconds
+
+        result = {
+            "text": " ".join(r.text.strip() for r in responses if r.text.strip()),
             "confidence": 0.85,
             "needs_review": True
         }
+        self._cache_put(keys, result)
+
+        return {**result, "cached": False, "chunks": len(parts), "uploaded_bytes": uploaded,
+                "original_bytes": len(audio_bytes), "seconds": seconds}
+
+    def _transcribe_parts(self, parts):
+        """Transcribe chunks concurrently; responses come back in order"""
+        def transcribe(index):
+            data, mime_type = parts[index]
+            prompt = PROMPT
+            if len(parts) > 1:
+                prompt += PART_PROMPT.format(part=index + 1, parts=len(parts))
+            return self.client.complete(
+                [prompt, {"mime_type": mime_type, "data": data}],
+                self.model_name,
+                max_tokens=None
+            )
+
+        if not parts:
+            return []
+        if len(parts) == 1:
+            return [transcribe(0)]
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(parts))) as pool:
+            return list(pool.map(transcribe, range(len(parts))))
+
+    def _cache_get(self, key):
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        return None
+
+    def _cache_put(self, keys, value):
+        with self._lock:
+            for key in keys:
+                self._cache[key] = value
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def metrics(self):
+        calls = max(self.stats["calls"], 1)
+        misses = max(self.stats["calls"] - self.stats["cache_hits"], 1)
+        return {
+            **self.stats,
+            "cache_hit_rate": self.stats["cache_hits"] / calls,
+            "avg_model_seconds": self.stats["model_seconds"] / misses,
+            "bytes_saved": self.stats["original_bytes"] - self.stats["uploaded_bytes"]
+        }
@@ -0,0 +1,158 @@
+"""
+Audio Preprocessing
+-------------------
+Turns an uploaded recording into small mono chunks for transcription:
+
+1. decode to mono float samples at a low sample rate (16 kHz)
+   - WAV is decoded natively
+   - other formats (mp3, m4a, ...) need the ffmpeg binary
+2. split long recordings at silences (max chunk length)
+3. encode each chunk compactly (Opus via ffmpeg, else 16-bit WAV)
+
+If the upload can't be decoded, callers fall back to sending it as is.
+"""
+
+import io
+import shutil
+import subprocess
+import wave
+
+import numpy as np
+
+from config.settings import Config
+
+FFMPEG = shutil.which("ffmpeg")
+
+FRAME_MS = 30
+SILENCE_DB = -35.0          # frame loudness relative to the loudest frame
+MIN_SILENCE_SECONDS = 0.3
+MIN_CHUNK_SECONDS = 5.0
+
+
+def _ffmpeg(args, data):
+    result = subprocess.run(
+        [FFMPEG, "-hide_banner", "-loglevel", "error", *args],
+        input=data, capture_output=True, check=True
+    )
+    return result.stdout
+
+
+def _decode_wav(data):
+    with wave.open(io.BytesIO(data)) as wav:
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        rate = wav.getframerate()
+        frames = wav.readframes(wav.getnframes())
+
+    if width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width in (2, 4):
+        dtype = np.int16 if width == 2 else np.int32
+        samples = np.frombuffer(frames, dtype=dtype).astype(np.float32) / np.iinfo(dtype).max
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {width}")
+
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+
+def _resample(samples, rate, target_rate):
+    if rate == target_rate or not len(samples):
+        return samples
+    if rate > target_rate:
+        # Box filter against aliasing before decimating
+        width = int(np.ceil(rate / target_rate))
+        samples = np.convolve(samples, np.ones(width, dtype=np.float32) / width, mode="same")
+    duration = len(samples) / rate
+    positions = np.arange(int(duration * target_rate)) * (rate / target_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def decode_audio(data, sample_rate=Config.ASR_SAMPLE_RATE):
+    """Mono float32 samples at sample_rate, or None if undecodable"""
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        try:
+            samples, rate = _decode_wav(data)
+            return _resample(samples, rate, sample_rate)
+        except (wave.Error, ValueError, EOFError):
+            pass
+
+    if FFMPEG:
+        try:
+            pcm = _ffmpeg(
+                ["-i", "pipe:0", "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "pipe:1"],
+                data
+            )
+            return np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32767
+        except (subprocess.CalledProcessError, OSError):
+            return None
+    return None
+
+
+def split_on_silence(samples, sample_rate=Config.ASR_SAMPLE_RATE,
+                     max_chunk_seconds=Config.ASR_MAX_CHUNK_SECONDS):
+    """
+    (start, end) sample ranges no longer than max_chunk_seconds,
+    cut in the middle of silent stretches where possible.
+    Chunks that are entirely silent are dropped.
+    """
+    frame = int(sample_rate * FRAME_MS / 1000)
+    n_frames = len(samples) // frame
+    if n_frames == 0:
+        return [(0, len(samples))] if len(samples) else []
+
+    rms = np.sqrt(np.mean(samples[:n_frames * frame].reshape(n_frames, frame) ** 2, axis=1))
+    db = 20 * np.log10(np.maximum(rms, 1e-10) / max(rms.max(), 1e-10))
+    silent = db < SILENCE_DB
+
+    # Cut points: middle of each silent run long enough to be a pause
+    min_run = int(MIN_SILENCE_SECONDS * 1000 / FRAME_MS)
+    cuts, run_start = [], None
+    for i, is_silent in enumerate(np.append(silent, False)):
+        if is_silent and run_start is None:
+            run_start = i
+        elif not is_silent and run_start is not None:
+            if i - run_start >= min_run:
+                cuts.append((run_start + i) // 2 * frame)
+            run_start = None
+
+    max_len = int(max_chunk_seconds * sample_rate)
+    min_len = int(min(MIN_CHUNK_SECONDS, max_chunk_seconds / 2) * sample_rate)
+    ranges, start = [], 0
+    while len(samples) - start > max_len:
+        candidates = [c for c in cuts if start + min_len <= c <= start + max_len]
+        end = candidates[-1] if candidates else start + max_len
+        ranges.append((start, end))
+        start = end
+    ranges.append((start, len(samples)))
+
+    def has_speech(r):
+        first, last = r[0] // frame, max(r[1] // frame, r[0] // frame + 1)
+        return not silent[first:last].all()
+
+    return [r for r in ranges if has_speech(r)]
+
+
+def encode_chunk(samples, sample_rate=Config.ASR_SAMPLE_RATE):
+    """Returns (bytes, mime_type)"""
+    pcm = (np.clip(samples, -1, 1) * 32767).astype(np.int16).tobytes()
+
+    if FFMPEG:
+        try:
+            data = _ffmpeg(
+                ["-f", "s16le", "-ar", str(sample_rate), "-ac", "1", "-i", "pipe:0",
+                 "-c:a", "libopus", "-b:a", Config.ASR_OPUS_BITRATE, "-f", "ogg", "pipe:1"],
+                pcm
+            )
+            return data, "audio/ogg"
+        except (subprocess.CalledProcessError, OSError):
+            pass
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return buffer.getvalue(), "audio/wav"
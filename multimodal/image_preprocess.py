@@ -0,0 +1,92 @@
+"""
+Image Preprocessing
+-------------------
+Shrinks phone photos of worksheets before they are sent for OCR:
+
+1. EXIF orientation fix
+2. grayscale
+3. auto-crop of blank margins
+4. downscale to a target long edge
+5. re-encode (JPEG by default)
+
+Also computes a digest of the decoded pixels so the same worksheet is
+recognized after a re-upload, even if the file bytes differ (metadata,
+container), while any change to the pixels is a different image.
+"""
+
+import hashlib
+import io
+
+from PIL import Image, ImageOps, ImageStat
+
+from config.settings import Config
+
+MIME_TYPES = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+
+# Pixels darker than this fraction of the mean brightness count as ink
+INK_RATIO = 0.75
+CROP_PADDING = 16
+
+
+def _crop_margins(image):
+    """Crop to the bounding box of the ink, keeping a small padding"""
+    mean = ImageStat.Stat(image).mean[0]
+    threshold = mean * INK_RATIO
+    mask = image.point(lambda p: 255 if p < threshold else 0)
+    bbox = mask.getbbox()
+    if not bbox:
+        return image
+
+    left, top, right, bottom = bbox
+    width, height = image.size
+    box = (
+        max(left - CROP_PADDING, 0),
+        max(top - CROP_PADDING, 0),
+        min(right + CROP_PADDING, width),
+        min(bottom + CROP_PADDING, height)
+    )
+    # Ignore crops that would keep almost everything anyway
+    if (box[2] - box[0]) * (box[3] - box[1]) > 0.95 * width * height:
+        return image
+    return image.crop(box)
+
+
+def preprocess_image(image_bytes, max_edge=Config.OCR_MAX_EDGE, grayscale=True,
+                     crop=True, fmt="JPEG", quality=Config.OCR_JPEG_QUALITY):
+    """
+    Returns (image, encoded_bytes, mime_type, stats).
+    stats: original / processed size in bytes and pixels.
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+    original_size = image.size
+
+    image = ImageOps.exif_transpose(image)
+    image = image.convert("L" if grayscale else "RGB")
+
+    if crop:
+        image = _crop_margins(image)
+
+    if max(image.size) > max_edge:
+        image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+    buffer = io.BytesIO()
+    if fmt == "JPEG":
+        image.save(buffer, fmt, quality=quality, optimize=True)
+    else:
+        image.save(buffer, fmt, optimize=True)
+    encoded = buffer.getvalue()
+
+    stats = {
+        "original_bytes": len(image_bytes),
+        "processed_bytes": len(encoded),
+        "original_size": original_size,
+        "processed_size": image.size
+    }
+    return image, encoded, MIME_TYPES[fmt], stats
+
+
+def pixel_digest(image):
+    """sha256 over the mode, size and raw pixels of a decoded image"""
+    digest = hashlib.sha256(f"{image.mode}:{image.size}".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
@@ -1,17 +1,100 @@
-import google.generativeai as genai
-from PIL import Image
-import io
+from collections import OrderedDict
+import hashlib
+import threading
+import time
+
+from config.settings import Config
+from llm.client import as_llm_client
+from multimodal.image_preprocess import pixel_digest, preprocess_image
+from tracing.tracer import get_tracer
+
+
+class OCRCache:
+    """
+    LRU of OCR results keyed by an exact pixel digest.
+    Only an image with identical pixels is a hit: worksheets that differ
+    by a single digit look alike to a perceptual hash but not here.
+    """
+
+    def __init__(self, max_items=Config.OCR_CACHE_SIZE):
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
 
 class GeminiOCR:
-    def __init__(self, model):
-        self.model = model
+    def __init__(self, model, model_name=None, preprocess=True, cache=None):
+        """
+        model: Gemini GenerativeModel or an LLMClient (then pass model_name)
+        preprocess: shrink the photo before upload (see image_preprocess)
+        cache: OCRCache; re-uploads of the same image skip the model
+        """
+        self.client = as_llm_client(model)
+        self.model_name = model_name or getattr(model, "model_name", Config.GEMINI_MODEL)
+        self.preprocess = preprocess
+        self.cache = cache if cache is not None else OCRCache()
+
+        # Exact byte digest -> pixel digest, so identical re-uploads
+        # skip decoding and preprocessing too
+        self._digests = OrderedDict()
+        # Guards _digests and stats: one GeminiOCR serves every session
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "calls": 0,
+            "cache_hits": 0,
+            "original_bytes": 0,
+            "uploaded_bytes": 0,
+            "model_seconds": 0.0
+        }
 
     def extract_text(self, uploaded_file):
         """
         Uses Gemini Vision to extract text from image.
         """
-        image_bytes = uploaded_file.read()
-        image = Image.open(io.BytesIO(image_bytes))
+        image_bytes = (
+            uploaded_file.getvalue() if hasattr(uploaded_file, "getvalue")
+            else uploaded_file.read()
+        )
+
+        self._count(calls=1, original_bytes=len(image_bytes))
+
+        digest = hashlib.sha256(image_bytes).hexdigest()
+        with self._lock:
+            key = self._digests.get(digest)
+        cached = self.cache.get(key) if key is not None else None
+
+        if cached is None and self.preprocess:
+            image, data, mime_type, _ = preprocess_image(image_bytes)
+            key = pixel_digest(image)
+            cached = self.cache.get(key)
+        elif cached is None:
+            data, mime_type = image_bytes, getattr(uploaded_file, "type", None) or "image/jpeg"
+            key = digest
+
+        if cached is not None:
+            self._count(cache_hits=1)
+            self._remember(digest, key)
+            return {**cached, "cached": True, "uploaded_bytes": 0,
+                    "original_bytes": len(image_bytes), "seconds": 0.0}
 
         prompt = """
         Extract the complete math problem text from this image.
@@ -20,12 +103,49 @@ class GeminiOCR:
         Return only the extracted text.
         """
 
-        response = self.model.generate_content(
-            [prompt, image]
-        )
+        start = time.perf_counter()
+        with get_tracer().span("ocr", model=self.model_name, uploaded_bytes=len(data)) as span:
+            response = self.client.complete(
+                [prompt, {"mime_type": mime_type, "data": data}],
+                self.model_name,
+                max_tokens=None
+            )
+            span.record_usage(response, prompt=prompt, text=response.text)
+        seconds = time.perf_counter() - start
 
-        return {
+        self._count(uploaded_bytes=len(data), model_seconds=seconds)
+
+        result = {
             "text": response.text.strip(),
             "confidence": 0.9,   # Gemini vision is highly reliable
             "needs_review": True  # Always allow HITL editing
         }
+        self.cache.put(key, result)
+        self._remember(digest, key)
+
+        return {**result, "cached": False, "uploaded_bytes": len(data),
+                "original_bytes": len(image_bytes), "seconds": seconds}
+
+    def _remember(self, digest, key):
+        with self._lock:
+            self._digests[digest] = key
+            self._digests.move_to_end(digest)
+            while len(self._digests) > self.cache.max_items:
+                self._digests.popitem(last=False)
+
+    def _count(self, **amounts):
+        with self._lock:
+            for name, amount in amounts.items():
+                self.stats[name] += amount
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self.stats)
+        calls = max(stats["calls"], 1)
+        misses = max(stats["calls"] - stats["cache_hits"], 1)
+        return {
+            **stats,
+            "cache_hit_rate": stats["cache_hits"] / calls,
+            "avg_model_seconds": stats["model_seconds"] / misses,
+            "bytes_saved": stats["original_bytes"] - stats["uploaded_bytes"]
+        }
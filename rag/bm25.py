@@ -0,0 +1,178 @@
+"""
+BM25 Module
+-----------
+In-process sparse (inverted) index for exact math tokens that dense
+embeddings blur together: "nCr", "dy/dx", "x^2", "P(A|B)", formula
+names, LaTeX commands.
+
+The tokenizer keeps compound math tokens whole *and* emits their
+parts, so "dy/dx" matches both "dy/dx" and "dx". A few notations get
+an alias token ("nCr" -> "binomial") so notation and name match.
+"""
+
+from collections import Counter
+import heapq
+import math
+import re
+import threading
+
+# Order matters: longest / most specific patterns first
+TOKEN_PATTERN = re.compile(
+    r"""
+    \\[a-zA-Z]+                             # LaTeX command: \frac, \sqrt
+    | [a-zA-Z]\([a-zA-Z0-9]+\|[a-zA-Z0-9]+\)  # conditional probability: P(A|B)
+    | d\^?\d*[a-zA-Z]?/d[a-zA-Z]\^?\d*       # derivatives: dy/dx, d/dx, d^2y/dx^2
+    | [a-zA-Z0-9]+(?:\^[a-zA-Z0-9]+)+       # powers: x^2, e^x
+    | [0-9]*[a-zA-Z]+[0-9]*                 # words, nCr, x2, 2x
+    | \d+(?:\.\d+)?                         # numbers
+    | [∫∑∏√π∞≤≥≠]                           # math symbols
+    """,
+    re.VERBOSE
+)
+
+ALIASES = {
+    "ncr": "binomial",
+    "npr": "permutation",
+    "d/dx": "derivative",
+    "dy/dx": "derivative",
+    "\\frac": "fraction",
+    "\\sqrt": "sqrt",
+    "√": "sqrt",
+    "\\int": "integral",
+    "∫": "integral",
+    "\\sum": "sum",
+    "∑": "sum",
+    "\\lim": "limit",
+    "lim": "limit",
+    "π": "pi",
+    "\\pi": "pi",
+    "∞": "infinity",
+    "\\infty": "infinity",
+}
+
+# Notation families that also get a name token
+PATTERN_ALIASES = (
+    (re.compile(r"\d+c\d+"), "binomial"),                      # 5C2
+    (re.compile(r"d\^?\d*[a-z]?/d[a-z]\^?\d*"), "derivative"),   # d^2y/dx^2
+)
+
+STOPWORDS = frozenset(
+    "a an and are as at be by find for from given if in is it of on or the "
+    "then this to what when where which with".split()
+)
+
+
+def tokenize_math(text):
+    """Lowercased tokens; compound math tokens also yield their parts"""
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text or ""):
+        token = match.group().lower()
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+        if token in ALIASES:
+            tokens.append(ALIASES[token])
+        else:
+            tokens.extend(name for pattern, name in PATTERN_ALIASES if pattern.fullmatch(token))
+        if not token.isalnum() and not token.startswith("\\"):
+            tokens.extend(part for part in re.split(r"[^a-z0-9]+", token) if part and part != token)
+    return tokens
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an inverted index (token -> {doc_id: term freq}).
+    Documents can be added and removed by id.
+    """
+
+    def __init__(self, k1=1.5, b=0.75, tokenizer=tokenize_math):
+        self.k1 = k1
+        self.b = b
+        self.tokenizer = tokenizer
+
+        self._postings = {}
+        self._doc_tokens = {}
+        self._lengths = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._lengths)
+
+    def add(self, doc_id, text):
+        self.add_many([(doc_id, text)])
+
+    def add_many(self, items):
+        """items: iterable of (doc_id, text); existing ids are replaced"""
+        tokenized = [(doc_id, Counter(self.tokenizer(text))) for doc_id, text in items]
+        with self._lock:
+            for doc_id, counts in tokenized:
+                self._remove(doc_id)
+                for token, tf in counts.items():
+                    self._postings.setdefault(token, {})[doc_id] = tf
+                self._doc_tokens[doc_id] = list(counts)
+                length = sum(counts.values())
+                self._lengths[doc_id] = length
+                self._total_length += length
+
+    def remove(self, doc_ids):
+        with self._lock:
+            for doc_id in doc_ids:
+                self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        length = self._lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for token in self._doc_tokens.pop(doc_id):
+            postings = self._postings[token]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[token]
+
+    def search(self, query, top_k=10):
+        """[(doc_id, score)], best first"""
+        query_tokens = set(self.tokenizer(query))
+        with self._lock:
+            scores = _score([self], query_tokens)
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+
+def search_many(indexes, query, top_k=10, exclude=frozenset()):
+    """
+    search() over several indexes as if they were one: document count,
+    average length and document frequencies are summed across them.
+    Ids in `exclude` are not returned (they still count in the
+    statistics). Only for indexes that are no longer modified.
+    """
+    indexes = [index for index in indexes if index is not None and len(index)]
+    if not indexes:
+        return []
+    scores = _score(indexes, set(indexes[0].tokenizer(query)), exclude)
+    return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+
+def _score(indexes, query_tokens, exclude=frozenset()):
+    """{doc_id: BM25 score} over the given indexes (k1 / b of the first)"""
+    n = sum(len(index._lengths) for index in indexes)
+    if not n or not query_tokens:
+        return {}
+    k1, b = indexes[0].k1, indexes[0].b
+    avg_length = sum(index._total_length for index in indexes) / n
+
+    scores = {}
+    for token in query_tokens:
+        postings = [(index, index._postings.get(token)) for index in indexes]
+        postings = [(index, p) for index, p in postings if p]
+        df = sum(len(p) for _, p in postings)
+        if not df:
+            continue
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        for index, p in postings:
+            for doc_id, tf in p.items():
+                if doc_id in exclude:
+                    continue
+                norm = k1 * (1 - b + b * index._lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+    return scores
@@ -0,0 +1,162 @@
+"""
+Chunker Module
+--------------
+Structure-aware, streaming chunker for markdown / txt KB files.
+
+- splits on headings; each chunk carries its section path as metadata
+- blocks are runs of non-blank lines, so a formula with its
+  "- n: number of trials" list stays together
+- $$...$$ and \\[...\\] display math is never split, even if longer
+  than the chunk size
+- an overlong paragraph is cut at sentence / line ends, never inside
+  inline $...$ math
+- no overlap: consecutive chunks don't repeat text
+
+Files are read line by line and chunks are yielded as they fill up,
+so a large corpus never has to be in memory at once.
+"""
+
+import bisect
+import codecs
+import re
+
+from config.settings import Config
+
+HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+SENTENCE_END = re.compile(r"(?<=[.!?;])\s+|\n")
+INLINE_MATH_DELIMITER = re.compile(r"(?<!\\)\$")
+DISPLAY_MATH = (("$$", "$$"), ("\\[", "\\]"))
+
+
+def read_lines(path):
+    """Yield a text file's lines; UTF-16 files are detected by their BOM"""
+    with open(path, "rb") as f:
+        head = f.read(2)
+    encoding = "utf-16" if head in (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE) else "utf-8-sig"
+    with open(path, encoding=encoding) as f:
+        for line in f:
+            yield line.rstrip("\r\n")
+
+
+def _math_closer(stripped):
+    """
+    False if the line doesn't open display math, None if it also closes
+    it, else the closing delimiter to look for.
+    """
+    for opener, closer in DISPLAY_MATH:
+        if stripped.startswith(opener):
+            rest = stripped[len(opener):]
+            return None if rest.endswith(closer) and rest else closer
+    return False
+
+
+def iter_blocks(lines):
+    """
+    Yield (kind, text): "heading", "math" (a display block) or "text"
+    (a run of non-blank lines).
+    """
+    buffer, closer = [], None
+
+    for line in lines:
+        stripped = line.strip()
+
+        if closer:
+            buffer.append(line)
+            if stripped.endswith(closer):
+                yield "math", "\n".join(buffer)
+                buffer, closer = [], None
+            continue
+
+        math_closer = _math_closer(stripped)
+        if math_closer is not False:
+            if buffer:
+                yield "text", "\n".join(buffer)
+            buffer = [line]
+            if math_closer is None:   # opened and closed on one line
+                yield "math", line
+                buffer = []
+            else:
+                closer = math_closer
+            continue
+
+        if HEADING.match(line) or not stripped:
+            if buffer:
+                yield "text", "\n".join(buffer)
+                buffer = []
+            if stripped:
+                yield "heading", line
+            continue
+
+        buffer.append(line)
+
+    if buffer:
+        # An unterminated math block is kept whole too
+        yield ("math" if closer else "text"), "\n".join(buffer)
+
+
+def split_text(text):
+    """
+    Sentence / line pieces of a block, cut only outside $...$.
+    Pieces keep their trailing whitespace, so "".join(pieces) == text.
+    """
+    # A cut is outside inline math if an even number of $ precede it
+    dollars = [m.start() for m in INLINE_MATH_DELIMITER.finditer(text)]
+    cuts = [
+        m.end() for m in SENTENCE_END.finditer(text)
+        if bisect.bisect_left(dollars, m.start()) % 2 == 0
+    ]
+    bounds = [0] + cuts + [len(text)]
+    return [text[start:end] for start, end in zip(bounds, bounds[1:]) if text[start:end]]
+
+
+def chunk_lines(lines, source, max_chars=Config.CHUNK_SIZE):
+    """
+    Yield {"content", "metadata": {"source", "section", "chunk"}} dicts.
+    A heading is kept with the first chunk of its section.
+    """
+    sections = []
+    buffer, size, has_body = [], 0, False
+    index = 0
+
+    def chunk():
+        return {
+            "content": "\n\n".join(part.strip() for part in buffer),
+            "metadata": {
+                "source": source,
+                "section": " > ".join(title for _, title in sections),
+                "chunk": index
+            }
+        }
+
+    for kind, text in iter_blocks(lines):
+        if kind == "heading":
+            if has_body:
+                yield chunk()
+                index += 1
+            level, title = HEADING.match(text).groups()
+            sections = [s for s in sections if s[0] < len(level)] + [(len(level), title)]
+            buffer, size, has_body = [text], len(text), False
+            continue
+
+        # An overlong block fills the current chunk sentence by sentence
+        pieces = [text] if kind == "math" or len(text) <= max_chars else split_text(text)
+        for i, piece in enumerate(pieces):
+            if has_body and size + len(piece) + 2 > max_chars:
+                yield chunk()
+                index += 1
+                buffer, size = [], 0
+            if i and has_body and buffer:
+                buffer[-1] += piece
+                size += len(piece)
+            else:
+                buffer.append(piece)
+                size += len(piece) + 2
+            has_body = True
+
+    if has_body:
+        yield chunk()
+
+
+def chunk_file(path, source=None, max_chars=Config.CHUNK_SIZE):
+    """Stream chunks of one file"""
+    yield from chunk_lines(read_lines(path), source or path, max_chars)
@@ -0,0 +1,148 @@
+"""
+Context Packer
+--------------
+Fits retrieved chunks into a prompt token budget.
+
+- ranks chunks by retrieval score
+- drops near-duplicates (word-trigram Jaccard similarity)
+- trims text repeated by the splitter's chunk overlap
+- stops (or truncates the last chunk) at the token budget
+
+Token counts use the same ~4 characters/token estimate as tracing.
+"""
+
+import re
+
+from config.settings import Config
+from tracing.tracer import estimate_tokens
+
+WORD_RE = re.compile(r"\w+")
+
+# Shortest shared boundary treated as splitter overlap (characters)
+MIN_OVERLAP_CHARS = 20
+
+# Don't bother truncating a chunk into less room than this
+MIN_PARTIAL_TOKENS = 48
+
+
+def _shingles(text, n=3):
+    words = WORD_RE.findall(text.lower())
+    if len(words) < n:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + n]) for i in range(len(words) - n + 1)}
+
+
+def _jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _boundary_overlap(first, second, max_chars):
+    """Length of the longest suffix of first that is a prefix of second"""
+    limit = min(len(first), len(second), max_chars)
+    for n in range(limit, MIN_OVERLAP_CHARS - 1, -1):
+        if first.endswith(second[:n]):
+            return n
+    return 0
+
+
+class ContextPacker:
+    def __init__(self, token_budget=Config.CONTEXT_TOKEN_BUDGET,
+                 dedup_threshold=Config.CONTEXT_DEDUP_THRESHOLD,
+                 max_overlap_chars=4 * Config.CHUNK_OVERLAP):
+        """
+        Parameters:
+        - token_budget: max estimated tokens for all packed chunks
+        - dedup_threshold: trigram Jaccard similarity at which a chunk
+          counts as a duplicate of one already packed
+        - max_overlap_chars: longest boundary overlap searched for
+        """
+        self.token_budget = token_budget
+        self.dedup_threshold = dedup_threshold
+        self.max_overlap_chars = max_overlap_chars
+
+    def pack(self, docs, higher_is_better=True):
+        """
+        Returns (packed_docs, stats).
+
+        Parameters:
+        - docs: retrieval results {"content", "source", "score"?}
+        - higher_is_better: False for distance scores (e.g. FAISS L2)
+        """
+        stats = {
+            "chunks_in": len(docs),
+            "chunks_out": 0,
+            "duplicates": 0,
+            "overlaps_trimmed": 0,
+            "truncated": 0,
+            "over_budget": 0,
+            "tokens_in": sum(estimate_tokens(doc["content"]) for doc in docs),
+            "tokens_out": 0
+        }
+
+        # Stable sort: retrieval order breaks ties and covers missing scores
+        ranked = sorted(
+            enumerate(docs),
+            key=lambda item: (
+                -item[1]["score"] if higher_is_better else item[1]["score"]
+            ) if item[1].get("score") is not None else 0.0
+        )
+
+        packed, kept_shingles = [], []
+        remaining = self.token_budget
+
+        for _, doc in ranked:
+            content = doc["content"].strip()
+            shingles = _shingles(content)
+
+            if any(_jaccard(shingles, kept) >= self.dedup_threshold for kept in kept_shingles):
+                stats["duplicates"] += 1
+                continue
+
+            trimmed = self._trim_overlap(content, doc.get("source"), packed)
+            if trimmed != content:
+                stats["overlaps_trimmed"] += 1
+                content = trimmed
+            if not content:
+                stats["duplicates"] += 1
+                continue
+
+            tokens = estimate_tokens(content)
+            if tokens > remaining:
+                if remaining < MIN_PARTIAL_TOKENS:
+                    stats["over_budget"] += 1
+                    continue
+                content = self._truncate(content, remaining)
+                tokens = estimate_tokens(content)
+                stats["truncated"] += 1
+
+            packed.append({**doc, "content": content})
+            kept_shingles.append(shingles)
+            remaining -= tokens
+
+        stats["chunks_out"] = len(packed)
+        stats["tokens_out"] = self.token_budget - remaining
+        stats["tokens_saved"] = stats["tokens_in"] - stats["tokens_out"]
+        return packed, stats
+
+    def _trim_overlap(self, content, source, packed):
+        """Remove text this chunk shares with a neighbouring chunk of the same source"""
+        for kept in packed:
+            if kept.get("source") != source:
+                continue
+            head = _boundary_overlap(kept["content"], content, self.max_overlap_chars)
+            if head:
+                content = content[head:].lstrip()
+            tail = _boundary_overlap(content, kept["content"], self.max_overlap_chars)
+            if tail:
+                content = content[:-tail].rstrip()
+        return content
+
+    def _truncate(self, content, tokens):
+        """Cut content to about `tokens` tokens at a word boundary"""
+        cut = content[:(tokens - 1) * 4]
+        space = cut.rfind(" ")
+        if space > len(cut) // 2:
+            cut = cut[:space]
+        return cut.rstrip() + " …"
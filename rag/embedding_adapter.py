@@ -0,0 +1,28 @@
+"""
+Embedding Adapter
+-----------------
+Exposes an EmbeddingModel (and its two-tier EmbeddingCache) through
+langchain's Embeddings interface, so the langchain FAISS store behind
+KnowledgeBase embeds chunks and queries through the cache.
+
+Kept out of rag.embeddings because langchain_core is slow to import.
+"""
+
+from langchain_core.embeddings import Embeddings
+
+
+class CachedEmbeddings(Embeddings):
+    def __init__(self, embedding_model):
+        """
+        embedding_model: rag.embeddings.EmbeddingModel
+        """
+        self.embedding_model = embedding_model
+
+    def embed_documents(self, texts):
+        return self.embedding_model.embed_documents(list(texts)).tolist()
+
+    def embed_query(self, text):
+        return self.embedding_model.embed_text(text).tolist()
+
+    def cache_stats(self):
+        return self.embedding_model.cache_stats()
@@ -2,14 +2,140 @@
 Embeddings Module
 -----------------
 Handles text embedding for RAG using SentenceTransformers.
+
+Embeddings are cached by content hash in two tiers:
+- a bounded in-memory LRU
+- a persistent sqlite store of float32 blobs
+
+The SentenceTransformer model is loaded on first use (or by load()),
+so importing this module stays cheap.
 """
 
-from sentence_transformers import SentenceTransformer
 import numpy as np
 
+from collections import OrderedDict
+import hashlib
+import os
+import sqlite3
+import threading
+
+from config.settings import Config
+
+
+class EmbeddingCache:
+    """
+    Content-hash keyed embedding cache (memory LRU in front of sqlite).
+    """
+
+    def __init__(self, db_path=None, max_items: int = 10000):
+        self.db_path = db_path
+        self.max_items = max_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if db_path:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    key TEXT PRIMARY KEY,
+                    vector BLOB
+                )
+            """)
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(model_name: str, text: str) -> str:
+        return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: list[str]) -> dict:
+        """
+        Look up keys in memory, then on disk.
+        Returns {key: vector} for every key that was found.
+        """
+        found = {}
+        with self._lock:
+            pending = []
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is None:
+                    pending.append(key)
+                else:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+                    self.memory_hits += 1
+
+            if pending and self._conn is not None:
+                # sqlite limits the number of bound parameters per query
+                for i in range(0, len(pending), 500):
+                    batch = pending[i:i + 500]
+                    rows = self._conn.execute(
+                        f"SELECT key, vector FROM embeddings "
+                        f"WHERE key IN ({','.join('?' * len(batch))})",
+                        batch
+                    ).fetchall()
+                    for key, blob in rows:
+                        vector = np.frombuffer(blob, dtype=np.float32)
+                        found[key] = vector
+                        self._remember(key, vector)
+                        self.disk_hits += 1
+
+            self.misses += sum(1 for key in pending if key not in found)
+
+        return found
+
+    def put_many(self, items: dict):
+        """Store {key: vector} in both tiers."""
+        with self._lock:
+            for key, vector in items.items():
+                self._remember(key, vector)
+
+            if self._conn is not None and items:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [
+                        (key, np.asarray(vector, dtype=np.float32).tobytes())
+                        for key, vector in items.items()
+                    ]
+                )
+                self._conn.commit()
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / max(lookups, 1),
+            "memory_items": len(self._memory)
+        }
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
 
 class EmbeddingModel:
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        cache_path: str = Config.EMBEDDING_CACHE_PATH,
+        cache_size: int = Config.EMBEDDING_CACHE_SIZE
+    ):
         """
         Initialize embedding model.
 
@@ -17,28 +143,63 @@ class EmbeddingModel:
         - Lightweight
         - Fast
         - Good enough for math text retrieval
+
+        Set cache_path=None to keep the cache in memory only.
         """
         self.model_name = model_name
-        self.model = SentenceTransformer(model_name)
+        self.cache = EmbeddingCache(cache_path, max_items=cache_size)
+        self._model = None
+        self._load_lock = threading.Lock()
+
+    @property
+    def model(self):
+        return self._model if self._model is not None else self.load()
+
+    def load(self):
+        """Import sentence_transformers and load the model (once)"""
+        with self._load_lock:
+            if self._model is None:
+                from sentence_transformers import SentenceTransformer
+                self._model = SentenceTransformer(self.model_name)
+        return self._model
 
     def embed_text(self, text: str) -> np.ndarray:
         """
         Embed a single text string.
         """
-        embedding = self.model.encode(
-            text,
-            convert_to_numpy=True,
-            normalize_embeddings=True
-        )
-        return embedding
+        return self.embed_documents([text])[0]
 
     def embed_documents(self, texts: list[str]) -> np.ndarray:
         """
         Embed multiple documents/chunks.
+        Only cache misses are sent to the model, in a single batch.
+        """
+        if not texts:
+            dim = self.model.get_sentence_embedding_dimension()
+            return np.empty((0, dim), dtype=np.float32)
+
+        keys = [EmbeddingCache.make_key(self.model_name, text) for text in texts]
+        found = self.cache.get_many(list(dict.fromkeys(keys)))
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+
+        if missing:
+            embeddings = self.model.encode(
+                list(missing.values()),
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            ).astype(np.float32)
+            computed = dict(zip(missing.keys(), embeddings))
+            self.cache.put_many(computed)
+            found.update(computed)
+
+        return np.vstack([found[key] for key in keys])
+
+    def cache_stats(self) -> dict:
+        """
+        Hit / miss counters for sizing the cache.
         """
-        embeddings = self.model.encode(
-            texts,
-            convert_to_numpy=True,
-            normalize_embeddings=True
-        )
-        return embeddings
+        return self.cache.stats()
@@ -0,0 +1,90 @@
+"""
+Hybrid Retrieval
+----------------
+Dense (FAISS) + sparse (BM25) retrieval fused with reciprocal-rank
+fusion. Both legs run concurrently; each is traced as its own span
+("rag_dense", "rag_sparse") so per-leg latency shows up with the other
+stage percentiles.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+from config.settings import Config
+from rag.bm25 import BM25Index
+from tracing.tracer import get_tracer
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """
+    Fuse ranked lists of ids: score(id) = sum over lists of 1 / (k + rank).
+    Returns [(id, score)], best first.
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class HybridSearch:
+    def __init__(self, rrf_k=Config.RRF_K, candidates=Config.HYBRID_CANDIDATES):
+        """
+        rrf_k: fusion constant (higher flattens the rank weighting)
+        candidates: each leg returns top_k * candidates ids before fusion
+        """
+        self.bm25 = BM25Index()
+        self.rrf_k = rrf_k
+        self.candidates = candidates
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hybrid")
+
+        self.last_timings = {}
+        self.totals = {"queries": 0, "dense_seconds": 0.0, "sparse_seconds": 0.0}
+
+    def _leg(self, name, search, queries, depth):
+        start = time.perf_counter()
+        with get_tracer().span(f"rag_{name}", queries=len(queries)):
+            ranked = search(queries, depth)
+        return ranked, time.perf_counter() - start
+
+    def _sparse(self, queries, depth):
+        return [[doc_id for doc_id, _ in self.bm25.search(q, depth)] for q in queries]
+
+    def search(self, queries, dense, top_k, sparse=None):
+        """
+        queries: list of query strings
+        dense: dense(queries, depth) -> one ranked id list per query
+        sparse: same for the sparse leg (default: self.bm25)
+        Returns one [(id, rrf_score)] list per query.
+        """
+        depth = top_k * self.candidates
+        dense_future = self._pool.submit(self._leg, "dense", dense, queries, depth)
+        sparse_future = self._pool.submit(self._leg, "sparse", sparse or self._sparse, queries, depth)
+        dense_ranked, dense_seconds = dense_future.result()
+        sparse_ranked, sparse_seconds = sparse_future.result()
+
+        start = time.perf_counter()
+        fused = [
+            reciprocal_rank_fusion([d, s], self.rrf_k)[:top_k]
+            for d, s in zip(dense_ranked, sparse_ranked)
+        ]
+
+        self.last_timings = {
+            "dense_ms": dense_seconds * 1000,
+            "sparse_ms": sparse_seconds * 1000,
+            "fusion_ms": (time.perf_counter() - start) * 1000
+        }
+        self.totals["queries"] += len(queries)
+        self.totals["dense_seconds"] += dense_seconds
+        self.totals["sparse_seconds"] += sparse_seconds
+        return fused
+
+    def stats(self):
+        """Average per-query latency of each leg"""
+        queries = max(self.totals["queries"], 1)
+        return {
+            "queries": self.totals["queries"],
+            "avg_dense_ms": self.totals["dense_seconds"] / queries * 1000,
+            "avg_sparse_ms": self.totals["sparse_seconds"] / queries * 1000,
+            "documents": len(self.bm25)
+        }
@@ -0,0 +1,108 @@
+"""
+Knowledge Base Segments
+-----------------------
+Read-only views the KnowledgeBase serves queries from.
+
+- Segment: one FAISS IndexIDMap2 with its chunk ids, documents and
+  BM25 index. Never modified once built; removed chunks are masked
+  with a FAISS IDSelector instead of being deleted from the index.
+- Snapshot: the base segment (last build / compaction) plus a small
+  delta segment with the chunks added since.
+
+refresh() builds the next Snapshot aside and publishes it with one
+reference assignment, so queries never take a lock and always see one
+consistent version of the knowledge base.
+"""
+
+import faiss
+import numpy as np
+
+from rag.bm25 import search_many
+
+
+class Segment:
+    def __init__(self, index, ids, docs, bm25=None, positions=None, dead=frozenset()):
+        """
+        Parameters:
+        - index: faiss.IndexIDMap2 (may be memory-mapped read-only)
+        - ids: FAISS id (position) -> chunk id
+        - docs: chunk id -> Document
+        - bm25: BM25Index over docs (None without hybrid retrieval)
+        - positions: chunk id -> position (built from ids if not given)
+        - dead: chunk ids removed since the segment was built
+        """
+        self.index = index
+        self.ids = ids
+        self.docs = docs
+        self.bm25 = bm25
+        self.positions = positions if positions is not None else {c: p for p, c in ids.items()}
+        self.dead = frozenset(dead)
+
+        self._params = None
+        if self.dead:
+            # Keep both selectors referenced: FAISS only holds raw pointers
+            self._dead_ids = faiss.IDSelectorBatch(
+                np.array([self.positions[c] for c in self.dead], dtype=np.int64)
+            )
+            self._live_ids = faiss.IDSelectorNot(self._dead_ids)
+            self._params = faiss.SearchParameters(sel=self._live_ids)
+
+    def __len__(self):
+        return len(self.ids) - len(self.dead)
+
+    def without(self, chunk_ids):
+        """Same segment with chunk_ids masked; work is proportional to the change"""
+        removed = {c for c in chunk_ids if c in self.positions}
+        if not removed:
+            return self
+        return Segment(self.index, self.ids, self.docs, self.bm25,
+                       self.positions, self.dead | removed)
+
+    def live_vectors(self):
+        """(vectors, chunk ids) of every chunk not masked"""
+        ids = faiss.vector_to_array(self.index.id_map)
+        vectors = faiss.downcast_index(self.index.index).reconstruct_n(0, self.index.ntotal)
+        keep = [i for i, position in enumerate(ids.tolist()) if self.ids[position] not in self.dead]
+        return vectors[keep], [self.ids[int(position)] for position in ids[keep]]
+
+    def search(self, vectors, k):
+        """[(distance, chunk id)] per query vector, nearest first"""
+        k = min(k, len(self))
+        if k <= 0:
+            return [[] for _ in range(len(vectors))]
+        distances, positions = self.index.search(vectors, k, params=self._params)
+        return [
+            [(d, self.ids[p]) for d, p in zip(row_d, row_p) if p != -1]
+            for row_d, row_p in zip(distances.tolist(), positions.tolist())
+        ]
+
+
+class Snapshot:
+    def __init__(self, base=None, delta=None):
+        self.base = base
+        self.delta = delta
+        self.segments = [s for s in (base, delta) if s is not None]
+        self.dead = frozenset().union(*(s.dead for s in self.segments))
+
+    def __len__(self):
+        return sum(len(s) for s in self.segments)
+
+    def doc(self, chunk_id):
+        """Document of a live chunk, or None"""
+        for segment in self.segments:
+            if chunk_id in segment.docs and chunk_id not in segment.dead:
+                return segment.docs[chunk_id]
+        return None
+
+    def dense(self, vectors, k):
+        """[(distance, chunk id)] per query vector across segments, nearest first"""
+        merged = [[] for _ in range(len(vectors))]
+        for segment in self.segments:
+            for hits, found in zip(merged, segment.search(vectors, k)):
+                hits.extend(found)
+        return [sorted(hits)[:k] for hits in merged]
+
+    def sparse(self, queries, k):
+        """BM25 chunk ids per query across segments, best first"""
+        indexes = [s.bm25 for s in self.segments]
+        return [[c for c, _ in search_many(indexes, q, k, exclude=self.dead)] for q in queries]
@@ -1,23 +1,89 @@
 # rag/knowledge_base.py - FIXED VERSION
 
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+# langchain / faiss / sentence_transformers take about a second to import,
+# so they are imported where used; constructing the KnowledgeBase pays it.
 
+from config.settings import Config
+from rag.bm25 import BM25Index
+from rag.chunker import chunk_file
+from rag.hybrid import HybridSearch
+
+import glob
+import hashlib
+import itertools
+import json
 import os
+import pickle
+import threading
+import time
+
+import numpy as np
+
+MANIFEST_VERSION = 3
+FILE_PATTERNS = ("*.md", "*.txt")
+
 
 class KnowledgeBase:
-    def __init__(self, kb_path, embed_model, chunk_size=500):
+    # retrieve() scores are FAISS L2 distances (lower = more relevant),
+    # or fused RRF scores (higher = more relevant) when hybrid
+    score_is_distance = True
+
+    def __init__(self, kb_path, embed_model, chunk_size=500, index_path=None,
+                 hybrid=Config.HYBRID_RETRIEVAL, chunker=Config.KB_CHUNKER,
+                 embedding_model=None, compact_ratio=Config.KB_COMPACT_RATIO):
+        """
+        chunker: "math" (rag.chunker: headings, whole formulas, no overlap)
+                 or "recursive" (langchain RecursiveCharacterTextSplitter)
+        embedding_model: rag.embeddings.EmbeddingModel to share (and its
+                 cache); one is created for embed_model if not given
+        compact_ratio: refresh() merges the delta segment and the removed
+                 chunks into a new base once they reach this fraction of it
+        """
         self.kb_path = kb_path
         self.chunk_size = chunk_size
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name=embed_model
-        )
-        self.vector_store = None
-    
+        self.chunker = chunker
+        self.chunk_overlap = 50 if chunker == "recursive" else 0
+        self.embed_model = embed_model
+        self.index_path = index_path or Config.VECTOR_STORE_PATH
+        self.compact_ratio = compact_ratio
+
+        from rag.embeddings import EmbeddingModel
+
+        # Chunks and queries are embedded through the EmbeddingCache; the
+        # model itself is only loaded on the first cache miss
+        self.embedding_model = embedding_model or EmbeddingModel(embed_model)
+        self._embeddings = None
+        self.last_build_stats = {}
+
+        # What queries read (rag.kb_segments.Snapshot); refresh() builds
+        # the next one aside and replaces this reference
+        self._snapshot = None
+        # Files behind the live snapshot; only refresh() replaces them
+        self._files = {}
+        self._stat_cache = {}
+        self._refresh_lock = threading.Lock()
+        self._watcher = None
+        self._stop_watching = threading.Event()
+
+        # Fuses FAISS with BM25 over the same chunks (one index per segment)
+        self.hybrid = HybridSearch() if hybrid else None
+        self.score_is_distance = self.hybrid is None
+
+    @property
+    def embeddings(self):
+        """langchain Embeddings over the same cached model"""
+        if self._embeddings is None:
+            from rag.embedding_adapter import CachedEmbeddings
+            self._embeddings = CachedEmbeddings(self.embedding_model)
+        return self._embeddings
+
     def build(self):
-        """Load documents and create vector store"""
+        """
+        Load the persisted knowledge base and re-embed only the files that
+        were added, changed or deleted since it was saved.
+        """
+        start = time.perf_counter()
+
         # Check if knowledge base path exists
         if not os.path.exists(self.kb_path):
             print(f"⚠️ Knowledge base path not found: {self.kb_path}")
@@ -25,56 +91,430 @@ class KnowledgeBase:
             # Create a dummy document
             with open(os.path.join(self.kb_path, "sample.md"), "w") as f:
                 f.write("# Sample Knowledge\n\nThis is a sample document.")
-        
-        # Load documents
+
         try:
-            loader = DirectoryLoader(
-                self.kb_path,
-                glob="**/*.md",
-                loader_cls=TextLoader
-            )
-            documents = loader.load()
-            
-            if not documents:
+            current = self._scan_files()
+
+            if not current:
                 print("⚠️ No documents found. Using empty vector store.")
                 return 0
-            
-            # Split into chunks
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=self.chunk_size,
-                chunk_overlap=50
-            )
-            chunks = text_splitter.split_documents(documents)
-            
-            # Create vector store
-            self.vector_store = FAISS.from_documents(
-                chunks, 
-                self.embeddings
+
+            manifest = self._load_manifest()
+            known = manifest["files"] if manifest else {}
+
+            added = [p for p in current if p not in known]
+            changed = [
+                p for p in current
+                if p in known and known[p]["sha256"] != current[p]
+            ]
+            removed = [p for p in known if p not in current]
+            dirty = bool(added or changed or removed)
+
+            # The saved base is memory-mapped: segments are never modified
+            snapshot = self._load_snapshot(manifest) if manifest else None
+            mode = "warm" if snapshot is not None else "cold"
+
+            if snapshot is None:
+                known = {}
+                added, changed, removed = list(current), [], []
+
+            to_embed = added + changed
+            files = {p: known[p] for p in current if p in known and p not in to_embed}
+            embedded, base_changed = 0, mode == "cold"
+            if to_embed or removed:
+                snapshot, embedded, compacted = self._apply_changes(
+                    snapshot, known, changed + removed,
+                    self._embedded_batches(to_embed, current, files)
+                )
+                base_changed = base_changed or compacted
+
+            if not snapshot:
+                print("⚠️ No chunks produced. Using empty vector store.")
+                return 0
+
+            self._snapshot, self._files = snapshot, files
+            if dirty or mode == "cold":
+                self._save(snapshot, files, base_changed)
+
+            total = len(snapshot)
+            elapsed = time.perf_counter() - start
+
+            self.last_build_stats = {
+                "mode": mode,
+                "seconds": elapsed,
+                "added": len(added),
+                "changed": len(changed),
+                "removed": len(removed),
+                "embedded_chunks": embedded,
+                "total_chunks": total
+            }
+
+            print(
+                f"✅ Built knowledge base with {total} chunks from {len(current)} documents "
+                f"({mode} start, {embedded} chunks re-embedded, {elapsed:.2f}s)"
             )
-            
-            print(f"✅ Built knowledge base with {len(chunks)} chunks from {len(documents)} documents")
-            return len(chunks)
-            
+            return total
+
         except Exception as e:
             print(f"❌ Error building knowledge base: {e}")
-            # Create empty vector store as fallback
-            from langchain.schema import Document
-            dummy_doc = Document(page_content="Dummy document", metadata={})
-            self.vector_store = FAISS.from_documents([dummy_doc], self.embeddings)
+            # Serve nothing rather than a half-built store; the next
+            # refresh() starts over from the files on disk
+            from rag.kb_segments import Snapshot
+            self._snapshot, self._files = Snapshot(), {}
             return 0
-    
+
+    def refresh(self):
+        """
+        Re-embed only the files added, changed or removed since the last
+        build / refresh, then publish the new version.
+
+        The next Snapshot is built aside: removed chunks are masked in the
+        base segment and the small delta segment is rebuilt with the new
+        ones, so the work grows with the changes since the last compaction,
+        not with the corpus. Publishing is one reference assignment:
+        queries never wait, and each sees the knowledge base entirely
+        before or entirely after a refresh. If anything fails, nothing
+        is published and the next refresh tries again.
+        Returns the number of files that changed.
+        """
+        with self._refresh_lock:
+            start = time.perf_counter()
+            snapshot, known = self._snapshot, self._files
+            current = self._scan_files()
+
+            added = [p for p in current if p not in known]
+            changed = [p for p in current if p in known and known[p]["sha256"] != current[p]]
+            removed = [p for p in known if p not in current]
+            if not (added or changed or removed):
+                return 0
+
+            to_embed = added + changed
+            files = {p: known[p] for p in current if p in known and p not in to_embed}
+            new_snapshot, embedded, compacted = self._apply_changes(
+                snapshot, known, changed + removed,
+                self._embedded_batches(to_embed, current, files)
+            )
+
+            # Queries already running finish on the old snapshot
+            self._snapshot, self._files = new_snapshot, files
+            self._save(new_snapshot, files, base_changed=compacted)
+
+            elapsed = time.perf_counter() - start
+            self.last_build_stats = {
+                "mode": "refresh",
+                "seconds": elapsed,
+                "added": len(added),
+                "changed": len(changed),
+                "removed": len(removed),
+                "embedded_chunks": embedded,
+                "total_chunks": len(new_snapshot),
+                "compacted": compacted
+            }
+            print(
+                f"🔄 Knowledge base reloaded: {len(added)} added, {len(changed)} changed, "
+                f"{len(removed)} removed ({embedded} chunks re-embedded, {elapsed:.2f}s"
+                f"{', compacted' if compacted else ''})"
+            )
+            return len(added) + len(changed) + len(removed)
+
+    def watch(self, interval=Config.KB_RELOAD_INTERVAL):
+        """Poll kb_path every `interval` seconds and refresh() on changes"""
+        if self._watcher is not None:
+            return self._watcher
+
+        def poll():
+            while not self._stop_watching.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"❌ Knowledge base reload failed: {e}")
+
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(target=poll, name="kb-watch", daemon=True)
+        self._watcher.start()
+        return self._watcher
+
+    def stop_watching(self):
+        if self._watcher is not None:
+            self._stop_watching.set()
+            self._watcher.join()
+            self._watcher = None
+
+    def _embedded_batches(self, rel_paths, hashes, files):
+        """(chunks, chunk ids, vectors) per embedding batch; records the ids in files"""
+        for batch in self._batches(self._iter_chunks(rel_paths, hashes, files)):
+            chunks = [doc for doc, _ in batch]
+            ids = [chunk_id for _, chunk_id in batch]
+            yield chunks, ids, self.embedding_model.embed_documents(
+                [doc.page_content for doc in chunks]
+            )
+
+    def _apply_changes(self, snapshot, known, to_drop, batches):
+        """
+        Return (snapshot, embedded_chunks, compacted): a new Snapshot with
+        the chunks of the `to_drop` files removed and every
+        _embedded_batches() batch added. The given snapshot is untouched.
+
+        Removed base chunks are only masked (id -> position lookups); the
+        delta segment is rebuilt from its live chunks plus the new ones.
+        Once the delta and the masked chunks reach compact_ratio of the
+        base, everything is merged into a new base (see _compact).
+        """
+        import faiss
+        from rag.kb_segments import Segment, Snapshot
+
+        stale = {chunk_id for p in to_drop for chunk_id in known[p]["ids"]}
+        base = snapshot.base if snapshot is not None else None
+        delta = snapshot.delta if snapshot is not None else None
+
+        index, ids, docs = None, {}, {}
+        if delta is not None:
+            vectors, kept = delta.without(stale).live_vectors()
+            if kept:
+                index = faiss.IndexIDMap2(faiss.IndexFlatL2(delta.index.d))
+                index.add_with_ids(vectors, np.arange(len(kept), dtype=np.int64))
+                ids = dict(enumerate(kept))
+                docs = {chunk_id: delta.docs[chunk_id] for chunk_id in kept}
+
+        # Embed only new / modified files, streamed in batches
+        embedded = 0
+        for chunks, chunk_ids, vectors in batches:
+            if index is None:
+                index = faiss.IndexIDMap2(faiss.IndexFlatL2(vectors.shape[1]))
+
+            positions = np.arange(len(ids), len(ids) + len(chunk_ids), dtype=np.int64)
+            index.add_with_ids(vectors, positions)
+            ids.update(zip(positions.tolist(), chunk_ids))
+            docs.update(zip(chunk_ids, chunks))
+            embedded += len(chunk_ids)
+
+        snapshot = Snapshot(
+            base.without(stale) if base is not None else None,
+            Segment(index, ids, docs, self._bm25(docs)) if ids else None
+        )
+
+        base_size = len(snapshot.base.ids) if snapshot.base is not None else 0
+        pending = len(snapshot.delta.ids if snapshot.delta is not None else ()) + len(snapshot.dead)
+        if pending and pending >= self.compact_ratio * base_size:
+            return self._compact(snapshot), embedded, True
+        return snapshot, embedded, False
+
+    def _compact(self, snapshot):
+        """
+        Merge the delta segment and the masked chunks into a new base.
+        Built aside from the live base (which may be memory-mapped), so
+        this is the one step whose time and memory grow with the corpus.
+        """
+        import faiss
+        from rag.kb_segments import Segment, Snapshot
+
+        base, delta = snapshot.base, snapshot.delta
+        if base is None:
+            return Snapshot(delta)
+
+        index = faiss.clone_index(base.index)
+        if base.dead:
+            index.remove_ids(np.array([base.positions[c] for c in base.dead], dtype=np.int64))
+        ids = {p: c for p, c in base.ids.items() if c not in base.dead}
+        docs = {c: doc for c, doc in base.docs.items() if c not in base.dead}
+
+        if delta is not None:
+            vectors, kept = delta.live_vectors()
+            next_id = max(ids) + 1 if ids else 0
+            positions = np.arange(next_id, next_id + len(kept), dtype=np.int64)
+            index.add_with_ids(vectors, positions)
+            ids.update(zip(positions.tolist(), kept))
+            docs.update((chunk_id, delta.docs[chunk_id]) for chunk_id in kept)
+
+        return Snapshot(Segment(index, ids, docs, self._bm25(docs)) if ids else None)
+
+    def _bm25(self, docs):
+        """BM25 index over {chunk id: Document} (None without hybrid retrieval)"""
+        if self.hybrid is None:
+            return None
+        bm25 = BM25Index()
+        bm25.add_many((chunk_id, doc.page_content) for chunk_id, doc in docs.items())
+        return bm25
+
+    def _scan_files(self):
+        """
+        Map each KB file (relative path) to its content hash.
+        Files whose size and mtime are unchanged aren't re-read.
+        """
+        hashes, stat_cache = {}, {}
+        paths = itertools.chain.from_iterable(
+            glob.glob(os.path.join(self.kb_path, "**", pattern), recursive=True)
+            for pattern in FILE_PATTERNS
+        )
+        for path in sorted(paths):
+            stat = os.stat(path)
+            cached = self._stat_cache.get(path)
+            if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+                digest = cached[2]
+            else:
+                with open(path, "rb") as f:
+                    digest = hashlib.sha256(f.read()).hexdigest()
+            stat_cache[path] = (stat.st_mtime_ns, stat.st_size, digest)
+            hashes[os.path.relpath(path, self.kb_path)] = digest
+        self._stat_cache = stat_cache
+        return hashes
+
+    def _split_file(self, rel_path):
+        """Load and chunk a single KB file (a generator of Documents)"""
+        path = os.path.join(self.kb_path, rel_path)
+
+        if self.chunker == "math":
+            from langchain_core.documents import Document
+            for chunk in chunk_file(path, source=path, max_chars=self.chunk_size):
+                yield Document(page_content=chunk["content"], metadata=chunk["metadata"])
+            return
+
+        from langchain_community.document_loaders import TextLoader
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+        loader = TextLoader(path)
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap
+        )
+        yield from text_splitter.split_documents(loader.load())
+
+    def _iter_chunks(self, rel_paths, hashes, files):
+        """(Document, chunk id) for each file; records the ids in files"""
+        for rel_path in rel_paths:
+            entry = files[rel_path] = {"sha256": hashes[rel_path], "ids": []}
+            for i, doc in enumerate(self._split_file(rel_path)):
+                # Content hash in the id: a changed file's new chunks never
+                # share ids with the old ones still being served
+                chunk_id = f"{rel_path}::{hashes[rel_path][:12]}::{i}"
+                entry["ids"].append(chunk_id)
+                yield doc, chunk_id
+
+    @staticmethod
+    def _batches(items, size=Config.EMBED_BATCH_SIZE):
+        items = iter(items)
+        while True:
+            batch = list(itertools.islice(items, size))
+            if not batch:
+                return
+            yield batch
+
+    def _settings(self):
+        """Anything that invalidates every stored vector when changed"""
+        return {
+            "version": MANIFEST_VERSION,
+            "embed_model": self.embed_model,
+            "chunker": self.chunker,
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap
+        }
+
+    def _manifest_path(self):
+        return os.path.join(self.index_path, "manifest.json")
+
+    def _load_manifest(self):
+        """Return the saved manifest, or None if it is missing or outdated"""
+        try:
+            with open(self._manifest_path()) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if manifest.get("settings") != self._settings():
+            print("⚠️ Vector store settings changed. Rebuilding from scratch.")
+            return None
+        return manifest
+
+
+    def _load_snapshot(self, manifest):
+        """The saved Snapshot (base memory-mapped read-only), or None"""
+        import faiss
+        from rag.kb_segments import Segment, Snapshot
+
+        segments = {}
+        try:
+            for name in ("base", "delta"):
+                index_file = os.path.join(self.index_path, f"{name}.faiss")
+                if not os.path.exists(index_file):
+                    continue
+                flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if name == "base" else 0
+                index = faiss.read_index(index_file, flags)
+                with open(os.path.join(self.index_path, f"{name}.pkl"), "rb") as f:
+                    ids, docs = pickle.load(f)
+                segments[name] = Segment(index, ids, docs, self._bm25(docs))
+        except Exception as e:
+            print(f"⚠️ Could not load saved vector store: {e}")
+            return None
+
+        if "base" not in segments:
+            return None
+        return Snapshot(segments["base"].without(manifest.get("dead", [])), segments.get("delta"))
+
+    def _save(self, snapshot, files, base_changed=True):
+        """
+        Persist segments first, manifest last, so a crash forces a rebuild.
+        The base is only rewritten after a build or compaction; a refresh
+        writes the delta segment and the masked ids. Files are written
+        aside and renamed into place: a base that a live segment has
+        memory-mapped is never truncated.
+        """
+        import faiss
+
+        os.makedirs(self.index_path, exist_ok=True)
+        if os.path.exists(self._manifest_path()):
+            os.remove(self._manifest_path())
+
+        segments = {"delta": snapshot.delta}
+        if base_changed:
+            segments["base"] = snapshot.base
+        for name, segment in segments.items():
+            index_file = os.path.join(self.index_path, f"{name}.faiss")
+            store_file = os.path.join(self.index_path, f"{name}.pkl")
+            if segment is None:
+                for path in (index_file, store_file):
+                    if os.path.exists(path):
+                        os.remove(path)
+                continue
+
+            faiss.write_index(segment.index, index_file + ".tmp")
+            with open(store_file + ".tmp", "wb") as f:
+                pickle.dump((segment.ids, segment.docs), f)
+            os.replace(index_file + ".tmp", index_file)
+            os.replace(store_file + ".tmp", store_file)
+
+        tmp_path = self._manifest_path() + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "settings": self._settings(),
+                "files": files,
+                "dead": sorted(snapshot.base.dead) if snapshot.base is not None else []
+            }, f, indent=2)
+        os.replace(tmp_path, self._manifest_path())
+
     def retrieve(self, query, top_k=3):
         """Retrieve relevant chunks"""
-        if not self.vector_store:
+        # One snapshot per query: refresh() may publish a new one meanwhile
+        snapshot = self._snapshot
+        if not snapshot:
             print("⚠️ Vector store not initialized")
             return []
-        
+
         try:
-            results = self.vector_store.similarity_search_with_score(
-                query, 
-                k=top_k
-            )
-            
+            if self.hybrid is not None:
+                fused = self.hybrid.search(
+                    [query],
+                    lambda queries, depth: self._dense_ranking(snapshot, queries, depth),
+                    top_k,
+                    sparse=snapshot.sparse
+                )[0]
+                results = [(snapshot.doc(chunk_id), score) for chunk_id, score in fused]
+            else:
+                vectors = self.embedding_model.embed_documents([query])
+                results = [
+                    (snapshot.doc(chunk_id), distance)
+                    for distance, chunk_id in snapshot.dense(vectors, top_k)[0]
+                ]
+
             return [
                 {
                     "content": doc.page_content,
@@ -82,7 +522,13 @@ class KnowledgeBase:
                     "score": float(score)
                 }
                 for doc, score in results
+                if doc is not None
             ]
         except Exception as e:
             print(f"❌ Error retrieving documents: {e}")
-            return []
\ No newline at end of file
+            return []
+
+    def _dense_ranking(self, snapshot, queries, depth):
+        """Chunk ids per query, nearest first (hybrid dense leg)"""
+        vectors = self.embedding_model.embed_documents(list(queries))
+        return [[chunk_id for _, chunk_id in hits] for hits in snapshot.dense(vectors, depth)]
@@ -2,60 +2,143 @@
 Retriever Module
 ----------------
 Performs similarity search over embedded knowledge chunks
-using FAISS.
+using FAISS. The index type (exact, IVF, PQ, HNSW, scalar quantized)
+is configurable; see rag.vector_index.
+
+With hybrid=True a BM25 index over the same chunks runs alongside,
+and the two rankings are fused (see rag.hybrid).
 """
 
-import faiss
 import numpy as np
+from config.settings import Config
 from rag.embeddings import EmbeddingModel
+from rag.hybrid import HybridSearch
+from rag.vector_index import build_index, index_memory_bytes, set_search_params
 
 
 class Retriever:
-    def __init__(self, documents: list[dict], embedding_model: EmbeddingModel):
+    def __init__(
+        self,
+        documents: list[dict],
+        embedding_model: EmbeddingModel,
+        index_type: str = Config.INDEX_TYPE,
+        nprobe: int = Config.INDEX_NPROBE,
+        ef_search: int = Config.INDEX_EF_SEARCH,
+        hybrid: bool = Config.HYBRID_RETRIEVAL,
+        **index_params
+    ):
         """
         Parameters:
         - documents: list of dicts with keys {"content", "source"}
         - embedding_model: instance of EmbeddingModel
+        - index_type: flat | ivf_flat | ivf_pq | hnsw | sq8 | fp16
+        - nprobe / ef_search: query-time knobs (IVF / HNSW)
+        - hybrid: also search a BM25 index and fuse the rankings
+        - index_params: passed to rag.vector_index.build_index
         """
         self.documents = documents
         self.embedding_model = embedding_model
+        self.index_type = index_type
+        self.index_params = index_params
 
         self.index = None
         self.embeddings = None
+        self.hybrid = HybridSearch() if hybrid else None
 
         self._build_index()
+        self.set_search_params(nprobe=nprobe, ef_search=ef_search)
 
     def _build_index(self):
-        """Build FAISS index from document embeddings."""
+        """Build (and train, if needed) the FAISS index from document embeddings."""
         texts = [doc["content"] for doc in self.documents]
 
+        # Object arrays let retrieve_many gather results with fancy indexing
+        self._contents = np.array(texts, dtype=object)
+        self._sources = np.array(
+            [doc.get("source", "unknown") for doc in self.documents],
+            dtype=object
+        )
+
         # Generate embeddings
-        self.embeddings = self.embedding_model.embed_documents(texts)
-        dim = self.embeddings.shape[1]
+        embeddings = self.embedding_model.embed_documents(texts)
+
+        # Cosine similarity (via inner product on normalized vectors)
+        self.index = build_index(embeddings, self.index_type, **self.index_params)
+
+        # Compressed indexes shouldn't also keep the float32 copy around
+        self.embeddings = embeddings if self.index_type == "flat" else None
+
+        if self.hybrid is not None:
+            self.hybrid.bm25.add_many(enumerate(texts))
+
+    def set_search_params(self, nprobe=None, ef_search=None):
+        """Tune recall vs latency without rebuilding"""
+        set_search_params(self.index, nprobe=nprobe, ef_search=ef_search)
 
-        # FAISS cosine similarity (via inner product on normalized vectors)
-        self.index = faiss.IndexFlatIP(dim)
-        self.index.add(self.embeddings)
+    def index_stats(self) -> dict:
+        return {
+            "index_type": type(self.index).__name__,
+            "vectors": self.index.ntotal,
+            "memory_bytes": index_memory_bytes(self.index)
+        }
 
     def retrieve(self, query: str, top_k: int = 3):
         """
         Retrieve top-k most relevant documents for a query.
         """
-        query_embedding = self.embedding_model.embed_text(query)
-        query_embedding = np.expand_dims(query_embedding, axis=0)
+        return self.retrieve_many([query], top_k)[0]
+
+    def retrieve_many(self, queries: list[str], top_k: int = 3):
+        """
+        Retrieve top-k documents for many queries at once.
+
+        All queries are embedded in one batch and searched with a
+        single FAISS call over the query matrix.
+        Returns one result list per query, in input order.
+        Scores are inner products, or fused RRF scores when hybrid.
+        """
+        if not queries:
+            return []
+
+        if self.hybrid is not None:
+            fused = self.hybrid.search(queries, self._dense_ranking, top_k)
+            return [
+                [
+                    {"content": self._contents[i], "source": self._sources[i], "score": score}
+                    for i, score in ranked
+                ]
+                for ranked in fused
+            ]
+
+        scores, indices = self._dense_search(queries, top_k)
 
-        scores, indices = self.index.search(query_embedding, top_k)
+        # -1 marks "no result" when top_k exceeds the index size
+        valid = indices != -1
+        safe_indices = np.where(valid, indices, 0)
+        contents = self._contents[safe_indices].tolist()
+        sources = self._sources[safe_indices].tolist()
+        scores = scores.tolist()
+        valid = valid.tolist()
 
-        results = []
-        for idx, score in zip(indices[0], scores[0]):
-            if idx == -1:
-                continue
+        return [
+            [
+                {"content": content, "source": source, "score": score}
+                for content, source, score, ok in zip(
+                    contents[q], sources[q], scores[q], valid[q]
+                )
+                if ok
+            ]
+            for q in range(len(queries))
+        ]
 
-            doc = self.documents[idx]
-            results.append({
-                "content": doc["content"],
-                "source": doc.get("source", "unknown"),
-                "score": float(score)
-            })
+    def _dense_search(self, queries, top_k):
+        query_embeddings = np.ascontiguousarray(
+            self.embedding_model.embed_documents(queries),
+            dtype=np.float32
+        )
+        return self.index.search(query_embeddings, top_k)
 
-        return results
+    def _dense_ranking(self, queries, depth):
+        """Ranked document positions per query (hybrid dense leg)"""
+        _, indices = self._dense_search(queries, depth)
+        return [[i for i in row if i != -1] for row in indices.tolist()]
@@ -0,0 +1,123 @@
+"""
+Vector Index Module
+-------------------
+Builds the FAISS index behind Retriever.
+
+Index types (all inner product on normalized vectors):
+- flat:      exact search over float32 vectors (baseline)
+- ivf_flat:  inverted lists; searches nprobe of nlist clusters
+- ivf_pq:    inverted lists + product quantization (smallest memory)
+- hnsw:      graph search; efSearch trades recall for speed
+- sq8:       int8 scalar quantization (4x smaller, exhaustive)
+- fp16:      float16 scalar quantization (2x smaller, exhaustive)
+
+IVF, PQ and int8 indexes are trained on (a sample of) the vectors at
+build time. Corpora too small to train on fall back to flat.
+"""
+
+import math
+
+import numpy as np
+
+from config.settings import Config
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw", "sq8", "fp16")
+
+# FAISS warns below ~39 training points per centroid
+MIN_POINTS_PER_CENTROID = 39
+
+
+def default_nlist(n):
+    """~4*sqrt(n) clusters, capped so every centroid gets enough points"""
+    return max(1, min(int(4 * math.sqrt(n)), n // MIN_POINTS_PER_CENTROID))
+
+
+def _pq_subquantizers(dim, m):
+    """Largest divisor of dim that is <= m (PQ needs dim % m == 0)"""
+    return max(d for d in range(1, min(m, dim) + 1) if dim % d == 0)
+
+
+def _training_sample(vectors, max_points, seed=0):
+    if len(vectors) <= max_points:
+        return vectors
+    rng = np.random.default_rng(seed)
+    return vectors[np.sort(rng.choice(len(vectors), max_points, replace=False))]
+
+
+def build_index(
+    vectors,
+    index_type=Config.INDEX_TYPE,
+    nlist=Config.INDEX_NLIST,
+    pq_m=Config.INDEX_PQ_M,
+    pq_bits=Config.INDEX_PQ_BITS,
+    hnsw_m=Config.INDEX_HNSW_M,
+    ef_construction=Config.INDEX_EF_CONSTRUCTION,
+    train_size=Config.INDEX_TRAIN_SIZE
+):
+    """
+    Create, train and fill an index over float32 `vectors`.
+
+    Parameters:
+    - index_type: one of INDEX_TYPES
+    - nlist: IVF clusters (0 = default_nlist)
+    - pq_m / pq_bits: PQ subquantizers and bits per code
+    - hnsw_m / ef_construction: HNSW graph degree and build effort
+    - train_size: max vectors used for training
+
+    Search knobs (nprobe, efSearch) are applied with set_search_params.
+    """
+    import faiss
+
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {index_type!r} (expected one of {INDEX_TYPES})")
+
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n, dim = vectors.shape
+    metric = faiss.METRIC_INNER_PRODUCT
+
+    nlist = nlist or default_nlist(n)
+    min_points = {
+        "ivf_flat": nlist,
+        "ivf_pq": max(nlist, 2 ** pq_bits),
+        "sq8": 1
+    }.get(index_type, 0)
+    if n < min_points:
+        print(f"⚠️ {n} vectors are too few to train {index_type}; using flat")
+        index_type = "flat"
+
+    if index_type == "flat":
+        index = faiss.IndexFlatIP(dim)
+    elif index_type == "ivf_flat":
+        index = faiss.IndexIVFFlat(faiss.IndexFlatIP(dim), dim, nlist, metric)
+    elif index_type == "ivf_pq":
+        m = _pq_subquantizers(dim, pq_m)
+        index = faiss.IndexIVFPQ(faiss.IndexFlatIP(dim), dim, nlist, m, pq_bits, metric)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, hnsw_m, metric)
+        index.hnsw.efConstruction = ef_construction
+    elif index_type == "sq8":
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, metric)
+    else:
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16, metric)
+
+    if not index.is_trained:
+        index.train(_training_sample(vectors, train_size))
+    if n:
+        index.add(vectors)
+    return index
+
+
+def set_search_params(index, nprobe=None, ef_search=None):
+    """Apply query-time knobs; ones that don't fit the index are ignored"""
+    import faiss
+
+    if nprobe is not None and hasattr(index, "nprobe"):
+        index.nprobe = min(nprobe, index.nlist)
+    if ef_search is not None and isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = ef_search
+
+
+def index_memory_bytes(index):
+    """Serialized size of the index (vectors / codes plus structure)"""
+    import faiss
+    return int(faiss.serialize_index(index).size)
@@ -0,0 +1,45 @@
+import io
+import wave
+
+import numpy as np
+
+from llm.client import LLMClient, LLMResponse
+from multimodal.asr_processor import GeminiASR
+
+
+class CountingStub(LLMClient):
+    def __init__(self):
+        self.calls = 0
+
+    def complete(self, prompt, model, max_tokens=1000, temperature=None):
+        self.calls += 1
+        return LLMResponse("find the derivative of x squared")
+
+
+class Upload(io.BytesIO):
+    type = "audio/wav"
+
+
+def wav(samples, rate=16000):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes((np.asarray(samples) * 32767).astype(np.int16).tobytes())
+    return Upload(buffer.getvalue())
+
+
+def test_empty_recording_needs_review_without_a_model_call():
+    stub = CountingStub()
+    result = GeminiASR(stub, "stub").transcribe_audio(wav([]))
+    assert stub.calls == 0
+    assert result["text"] == "" and result["needs_review"] and result["chunks"] == 0
+
+
+def test_speech_is_transcribed():
+    stub = CountingStub()
+    t = np.arange(16000 * 2) / 16000
+    result = GeminiASR(stub, "stub").transcribe_audio(wav(0.5 * np.sin(2 * np.pi * 220 * t)))
+    assert stub.calls == 1
+    assert result["text"] == "find the derivative of x squared"
@@ -0,0 +1,70 @@
+import asyncio
+import threading
+
+from agents.parser_agent import ParserAgent
+from batch.runner import BatchRunner, JsonlResultStore, make_agent_solver
+from llm.client import LLMClient
+
+
+class FailingClient(LLMClient):
+    def complete(self, prompt, model, max_tokens=1000, temperature=None):
+        raise ConnectionError("API unavailable")
+
+
+class StubAgents:
+    """Parser / retriever / solver / verifier in one; parse waits for retrieval"""
+
+    def __init__(self):
+        self.rag = self
+        self.retrieving = threading.Event()
+
+    def parse(self, raw_text):
+        # Only returns if retrieval started while the parser was running
+        assert self.retrieving.wait(5), "retrieval waited for the parser"
+        return {"problem_text": raw_text, "needs_clarification": False}
+
+    def retrieve(self, query, top_k=3):
+        self.retrieving.set()
+        return [{"content": "C(n,k)", "source": "kb.md", "score": 1.0}]
+
+    def solve(self, parsed, context_docs=None):
+        return {"solution": "ANSWER: 5/16", "context_used": context_docs}
+
+    def verify(self, parsed, solution):
+        return {"is_correct": True, "confidence": 0.9}
+
+
+def test_concurrency_is_not_capped_by_the_default_executor(tmp_path):
+    # Every solve waits until all of them are running at once
+    concurrency = 48
+    barrier = threading.Barrier(concurrency, timeout=10)
+
+    def solve(text):
+        barrier.wait()
+        return {"solution": text}
+
+    store = JsonlResultStore(str(tmp_path / "out.jsonl"))
+    runner = BatchRunner(solve, store, concurrency=concurrency, progress_every=0)
+    stats = asyncio.run(runner.run((str(i), f"p{i}") for i in range(concurrency)))
+    store.close()
+    assert stats["ok"] == concurrency and stats["error"] == 0
+
+
+def test_parser_failures_are_errors_and_retried(tmp_path):
+    agents = StubAgents()
+    solve = make_agent_solver(ParserAgent(model="stub", client=FailingClient()), agents, agents)
+    store = JsonlResultStore(str(tmp_path / "out.jsonl"))
+    runner = BatchRunner(solve, store, concurrency=2, progress_every=0)
+    stats = asyncio.run(runner.run([("1", "Solve x^2 = 4")]))
+    store.close()
+
+    assert stats["error"] == 1 and stats["ok"] == 0
+    assert store.completed_ids(include_failed=False) == set()
+
+
+def test_retrieval_overlaps_the_parser():
+    agents = StubAgents()
+    result = make_agent_solver(agents, agents, agents)("A coin is tossed 5 times.")
+    assert result["solution"] == "ANSWER: 5/16"
+    assert result["sources"] == ["kb.md"]
+    assert result["verification"]["is_correct"]
@@ -0,0 +1,119 @@
+import pytest
+
+from config.settings import Config
+from rag.embeddings import EmbeddingModel
+from rag.knowledge_base import KnowledgeBase
+
+BINOMIAL = "# Binomial\n\nP(X=k) = nCr p^k (1-p)^(n-k)"
+CHAIN = "# Chain rule\n\ndy/dx = dy/du * du/dx"
+PRODUCT = "# Product rule\n\n(uv)' = u'v + uv'"
+BAYES = "# Bayes\n\nP(A|B) = P(B|A) P(A) / P(B)"
+
+
+@pytest.fixture
+def make_kb(tmp_path):
+    kb_path = tmp_path / "kb"
+    kb_path.mkdir()
+    model = EmbeddingModel(Config.EMBEDDING_MODEL, cache_path=str(tmp_path / "embeddings.db"))
+
+    def make(**kwargs):
+        return KnowledgeBase(str(kb_path), Config.EMBEDDING_MODEL,
+                             index_path=str(tmp_path / "index"), embedding_model=model, **kwargs)
+    return kb_path, make
+
+
+def contents(kb, query="rule probability derivative Bayes"):
+    return " ".join(r["content"] for r in kb.retrieve(query, top_k=10))
+
+
+def test_refresh_publishes_a_new_snapshot_without_copying_the_base(make_kb):
+    kb_path, make = make_kb
+    (kb_path / "binomial.md").write_text(BINOMIAL)
+    (kb_path / "chain.md").write_text(CHAIN)
+    make().build()
+
+    kb = make(compact_ratio=10)
+    kb.build()
+    assert kb.last_build_stats["mode"] == "warm"
+    before = kb._snapshot
+
+    (kb_path / "chain.md").write_text(PRODUCT)
+    (kb_path / "binomial.md").unlink()
+    assert kb.refresh() == 2
+    assert not kb.last_build_stats["compacted"]
+
+    # The memory-mapped base is shared and masked, not copied or modified
+    assert kb._snapshot.base.index is before.base.index
+    assert "Product rule" in contents(kb)
+    assert "Chain rule" not in contents(kb) and "Binomial" not in contents(kb)
+    # Queries holding the old snapshot still see the old version
+    assert before.doc(next(iter(before.base.docs))) is not None
+    assert len(before) == len(before.base.ids)
+
+    # Warm restart restores base, delta and masked ids without re-embedding
+    restarted = make(compact_ratio=10)
+    restarted.build()
+    assert restarted.last_build_stats["embedded_chunks"] == 0
+    assert contents(restarted) == contents(kb)
+
+
+def test_refresh_compacts_once_changes_reach_the_ratio(make_kb):
+    kb_path, make = make_kb
+    (kb_path / "chain.md").write_text(CHAIN)
+    (kb_path / "binomial.md").write_text(BINOMIAL)
+    kb = make(compact_ratio=0.1)
+    kb.build()
+
+    (kb_path / "bayes.md").write_text(BAYES)
+    (kb_path / "chain.md").unlink()
+    assert kb.refresh() == 2
+    assert kb.last_build_stats["compacted"]
+    assert kb._snapshot.delta is None and not kb._snapshot.dead
+    assert "Bayes" in contents(kb) and "Chain rule" not in contents(kb)
+    assert len(kb._snapshot.base.bm25) == len(kb._snapshot)
+
+
+def test_a_failed_refresh_publishes_nothing_and_is_retried(make_kb, monkeypatch):
+    kb_path, make = make_kb
+    (kb_path / "chain.md").write_text(CHAIN)
+    kb = make()
+    kb.build()
+    live, files = kb._snapshot, kb._files
+
+    (kb_path / "chain.md").write_text(PRODUCT)
+    monkeypatch.setattr(kb.embedding_model, "embed_documents", lambda texts: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        kb.refresh()
+    assert kb._snapshot is live and kb._files is files
+    monkeypatch.undo()
+
+    assert "Chain rule" in contents(kb)
+    assert kb.refresh() == 1
+    assert "Product rule" in contents(kb) and "Chain rule" not in contents(kb)
+
+
+def test_refresh_after_a_failed_build_starts_over(make_kb, monkeypatch):
+    kb_path, make = make_kb
+    kb = make()
+    monkeypatch.setattr(kb, "_scan_files", lambda: 1 / 0)
+    kb.build()
+    assert kb.retrieve("anything") == []
+    monkeypatch.undo()
+
+    (kb_path / "bayes.md").write_text(BAYES)
+    assert kb.refresh() == 1
+    found = contents(kb, "Bayes P(A|B)")
+    assert "Bayes" in found and "Dummy document" not in found
+
+
+def test_model_is_loaded_on_the_first_embedding(make_kb):
+    kb_path, make = make_kb
+    (kb_path / "chain.md").write_text(CHAIN)
+    make().build()
+
+    kb = KnowledgeBase(str(kb_path), Config.EMBEDDING_MODEL, index_path=str(kb_path.parent / "index"),
+                       embedding_model=EmbeddingModel(Config.EMBEDDING_MODEL, cache_path=None))
+    kb.build()
+    assert kb.embedding_model._model is None
+    kb.retrieve("chain rule")
+    assert kb.embedding_model._model is not None
@@ -0,0 +1,67 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageDraw
+
+from llm.client import LLMClient, LLMResponse
+from multimodal.ocr_processor import GeminiOCR
+
+
+class CountingStub(LLMClient):
+    def __init__(self):
+        self.calls = 0
+
+    def complete(self, prompt, model, max_tokens=1000, temperature=None):
+        self.calls += 1
+        return LLMResponse(f"text {self.calls}")
+
+
+def worksheet(heads, fmt="PNG", **save_args):
+    image = Image.new("L", (600, 200), 255)
+    ImageDraw.Draw(image).text((40, 90), f"Find the probability of exactly {heads} heads.", fill=0)
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **save_args)
+    buffer.seek(0)
+    return buffer
+
+
+def test_near_identical_worksheets_are_not_shared():
+    stub = CountingStub()
+    ocr = GeminiOCR(stub, "stub")
+    first = ocr.extract_text(worksheet(3))
+    second = ocr.extract_text(worksheet(4))
+    assert stub.calls == 2
+    assert not second["cached"]
+    assert first["text"] != second["text"]
+
+
+def test_same_pixels_in_a_different_file_hit():
+    stub = CountingStub()
+    ocr = GeminiOCR(stub, "stub")
+    ocr.extract_text(worksheet(3))
+    again = ocr.extract_text(worksheet(3, compress_level=1))
+    assert stub.calls == 1
+    assert again["cached"] and again["text"] == "text 1"
+
+
+def test_without_preprocessing_keys_on_bytes():
+    stub = CountingStub()
+    ocr = GeminiOCR(stub, "stub", preprocess=False)
+    ocr.extract_text(worksheet(3))
+    assert ocr.extract_text(worksheet(3))["cached"]
+    assert not ocr.extract_text(worksheet(4))["cached"]
+    assert stub.calls == 2
+
+
+def test_concurrent_uploads_keep_consistent_stats():
+    stub = CountingStub()
+    ocr = GeminiOCR(stub, "stub", preprocess=False)
+    images = [worksheet(i % 4) for i in range(200)]
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(ocr.extract_text, images))
+
+    metrics = ocr.metrics()
+    assert metrics["calls"] == 200
+    assert metrics["cache_hits"] == sum(r["cached"] for r in results)
+    assert metrics["cache_hits"] + stub.calls == 200
+    assert len(ocr._digests) == 4
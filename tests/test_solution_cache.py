@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from memory.solution_cache import SolutionCache, normalize_problem, problem_key
+from memory.solution_memory import SolutionMemory
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1)  Find $\\frac{d}{dx} x^{2}$.", "find(d)/(dx)x^2"),
+    ("Q3. Solve x + 1 = 2", "solve x+1=2"),
+    ("(a) Find the roots", "find the roots"),
+    ("  2. Find x", "find x"),
+])
+def test_numbering_and_latex_are_folded(text, expected):
+    assert normalize_problem(text) == expected
+
+
+@pytest.mark.parametrize("first, second", [
+    ("2.5 + 3 = ?", "7.5 + 3 = ?"),
+    ("10.5 kg", "0.5 kg"),
+    ("3.5 + 2", "5 + 2"),
+    ("det(A) - det(a)", "det(a) - det(a)"),
+    ("If A = 2, find a", "If a = 2, find a"),
+])
+def test_different_problems_get_different_keys(first, second):
+    assert problem_key(first) != problem_key(second)
+
+
+def test_rewordings_share_a_key():
+    assert problem_key("1) Find $x^{2}$ + 1.") == problem_key("Find x^2+1")
+    assert problem_key("SOLVE x + 1 = 2") == problem_key("solve x+1=2")
+
+
+def test_verified_answer_is_not_served_for_another_problem():
+    memory = SolutionMemory(":memory:")
+    cache = SolutionCache(memory)
+    try:
+        cache.put("2.5 + 3 = ?", {"problem_text": "2.5 + 3"}, {"final_answer": "5.5"}, {"is_correct": True})
+
+        assert cache.get("7.5 + 3 = ?") is None
+        assert cache.get("2.5+3=?")["solution"] == {"final_answer": "5.5"}
+    finally:
+        memory.close()
+
+
+def verified_rows(memory, text):
+    with memory._connection() as conn:
+        return conn.execute(
+            "SELECT solution FROM solutions WHERE problem_key = ? AND is_correct = 1",
+            (problem_key(text),)
+        ).fetchall()
+
+
+def test_confirming_again_does_not_duplicate(tmp_path):
+    memory = SolutionMemory(str(tmp_path / "memory.db"))
+    cache = SolutionCache(memory)
+    parsed = {"problem_text": "x + 1 = 2"}
+    try:
+        first = cache.put("Solve x + 1 = 2", parsed, {"final_answer": "1"}, {})
+        assert cache.put("solve x+1=2", parsed, {"final_answer": "1"}, {}) == first
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            ids = set(pool.map(
+                lambda _: cache.put("Solve x + 1 = 2", parsed, {"final_answer": "1"}, {}), range(32)
+            ))
+        assert ids == {first}
+        assert len(verified_rows(memory, "Solve x + 1 = 2")) == 1
+
+        # A newly confirmed answer replaces the old one
+        second = cache.put("Solve x + 1 = 2", parsed, {"final_answer": "x = 1"}, {})
+        assert second != first
+        assert len(verified_rows(memory, "Solve x + 1 = 2")) == 1
+        assert cache.get("Solve x + 1 = 2")["id"] == second
+    finally:
+        memory.close()
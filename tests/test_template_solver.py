@@ -0,0 +1,66 @@
+import pytest
+
+from agents.template_solver import TemplateSolver
+from tools.calculator import Calculator
+
+
+@pytest.fixture(scope="module")
+def solver():
+    # In-process Calculator: no worker processes needed for these
+    return TemplateSolver(Calculator())
+
+
+def answer(solver, text):
+    result = solver.solve({"problem_text": text})
+    return result and result["solution"].splitlines()[0]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("A fair coin is tossed 5 times. Find the probability of exactly 2 heads.", "ANSWER: 5/16"),
+    ("A biased coin with probability of heads 0.3 is tossed 5 times. "
+     "Find the probability of exactly 2 heads.", "ANSWER: 3087/10000"),
+    ("A coin with P(H)=0.7 is tossed 3 times. Find the probability of exactly 2 heads.",
+     "ANSWER: 441/1000"),
+    ("An experiment is repeated 4 times and the probability of success is 1/3. "
+     "Find the probability of at least 3 successes.", "ANSWER: 1/9"),
+    ("A die is rolled 3 times. Find the probability of exactly one six.", "ANSWER: 25/72"),
+    ("A coin is tossed 4 times. Find the probability of no more than 1 head.", "ANSWER: 5/16"),
+    ("Find the derivative of x^3 + 2x", "ANSWER: f'(x) = 3*x**2 + 2"),
+    ("Solve x^2 - 5x + 6 = 0", "ANSWER: x = [2, 3]"),
+])
+def test_supported_templates(solver, text, expected):
+    assert answer(solver, text).startswith(expected)
+
+
+@pytest.mark.parametrize("text", [
+    # Bias stated in a form the template must not ignore
+    "A biased coin is tossed 5 times. Find the probability of exactly 2 heads.",
+    "A loaded die is rolled 3 times. Find the probability of exactly one six.",
+    "A die with probability of rolling a six is 1/4 is rolled 3 times. "
+    "Find the probability of exactly one six.",
+    "A coin with probability of tails 0.3 is tossed 5 times. Find the probability of exactly 2 heads.",
+    # Conditioning
+    "A coin is tossed 10 times. Find the probability of exactly 3 heads "
+    "given that the first toss is heads.",
+    "A coin is tossed 6 times. Find the probability of at least 2 heads given at least 1 head.",
+    "If the first toss is a head, a coin is tossed 4 times; find the probability of exactly 2 heads.",
+    # Comparisons and "or" between outcomes
+    "A die is rolled 5 times. Find the probability of exactly 2 numbers greater than 4.",
+    "A die is rolled 4 times. Find the probability of exactly 2 sixes or fives.",
+    "A die is rolled 4 times. Find the probability of exactly 2 numbers less than 3.",
+    "A die is rolled 6 times. Find the probability of exactly 3 even numbers.",
+    # A sub-range of the trials
+    "A coin is tossed 6 times. Find the probability of exactly 2 heads in the first 3 tosses.",
+    # Several experiments, dice or coins
+    "A coin is tossed 3 times and a die is rolled 4 times. Find the probability of exactly 2 sixes.",
+    "Two dice are rolled 3 times. Find the probability of exactly 2 sixes.",
+    "Three coins are tossed 4 times. Find the probability of exactly 2 heads.",
+    # Higher-order derivatives
+    "Find the second derivative of x^3",
+    "Find the 3rd derivative of x^5",
+    "Find d^2y/dx^2 of x^4",
+    "Differentiate x^3 twice",
+    "Find f''(x) for f(x) = x^3",
+])
+def test_unmodelled_problems_fall_back_to_llm(solver, text):
+    assert solver.solve({"problem_text": text}) is None
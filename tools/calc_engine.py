@@ -0,0 +1,281 @@
+"""
+Calculator execution engine.
+Runs Calculator methods in a warm pool of worker processes so a
+runaway integral / limit / simplify can be timed out and killed
+without stalling the caller.
+
+Example:
+    engine = CalculatorEngine(workers=2, timeout=5)
+    engine.run("evaluate", "integrate(exp(-x**2), (x, -oo, oo))")
+
+The engine also has Calculator's methods (evaluate, ...), so it can be
+passed anywhere a Calculator is expected.
+"""
+
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from config.settings import Config
+
+try:
+    import resource
+except ImportError:  # Windows: no per-process memory limits
+    resource = None
+
+# Only these Calculator methods may be called through the engine
+ALLOWED_METHODS = {"evaluate", "substitute_and_evaluate", "evaluate_many"}
+
+# How often a waiting manager thread checks for cancellation
+POLL_INTERVAL = 0.05
+
+
+def _worker_main(conn, memory_limit_mb):
+    """Worker process loop: receive (method, args), send the result"""
+    if resource is not None and memory_limit_mb:
+        limit = memory_limit_mb * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError):
+            pass
+
+    from tools.calculator import Calculator
+    calc = Calculator()
+    calc.evaluate("x**2 + 1")   # warm up sympy's parser
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+
+        method, args = message
+        try:
+            result = getattr(calc, method)(*args)
+        except MemoryError:
+            result = {"success": False, "error": "Memory limit exceeded"}
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        conn.send(result)
+
+
+class _Job:
+    def __init__(self, method, args, timeout):
+        self.method = method
+        self.args = args
+        self.timeout = timeout
+        self.future = Future()
+        self.future._calc_job = self
+        self.cancel_requested = threading.Event()
+        self.submitted_at = time.monotonic()
+
+
+class CalculatorEngine:
+    def __init__(self, workers=Config.CALC_WORKERS, timeout=Config.CALC_TIMEOUT,
+                 memory_limit_mb=Config.CALC_MEMORY_LIMIT_MB):
+        """
+        Parameters:
+        - workers: number of warm worker processes
+        - timeout: default seconds allowed per call
+        - memory_limit_mb: address-space limit per worker (Unix only)
+        """
+        self.workers = workers
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+
+        self._ctx = multiprocessing.get_context("spawn")
+        self._jobs = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._started_at = time.monotonic()
+
+        self._metrics = {
+            "submitted": 0,
+            "completed": 0,
+            "timeouts": 0,
+            "cancelled": 0,
+            "crashes": 0,
+            "queue_wait_total": 0.0,
+            "queue_wait_max": 0.0,
+            "busy_seconds": 0.0
+        }
+        self._busy = 0
+
+        self._threads = [
+            threading.Thread(target=self._manage, name=f"calc-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    # ---------- public API ----------
+
+    def submit(self, method, *args, timeout=None):
+        """Queue a Calculator call; returns a concurrent.futures.Future"""
+        if method not in ALLOWED_METHODS:
+            raise ValueError(f"Method not allowed: {method}")
+        if self._closed:
+            raise RuntimeError("CalculatorEngine is closed")
+
+        job = _Job(method, args, timeout or self.timeout)
+        with self._lock:
+            self._metrics["submitted"] += 1
+        self._jobs.put(job)
+        return job.future
+
+    def run(self, method, *args, timeout=None):
+        """Blocking call; returns the Calculator result dict"""
+        return self.submit(method, *args, timeout=timeout).result()
+
+    def cancel(self, future):
+        """
+        Cancel a queued or running call.
+        A running call is stopped by killing its worker process.
+        """
+        if future.cancel():
+            with self._lock:
+                self._metrics["cancelled"] += 1
+            return True
+
+        job = getattr(future, "_calc_job", None)
+        if job is not None and not future.done():
+            job.cancel_requested.set()
+            return True
+        return False
+
+    # ---------- Calculator interface ----------
+
+    def evaluate(self, expression):
+        return self.run("evaluate", expression)
+
+    def substitute_and_evaluate(self, expression, values):
+        return self.run("substitute_and_evaluate", expression, values)
+
+    def evaluate_many(self, expression, values):
+        return self.run("evaluate_many", expression, values)
+
+    @staticmethod
+    def check_probability_bounds(value):
+        # Plain float comparison, no SymPy: runs in-process
+        from tools.calculator import Calculator
+        return Calculator().check_probability_bounds(value)
+
+    def metrics(self):
+        """Pool utilization and queue-wait statistics"""
+        with self._lock:
+            m = dict(self._metrics)
+            busy = self._busy
+
+        uptime = time.monotonic() - self._started_at
+        started = m["completed"] + m["timeouts"] + m["crashes"]
+        m.update({
+            "workers": self.workers,
+            "busy_workers": busy,
+            "queued": self._jobs.qsize(),
+            "utilization": m["busy_seconds"] / max(uptime * self.workers, 1e-9),
+            "queue_wait_avg": m["queue_wait_total"] / max(started, 1)
+        })
+        return m
+
+    def close(self):
+        """Stop all workers; queued calls are cancelled"""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._jobs.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    # ---------- worker management ----------
+
+    def _spawn(self):
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.memory_limit_mb),
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        return process, parent_conn
+
+    def _kill(self, process, conn):
+        process.kill()
+        process.join()
+        conn.close()
+
+    def _manage(self):
+        """One thread per worker process: feed it jobs, enforce timeouts"""
+        process, conn = self._spawn()
+
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                try:
+                    conn.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+                process.join(timeout=1)
+                if process.is_alive():
+                    self._kill(process, conn)
+                return
+
+            if self._closed or not job.future.set_running_or_notify_cancel():
+                if self._closed:
+                    job.future.cancel()
+                continue
+
+            wait = time.monotonic() - job.submitted_at
+            started = time.monotonic()
+            with self._lock:
+                self._busy += 1
+                self._metrics["queue_wait_total"] += wait
+                self._metrics["queue_wait_max"] = max(self._metrics["queue_wait_max"], wait)
+
+            outcome, result = self._execute(conn, process, job)
+
+            with self._lock:
+                self._busy -= 1
+                self._metrics["busy_seconds"] += time.monotonic() - started
+                self._metrics[outcome] += 1
+
+            job.future.set_result(result)
+
+            if outcome != "completed":
+                # Worker is dead or stuck: replace it with a fresh one
+                self._kill(process, conn)
+                process, conn = self._spawn()
+
+    def _execute(self, conn, process, job):
+        try:
+            conn.send((job.method, job.args))
+        except (BrokenPipeError, OSError):
+            return "crashes", {"success": False, "error": "Calculator worker crashed"}
+
+        deadline = time.monotonic() + job.timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return "timeouts", {
+                    "success": False,
+                    "timeout": True,
+                    "error": f"Timed out after {job.timeout:g}s"
+                }
+            if job.cancel_requested.is_set():
+                return "cancelled", {
+                    "success": False,
+                    "cancelled": True,
+                    "error": "Cancelled"
+                }
+            if conn.poll(min(POLL_INTERVAL, remaining)):
+                try:
+                    return "completed", conn.recv()
+                except (EOFError, OSError):
+                    return "crashes", {"success": False, "error": "Calculator worker crashed"}
+            if not process.is_alive():
+                return "crashes", {"success": False, "error": "Calculator worker crashed"}
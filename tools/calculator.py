@@ -3,53 +3,114 @@ Safe mathematical calculator tool.
 Used by Solver Agent for numeric & symbolic verification.
 """
 
-import sympy as sp
-from sympy.parsing.sympy_parser import (
-    parse_expr,
-    standard_transformations,
-    implicit_multiplication_application
-)
-
-# Allowed transformations (prevents code execution)
-TRANSFORMATIONS = (
-    standard_transformations +
-    (implicit_multiplication_application,)
-)
-
-# Whitelisted symbols & functions
-ALLOWED_SYMBOLS = {
+from functools import lru_cache
+import math
+
+import numpy as np
+
+# SymPy costs ~0.4s to import, so it is only loaded on first use (the
+# app's warm-up thread usually gets there first).
+
+# Whitelisted symbols & functions (name -> sympy attribute)
+ALLOWED_NAMES = {
     # Constants
-    "pi": sp.pi,
-    "e": sp.E,
+    "pi": "pi",
+    "e": "E",
 
     # Functions
-    "sqrt": sp.sqrt,
-    "log": sp.log,
-    "ln": sp.log,
-    "exp": sp.exp,
-    "sin": sp.sin,
-    "cos": sp.cos,
-    "tan": sp.tan,
-    "asin": sp.asin,
-    "acos": sp.acos,
-    "atan": sp.atan,
-    "Abs": sp.Abs,
+    "sqrt": "sqrt",
+    "log": "log",
+    "ln": "log",
+    "exp": "exp",
+    "sin": "sin",
+    "cos": "cos",
+    "tan": "tan",
+    "asin": "asin",
+    "acos": "acos",
+    "atan": "atan",
+    "Abs": "Abs",
 
     # Algebra
-    "factor": sp.factor,
-    "simplify": sp.simplify,
-    "expand": sp.expand,
+    "factor": "factor",
+    "simplify": "simplify",
+    "expand": "expand",
+    "solve": "solve",
 
     # Calculus
-    "diff": sp.diff,
-    "integrate": sp.integrate,
-    "limit": sp.limit,
+    "diff": "diff",
+    "integrate": "integrate",
+    "limit": "limit",
 
     # Probability helpers
-    "binomial": sp.binomial
+    "binomial": "binomial"
 }
 
 
+@lru_cache(maxsize=None)
+def allowed_symbols():
+    import sympy as sp
+    return {name: getattr(sp, attr) for name, attr in ALLOWED_NAMES.items()}
+
+
+@lru_cache(maxsize=None)
+def transformations():
+    """Allowed transformations (prevents code execution)"""
+    from sympy.parsing.sympy_parser import (
+        standard_transformations,
+        implicit_multiplication_application
+    )
+    return standard_transformations + (implicit_multiplication_application,)
+
+
+def __getattr__(name):
+    # Module constants kept for callers that imported them directly
+    if name == "ALLOWED_SYMBOLS":
+        return allowed_symbols()
+    if name == "TRANSFORMATIONS":
+        return transformations()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Parsed / compiled expressions are immutable, so they are safe to share
+PARSE_CACHE_SIZE = 512
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_expression(expression: str):
+    """Parse with the safe transformations (cached per expression string)"""
+    from sympy.parsing.sympy_parser import parse_expr
+    return parse_expr(
+        expression,
+        local_dict=allowed_symbols(),
+        transformations=transformations(),
+        evaluate=True
+    )
+
+
+def _binomial(n, k):
+    """C(n, k), exact for integers, gamma-based otherwise"""
+    if float(n).is_integer() and float(k).is_integer():
+        return float(math.comb(int(n), int(k))) if 0 <= k <= n else 0.0
+    return math.gamma(n + 1) / (math.gamma(k + 1) * math.gamma(n - k + 1))
+
+
+# NumPy has no binomial; everything else maps to numpy directly
+NUMPY_MODULES = [{"binomial": np.vectorize(_binomial, otypes=[float])}, "numpy"]
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def compile_expression(expression: str, variables: tuple):
+    """Lambdify an expression into a NumPy function of `variables`"""
+    import sympy as sp
+    expr = parse_expression(expression)
+    unknown = {str(s) for s in expr.free_symbols} - set(variables)
+    if unknown:
+        raise ValueError(f"No values given for: {', '.join(sorted(unknown))}")
+
+    symbols = [sp.Symbol(name) for name in variables]
+    return sp.lambdify(symbols, expr, modules=NUMPY_MODULES)
+
+
 class Calculator:
     """
     Safe math execution engine using SymPy.
@@ -63,17 +124,14 @@ class Calculator:
             "sqrt(16)"
             "diff(x**2, x)"
         """
+        import sympy as sp
         try:
-            expr = parse_expr(
-                expression,
-                local_dict=ALLOWED_SYMBOLS,
-                transformations=TRANSFORMATIONS,
-                evaluate=True
-            )
+            expr = parse_expression(expression)
             return {
                 "success": True,
                 "result": str(expr),
-                "latex": sp.latex(expr)
+                "latex": sp.latex(expr),
+                "symbols": sorted(str(s) for s in getattr(expr, "free_symbols", ()))
             }
         except Exception as e:
             return {
@@ -89,12 +147,7 @@ class Calculator:
             values={"x": 2}
         """
         try:
-            expr = parse_expr(
-                expression,
-                local_dict=ALLOWED_SYMBOLS,
-                transformations=TRANSFORMATIONS,
-                evaluate=True
-            )
+            expr = parse_expression(expression)
             substituted = expr.subs(values)
             numeric = substituted.evalf()
             return {
@@ -109,6 +162,42 @@ class Calculator:
                 "error": str(e)
             }
 
+    def evaluate_many(self, expression: str, values: dict):
+        """
+        Evaluate an expression over arrays of variable values in one
+        vectorized NumPy call (for sampling answers or plotting).
+        Example:
+            expression="x**2 + y"
+            values={"x": [0, 1, 2], "y": 1}
+        """
+        try:
+            variables = tuple(sorted(values))
+            func = compile_expression(expression, variables)
+            arrays = [np.asarray(values[name], dtype=float) for name in variables]
+
+            result = func(*arrays)
+            # Constant expressions come back as scalars
+            shape = np.broadcast_shapes(*(a.shape for a in arrays)) if arrays else ()
+            result = np.broadcast_to(np.asarray(result, dtype=float), shape)
+
+            return {
+                "success": True,
+                "expression": str(parse_expression(expression)),
+                "values": result
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    def cache_info(self):
+        """Hit / miss counters of the parse and compile caches"""
+        return {
+            "parse": parse_expression.cache_info()._asdict(),
+            "compile": compile_expression.cache_info()._asdict()
+        }
+
     def check_probability_bounds(self, value):
         """
         Ensure probability is within [0,1].
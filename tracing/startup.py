@@ -0,0 +1,172 @@
+"""
+Startup Profiling
+-----------------
+Where cold-start time goes, and a background warm-up for the slow parts.
+
+- StartupProfiler records how long each import and each resource
+  (embedding model, vector index, SymPy parser, ...) took to load
+- Warmup loads named resources on a background thread, so the first
+  page can render while the embedding model and index are still loading
+
+Heavy packages (sympy, faiss, langchain, sentence_transformers,
+google.generativeai) are imported where they are used, so importing the
+app's modules stays cheap and the cost lands in these timings instead.
+"""
+
+import importlib
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.records = []
+        self._lock = threading.Lock()
+
+    def record(self, kind, name, seconds, error=None):
+        with self._lock:
+            self.records.append({
+                "kind": kind,
+                "name": name,
+                "seconds": seconds,
+                "at": time.perf_counter() - self.started,
+                "thread": threading.current_thread().name,
+                "error": error
+            })
+
+    def import_module(self, name):
+        """
+        Import and time a module.
+        Modules that are already loaded cost nothing and are not recorded.
+        """
+        if name in sys.modules:
+            return sys.modules[name]
+
+        start = time.perf_counter()
+        try:
+            module = importlib.import_module(name)
+        except ImportError as e:
+            self.record("import", name, time.perf_counter() - start, error=str(e))
+            raise
+        self.record("import", name, time.perf_counter() - start)
+        return module
+
+    @contextmanager
+    def importing(self, name):
+        """
+        Time a block of import statements.
+        Only the first run is recorded (Streamlit reruns the script).
+        """
+        with self._lock:
+            seen = any(r["name"] == name for r in self.records)
+        start = time.perf_counter()
+        yield
+        if not seen:
+            self.record("import", name, time.perf_counter() - start)
+
+    @contextmanager
+    def resource(self, name):
+        """Time loading a resource (recorded even if it fails)"""
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            self.record("resource", name, time.perf_counter() - start, error=error)
+
+    def report(self):
+        """Records, slowest first"""
+        with self._lock:
+            return sorted(self.records, key=lambda r: r["seconds"], reverse=True)
+
+    def print_report(self):
+        for r in self.report():
+            status = f"  ❌ {r['error']}" if r["error"] else ""
+            print(
+                f"{r['kind']:>8}  {r['name']:<40} {r['seconds'] * 1000:8.0f} ms  "
+                f"(+{r['at']:.2f}s, {r['thread']}){status}"
+            )
+
+
+class Warmup:
+    def __init__(self, profiler=None, workers=2):
+        """
+        profiler: StartupProfiler the load times are recorded in
+        workers: resources loaded at the same time
+        """
+        self.profiler = profiler or get_profiler()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="warmup")
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def _load(self, name, loader):
+        with self.profiler.resource(name):
+            return loader()
+
+    def submit(self, name, loader):
+        """Start loading a resource in the background (once per name)"""
+        with self._lock:
+            if name not in self._futures:
+                self._futures[name] = self._pool.submit(self._load, name, loader)
+            return self._futures[name]
+
+    def get(self, name, loader=None, timeout=None):
+        """
+        Wait for a resource.
+        With a loader, a resource that was never submitted is loaded on
+        the calling thread instead of queueing behind the warm-up.
+        """
+        run_here = False
+        with self._lock:
+            future = self._futures.get(name)
+            if future is None:
+                if loader is None:
+                    raise KeyError(name)
+                future = self._futures[name] = Future()
+                run_here = True
+
+        if run_here:
+            try:
+                future.set_result(self._load(name, loader))
+            except Exception as e:
+                future.set_exception(e)
+        return future.result(timeout)
+
+    def peek(self, name):
+        """The resource if it finished loading, else None (never blocks)"""
+        future = self._futures.get(name)
+        if future is None or not future.done() or future.exception() is not None:
+            return None
+        return future.result()
+
+    def status(self):
+        """{name: "loading" | "ready" | "failed: ..."}"""
+        status = {}
+        for name, future in list(self._futures.items()):
+            if not future.done():
+                status[name] = "loading"
+            elif future.exception() is not None:
+                status[name] = f"failed: {future.exception()}"
+            else:
+                status[name] = "ready"
+        return status
+
+
+_default_profiler = None
+_default_lock = threading.Lock()
+
+
+def get_profiler():
+    """Process-wide startup profiler"""
+    global _default_profiler
+    with _default_lock:
+        if _default_profiler is None:
+            _default_profiler = StartupProfiler()
+        return _default_profiler
@@ -0,0 +1,272 @@
+"""
+Tracing Module
+--------------
+Structured per-stage spans for the agent pipeline.
+
+Each span records:
+- stage name and wall time
+- model name
+- prompt / response token counts
+- retries and cache hits
+- error (if the stage raised)
+
+Spans are kept in a bounded in-memory buffer (for percentiles) and
+exposed as Prometheus text. Writing them to a JSONL file is opt-in
+(enable_trace_file), so benchmarks and batch runs don't append to the
+app's trace file.
+
+The innermost open span is available as current_span(), so code below
+the agents (e.g. the LLM client's retry loop) can annotate it.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from config.settings import Config
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def estimate_tokens(text) -> int:
+    """Rough token count (~4 characters per token)"""
+    return (len(text) + 3) // 4 if text else 0
+
+
+class Span:
+    def __init__(self, name, **attrs):
+        self.name = name
+        self.start = time.time()
+        self.seconds = None
+        self.model = attrs.pop("model", None)
+        self.prompt_tokens = attrs.pop("prompt_tokens", 0)
+        self.response_tokens = attrs.pop("response_tokens", 0)
+        self.retries = attrs.pop("retries", 0)
+        self.cache_hit = attrs.pop("cache_hit", False)
+        self.error = None
+        self.attrs = attrs
+
+    def record_usage(self, response=None, prompt=None, text=None):
+        """
+        Fill token counts from an Anthropic / Gemini response's usage
+        data, falling back to estimates from the prompt and text.
+        """
+        usage = getattr(response, "usage", None)
+        meta = getattr(response, "usage_metadata", None)
+
+        if usage is not None and getattr(usage, "input_tokens", None) is not None:
+            self.prompt_tokens += usage.input_tokens
+            self.response_tokens += usage.output_tokens
+        elif meta is not None and getattr(meta, "prompt_token_count", None) is not None:
+            self.prompt_tokens += meta.prompt_token_count
+            self.response_tokens += meta.candidates_token_count or 0
+        else:
+            self.prompt_tokens += estimate_tokens(prompt)
+            self.response_tokens += estimate_tokens(text)
+
+    def to_dict(self):
+        return {
+            "stage": self.name,
+            "start": self.start,
+            "seconds": self.seconds,
+            "model": self.model,
+            "prompt_tokens": self.prompt_tokens,
+            "response_tokens": self.response_tokens,
+            "retries": self.retries,
+            "cache_hit": self.cache_hit,
+            "error": self.error,
+            **self.attrs
+        }
+
+
+class Tracer:
+    def __init__(self, jsonl_path=None, max_spans=10000):
+        """
+        Parameters:
+        - jsonl_path: append every finished span here (None = memory only)
+        - max_spans: spans kept in memory for percentiles
+        """
+        self.jsonl_path = jsonl_path
+        self.spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self._file = None
+
+        # Lifetime totals for Prometheus counters (never truncated)
+        self._totals = {}
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """
+        Usage:
+            with tracer.span("solver", model="gemini-2.5-flash") as span:
+                response = ...
+                span.record_usage(response, prompt=prompt, text=response.text)
+        """
+        span = Span(name, **attrs)
+        token = _current_span.set(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.seconds = time.perf_counter() - start
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # Span opened in a generator that finished in another context
+                pass
+            self.record(span)
+
+    def set_jsonl_path(self, jsonl_path):
+        """Start (or stop, with None) appending spans to a JSONL file"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self.jsonl_path = jsonl_path
+
+    def record(self, span):
+        record = span.to_dict()
+        with self._lock:
+            self.spans.append(record)
+
+            totals = self._totals.setdefault(span.name, {
+                "count": 0, "seconds": 0.0, "prompt_tokens": 0,
+                "response_tokens": 0, "retries": 0, "cache_hits": 0, "errors": 0
+            })
+            totals["count"] += 1
+            totals["seconds"] += span.seconds
+            totals["prompt_tokens"] += span.prompt_tokens
+            totals["response_tokens"] += span.response_tokens
+            totals["retries"] += span.retries
+            totals["cache_hits"] += int(bool(span.cache_hit))
+            totals["errors"] += int(span.error is not None)
+
+            if self.jsonl_path:
+                if self._file is None:
+                    directory = os.path.dirname(self.jsonl_path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    self._file = open(self.jsonl_path, "a", encoding="utf-8")
+                self._file.write(json.dumps(record, default=str) + "\n")
+                self._file.flush()
+
+    def since(self, start):
+        """Spans that started at or after start (time.time())"""
+        with self._lock:
+            return [record for record in self.spans if record["start"] >= start]
+
+    def percentiles(self):
+        """
+        {stage: {"count", "p50_ms", "p95_ms", "p99_ms"}} over the
+        spans currently in memory.
+        """
+        with self._lock:
+            by_stage = {}
+            for record in self.spans:
+                by_stage.setdefault(record["stage"], []).append(record["seconds"])
+
+        summary = {}
+        for stage, seconds in by_stage.items():
+            values = np.percentile(seconds, [q * 100 for q in QUANTILES]) * 1000
+            summary[stage] = {
+                "count": len(seconds),
+                "p50_ms": float(values[0]),
+                "p95_ms": float(values[1]),
+                "p99_ms": float(values[2])
+            }
+        return summary
+
+    def prometheus_text(self, prefix="mathmentor"):
+        """Prometheus text exposition format"""
+        lines = [
+            f"# HELP {prefix}_stage_seconds Wall time per pipeline stage.",
+            f"# TYPE {prefix}_stage_seconds summary",
+        ]
+        percentiles = self.percentiles()
+        with self._lock:
+            totals = {stage: dict(t) for stage, t in self._totals.items()}
+
+        for stage, t in sorted(totals.items()):
+            p = percentiles.get(stage, {})
+            for q, key in zip(QUANTILES, ("p50_ms", "p95_ms", "p99_ms")):
+                if key in p:
+                    lines.append(
+                        f'{prefix}_stage_seconds{{stage="{stage}",quantile="{q}"}} {p[key] / 1000:.6f}'
+                    )
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {t["seconds"]:.6f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {t["count"]}')
+
+        counters = (
+            ("prompt_tokens", "Prompt tokens sent per stage."),
+            ("response_tokens", "Response tokens received per stage."),
+            ("retries", "Retries per stage."),
+            ("cache_hits", "Cache hits per stage."),
+            ("errors", "Failed stage executions."),
+        )
+        for key, help_text in counters:
+            lines.append(f"# HELP {prefix}_{key}_total {help_text}")
+            lines.append(f"# TYPE {prefix}_{key}_total counter")
+            for stage, t in sorted(totals.items()):
+                lines.append(f'{prefix}_{key}_total{{stage="{stage}"}} {t[key]}')
+
+        return "\n".join(lines) + "\n"
+
+    def serve_prometheus(self, port, host="0.0.0.0"):
+        """Serve /metrics on a background thread; returns the server"""
+        tracer = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = tracer.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+        return server
+
+
+_default_tracer = None
+_default_lock = threading.Lock()
+
+
+def get_tracer():
+    """Process-wide tracer (memory only until enable_trace_file)"""
+    global _default_tracer
+    with _default_lock:
+        if _default_tracer is None:
+            _default_tracer = Tracer()
+        return _default_tracer
+
+
+def enable_trace_file(path=Config.TRACE_PATH):
+    """Append the process-wide tracer's spans to path"""
+    tracer = get_tracer()
+    tracer.set_jsonl_path(path)
+    return tracer
+
+
+def current_span():
+    """Innermost open span in this context, or None"""
+    return _current_span.get()